@@ -0,0 +1,193 @@
+"""
+Abandoned cart detection and reminders.
+
+``scan_abandoned_carts`` runs every few minutes (the
+``detect_abandoned_carts`` command or Celery task). It reads only carts
+whose ``updated_at`` lies between the watermark and the abandonment
+cutoff, a range scan on the ``updated_at`` index. The watermark is the
+newest ``AbandonedCart.cart_updated_at``, so it survives restarts
+without any state of its own, and it never goes further back than
+MAX_AGE_DAYS. Carts are read in keyset batches. Each batch upserts its
+AbandonedCart rows in bulk and queues one ``send_cart_reminders`` task.
+A user gets at most one reminder per REMINDER_INTERVAL_HOURS, and none
+if email notifications are off.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, Exists, F, Max, OuterRef, Q, Sum
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.users.models import UserProfile
+from core.utils.helpers import enqueue_on_commit
+from .models import AbandonedCart, Cart, CartItem
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ABANDON_AFTER_MINUTES': 60,
+    'MAX_AGE_DAYS': 7,
+    'REMINDER_INTERVAL_HOURS': 72,
+    'HIGH_VALUE_SUBTOTAL': 1000000,
+    'BATCH_SIZE': 100,
+}
+
+
+def abandonment_setting(name):
+    return getattr(settings, 'CART_ABANDONMENT', {}).get(name, DEFAULTS[name])
+
+
+def segment_for(subtotal, has_orders):
+    if subtotal >= abandonment_setting('HIGH_VALUE_SUBTOTAL'):
+        return AbandonedCart.SEGMENT_HIGH_VALUE
+    if has_orders:
+        return AbandonedCart.SEGMENT_RETURNING
+    return AbandonedCart.SEGMENT_NEW
+
+
+def _stalled_carts(since, cutoff):
+    return (
+        Cart.objects.filter(updated_at__gt=since, updated_at__lte=cutoff)
+        .annotate(
+            count=Sum('items__quantity'),
+            value=Sum(
+                F('items__price_snapshot') * F('items__quantity'),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            ),
+            has_orders=Exists(Order.objects.filter(user_id=OuterRef('user_id'))),
+            opted_out=Exists(UserProfile.objects.filter(user_id=OuterRef('user_id'), email_notifications=False)),
+        )
+        .filter(count__gt=0)
+        .values('pk', 'user_id', 'updated_at', 'count', 'value', 'has_orders', 'opted_out', 'user__is_active')
+        .order_by('updated_at', 'pk')
+    )
+
+
+def scan_abandoned_carts(now=None, batch_size=None):
+    """
+    Record carts that stalled since the last scan and queue their reminders.
+    Returns ``(detected, reminders_queued)``.
+    """
+    if not abandonment_setting('ENABLED'):
+        return 0, 0
+    now = now or timezone.now()
+    batch_size = batch_size or abandonment_setting('BATCH_SIZE')
+    cutoff = now - timedelta(minutes=abandonment_setting('ABANDON_AFTER_MINUTES'))
+    since = now - timedelta(days=abandonment_setting('MAX_AGE_DAYS'))
+    watermark = AbandonedCart.objects.aggregate(watermark=Max('cart_updated_at'))['watermark']
+    if watermark and watermark > since:
+        since = watermark
+
+    carts = _stalled_carts(since, cutoff)
+    detected = queued = 0
+    after = None
+    while True:
+        batch = carts
+        if after is not None:
+            batch = batch.filter(Q(updated_at__gt=after[0]) | Q(updated_at=after[0], pk__gt=after[1]))
+        rows = list(batch[:batch_size])
+        if not rows:
+            break
+        after = (rows[-1]['updated_at'], rows[-1]['pk'])
+        queued += _record_batch(rows, now)
+        detected += len(rows)
+    return detected, queued
+
+
+def _record_batch(rows, now):
+    throttle = now - timedelta(hours=abandonment_setting('REMINDER_INTERVAL_HOURS'))
+    with transaction.atomic():
+        existing = {
+            row.cart_id: row
+            for row in AbandonedCart.objects.select_for_update().filter(cart_id__in=[row['pk'] for row in rows])
+        }
+        to_update, to_create, remind = [], [], []
+        for row in rows:
+            record = existing.get(row['pk']) or AbandonedCart(cart_id=row['pk'], user_id=row['user_id'])
+            record.segment = segment_for(row['value'], row['has_orders'])
+            record.items_count = row['count']
+            record.subtotal = row['value']
+            record.cart_updated_at = row['updated_at']
+            record.detected_at = now
+            record.recovered_at = None
+            record.reminder_queued_at = None
+            if (not row['opted_out'] and row['user__is_active']
+                    and (record.reminded_at is None or record.reminded_at < throttle)):
+                record.reminder_queued_at = now
+                remind.append(record)
+            (to_update if record.pk else to_create).append(record)
+
+        if to_update:
+            AbandonedCart.objects.bulk_update(to_update, [
+                'segment', 'items_count', 'subtotal', 'cart_updated_at', 'detected_at',
+                'recovered_at', 'reminder_queued_at',
+            ])
+        if to_create:
+            AbandonedCart.objects.bulk_create(to_create)
+
+        if remind:
+            from .tasks import send_cart_reminders
+
+            ids = [record.pk for record in remind if record.pk]
+            missing = [record.cart_id for record in remind if not record.pk]
+            if missing:
+                # Backends that cannot return ids from bulk_create.
+                ids += AbandonedCart.objects.filter(cart_id__in=missing).values_list('pk', flat=True)
+            enqueue_on_commit(send_cart_reminders, ids)
+    return len(remind)
+
+
+def send_reminders(abandoned_ids):
+    """
+    Email the queued reminders that still apply: the cart is unchanged since
+    detection and not recovered. Returns the number of emails sent.
+    """
+    from core.services.email import EmailService
+
+    records = list(
+        AbandonedCart.objects.filter(
+            pk__in=abandoned_ids, recovered_at__isnull=True, reminder_queued_at__isnull=False,
+            cart__updated_at=F('cart_updated_at'),
+        ).select_related('user')
+    )
+    items = {}
+    for item in CartItem.objects.filter(cart_id__in=[record.cart_id for record in records]).select_related('product'):
+        items.setdefault(item.cart_id, []).append(item)
+
+    email_service = EmailService()
+    sent = [
+        record.pk for record in records
+        if items.get(record.cart_id) and email_service.send_cart_reminder(record, items[record.cart_id])
+    ]
+    AbandonedCart.objects.filter(pk__in=sent).update(reminded_at=timezone.now())
+    return len(sent)
+
+
+def mark_recovered(cart):
+    """Called when the cart is checked out."""
+    AbandonedCart.objects.filter(cart=cart, recovered_at__isnull=True).update(recovered_at=timezone.now())
+
+
+def abandonment_metrics(days=30):
+    """Abandonment and recovery rates for carts detected in the last `days`."""
+    date_from = timezone.now() - timedelta(days=days)
+    segments = [key for key, _ in AbandonedCart.SEGMENT_CHOICES]
+    stats = AbandonedCart.objects.filter(detected_at__gte=date_from).aggregate(
+        abandoned=Count('pk'),
+        recovered=Count('pk', filter=Q(recovered_at__isnull=False)),
+        reminded=Count('pk', filter=Q(reminded_at__gte=F('detected_at'))),
+        value=Sum('subtotal'),
+        **{segment: Count('pk', filter=Q(segment=segment)) for segment in segments},
+    )
+    abandoned = stats['abandoned']
+    orders = Order.objects.filter(created_at__gte=date_from).count()
+    return {
+        'abandoned': abandoned,
+        'recovered': stats['recovered'],
+        'reminded': stats['reminded'],
+        'abandoned_value': stats['value'] or 0,
+        'abandonment_rate': round(abandoned / (abandoned + orders) * 100, 1) if abandoned + orders else 0,
+        'recovery_rate': round(stats['recovered'] / abandoned * 100, 1) if abandoned else 0,
+        'segments': {segment: stats[segment] for segment in segments},
+    }
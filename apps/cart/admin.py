@@ -1,5 +1,5 @@
 from django. contrib import admin
-from .models import Cart, CartItem
+from .models import AbandonedCart, Cart, CartItem
 
 
 class CartItemInline(admin.TabularInline):
@@ -15,4 +15,12 @@ class CartAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         """Allow admins to delete carts."""
-        return request.user.is_superuser or request.user.is_staff
\ No newline at end of file
+        return request.user.is_superuser or request.user.is_staff
+
+
+@admin.register(AbandonedCart)
+class AbandonedCartAdmin(admin.ModelAdmin):
+    list_display = ['user', 'segment', 'items_count', 'subtotal', 'detected_at', 'reminded_at', 'recovered_at']
+    list_filter = ['segment', 'detected_at']
+    search_fields = ['user__email']
+    readonly_fields = ['cart', 'user', 'cart_updated_at', 'detected_at', 'reminder_queued_at', 'reminded_at', 'recovered_at']
@@ -0,0 +1,173 @@
+"""
+JSON cart API for in-place cart edits.
+
+Each endpoint takes a JSON body and applies its edits with one
+conditional UPDATE per line, inserting the line only when it does not
+exist yet. Guest carts are edited in their cookie instead. The response
+holds only the changed lines and the new cart totals, so a quantity
+tweak does not re-render the cart page. ``batch`` sets several lines in
+one request.
+
+    POST api/add/     {"product": 1, "variant": null, "quantity": 2}
+    POST api/update/  {"product": 1, "variant": null, "quantity": 5}
+    POST api/remove/  {"product": 1, "variant": null}
+    POST api/batch/   {"lines": [{"product": 1, "quantity": 3}, {"product": 2, "quantity": 0}]}
+
+Lines are addressed by product and variant rather than by item id,
+because guest cart lines have no stable id.
+"""
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from apps.products.models import Product, ProductVariant
+from .guest import MAX_GUEST_LINES
+from .models import CartItem
+from .services import CartService
+from .summary import CartSummary, CartTotals
+from .templatetags.cart_filters import format_price
+
+MAX_BATCH_LINES = MAX_GUEST_LINES
+
+
+def _read_json(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ValueError('Invalid JSON')
+    if not isinstance(data, dict):
+        raise ValueError('Invalid JSON')
+    return data
+
+
+def _parse_line(data, replace, default_quantity=None):
+    """One ``(product_id, variant_id, quantity, replace)`` change from a JSON line."""
+    if not isinstance(data, dict):
+        raise ValueError('Invalid line')
+    try:
+        product_id = int(data['product'])
+        variant_id = int(data.get('variant') or 0) or None
+        quantity = int(data['quantity'] if default_quantity is None else data.get('quantity', default_quantity))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('Invalid line')
+    if quantity < (0 if replace else 1):
+        raise ValueError('Invalid quantity')
+    return product_id, variant_id, quantity, replace
+
+
+def _load_catalog(changes):
+    """Active products and variants of the changes; lines being added must exist."""
+    products = Product.objects.filter(is_active=True).in_bulk({change[0] for change in changes})
+    variant_ids = {change[1] for change in changes if change[1]}
+    variants = ProductVariant.objects.in_bulk(variant_ids) if variant_ids else {}
+
+    for product_id, variant_id, quantity, replace in changes:
+        if replace and quantity == 0:
+            continue  # Removing a line that has gone unavailable is fine.
+        if product_id not in products:
+            raise ValueError('Product not available')
+        if variant_id and (variant_id not in variants or variants[variant_id].product_id != product_id):
+            raise ValueError('Variant not available')
+    return products, variants
+
+
+def _line_payload(product_id, variant_id, item, currency):
+    subtotal = item.get_subtotal() if item else 0
+    return {
+        'product': product_id,
+        'variant': variant_id,
+        'id': item.id if item else None,
+        'quantity': item.quantity if item else 0,
+        'subtotal': str(subtotal),
+        'subtotal_display': format_price(subtotal, currency),
+    }
+
+
+def _totals_payload(totals, currency):
+    return {
+        'count': totals.count,
+        'subtotal': str(totals.subtotal),
+        'delivery_fee': str(totals.delivery_fee),
+        'total': str(totals.total),
+        'is_free_delivery': totals.is_free_delivery,
+        'display': {
+            'subtotal': format_price(totals.subtotal, currency),
+            'delivery_fee': format_price(totals.delivery_fee, currency),
+            'total': format_price(totals.total, currency),
+            'remaining_for_free_delivery': format_price(totals.remaining_for_free_delivery, currency),
+        },
+    }
+
+
+def apply_cart_changes(request, changes):
+    """Apply `changes` to the request's cart; the JSON response with changed lines and totals."""
+    try:
+        products, variants = _load_catalog(changes)
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+
+    keys = list(dict.fromkeys((product_id, variant_id) for product_id, variant_id, _, _ in changes))
+    if request.user.is_authenticated:
+        cart = CartService(request.user).apply_changes(changes, products, variants)
+        lines = CartItem.objects.filter(cart=cart, product_id__in={key[0] for key in keys}).only(
+            'id', 'product_id', 'variant_id', 'quantity', 'price_snapshot'
+        )
+        lines = {(item.product_id, item.variant_id): item for item in lines}
+        totals = CartTotals.for_cart(cart)
+    else:
+        if not request.guest_cart.apply(changes):
+            return JsonResponse({'success': False, 'error': 'Cart is full'}, status=400)
+        totals = CartSummary.for_guest(request.guest_cart)
+        lines = {
+            (item.product.pk, item.variant.pk if item.variant else None): item
+            for item in totals.items
+        }
+
+    currency = request.currency
+    return JsonResponse({
+        'success': True,
+        'lines': [_line_payload(*key, lines.get(key), currency) for key in keys],
+        'cart': _totals_payload(totals, currency),
+    })
+
+
+def _single_line(request, replace, default_quantity=None, quantity=None):
+    try:
+        data = _read_json(request)
+        if quantity is not None:
+            data['quantity'] = quantity
+        change = _parse_line(data, replace, default_quantity)
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+    return apply_cart_changes(request, [change])
+
+
+@require_POST
+def add_view(request):
+    """Add ``quantity`` (default 1) of a product to the cart."""
+    return _single_line(request, replace=False, default_quantity=1)
+
+
+@require_POST
+def update_view(request):
+    """Set the quantity of a line; zero removes it."""
+    return _single_line(request, replace=True)
+
+
+@require_POST
+def remove_view(request):
+    return _single_line(request, replace=True, quantity=0)
+
+
+@require_POST
+def batch_view(request):
+    """Set the quantity of up to MAX_BATCH_LINES lines; a zero quantity removes the line."""
+    try:
+        lines = _read_json(request).get('lines')
+        if not isinstance(lines, list) or not 0 < len(lines) <= MAX_BATCH_LINES:
+            raise ValueError('Invalid lines')
+        changes = [_parse_line(line, replace=True) for line in lines]
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+    return apply_cart_changes(request, changes)
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class CartConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.cart'
-    verbose_name = 'Cart'
\ No newline at end of file
+    verbose_name = 'Cart'
+
+    def ready(self):
+        import apps.cart.signals
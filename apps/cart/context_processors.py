@@ -1,26 +1,27 @@
 """
 Cart context processor to make cart available in all templates.
 """
-from .models import Cart
+from django.db.models import Sum
+
+from .models import CartItem
 
 
 def cart(request):
     """
     Add cart to template context.
-    """
 
+    Pages that already loaded a CartSummary reuse its count; otherwise the
+    count is one aggregate query (nothing for guests, whose cart is a cookie).
+    """
+    summary = getattr(request, 'cart_summary', None)
     user = getattr(request, 'user', None)
-    if user and hasattr(user, 'is_authenticated') and user.is_authenticated:
-
-    # if hasattr(request, 'user') and request.user.is_authenticated:
-# >>>>>>> 739dbdd (WIP: all local changes before rebase)
-        try:
-            user_cart = Cart.objects.get(user=user)
-            cart_count = user_cart.items_count
-        except Cart.DoesNotExist:
-            cart_count = 0
+    if summary is not None:
+        cart_count = summary.count
+    elif user and hasattr(user, 'is_authenticated') and user.is_authenticated:
+        cart_count = CartItem.objects.filter(cart__user=user).aggregate(count=Sum('quantity'))['count'] or 0
     else:
-        cart_count = 0
+        guest_cart = getattr(request, 'guest_cart', None)
+        cart_count = guest_cart.items_count if guest_cart else 0
 
     return {
         'cart_count': cart_count,
@@ -0,0 +1,206 @@
+"""
+Guest carts for anonymous shoppers.
+
+The cart lives in a signed cookie as ``product.variant.quantity`` triples,
+so bots and window shoppers cost no database row or cache entry. The
+signature is timestamped: a cart untouched for GUEST_CART_MAX_AGE is
+simply ignored, and abandoned carts expire without any cleanup job. On
+login the lines are merged into the user's persistent Cart.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef
+
+from apps.products.models import Product, ProductVariant
+from .revalidation import current_price
+from .summary import primary_image
+
+GUEST_CART_COOKIE = 'guest_cart'
+GUEST_CART_SALT = 'apps.cart.guest'
+GUEST_CART_MAX_AGE = 60 * 60 * 24 * 14
+# Keeps the cookie well under the 4 KB browser limit.
+MAX_GUEST_LINES = 50
+MAX_LINE_QUANTITY = 999
+
+
+class GuestCartItem:
+    """A guest cart line with its product loaded, shaped like CartItem."""
+
+    def __init__(self, index, product, variant, quantity):
+        self.id = index
+        self.product = product
+        self.variant = variant
+        self.quantity = quantity
+        self.image_name = getattr(product, 'image_name', None)
+        self.price_snapshot = current_price(
+            product.price, product.discount_percentage, variant.price_adjustment if variant else None
+        )
+
+    def get_subtotal(self):
+        return self.price_snapshot * self.quantity
+
+
+class GuestCart:
+    """Lines of an anonymous cart; `modified` tells the middleware to rewrite the cookie."""
+
+    def __init__(self, lines=None):
+        self.lines = lines or []
+        self.modified = False
+
+    @classmethod
+    def from_request(cls, request):
+        value = request.get_signed_cookie(
+            GUEST_CART_COOKIE, default='', salt=GUEST_CART_SALT, max_age=GUEST_CART_MAX_AGE
+        )
+        lines = []
+        for part in value.split(',')[:MAX_GUEST_LINES] if value else ():
+            try:
+                product_id, variant_id, quantity = (int(number) for number in part.split('.'))
+            except ValueError:
+                continue
+            if product_id > 0 and quantity > 0:
+                lines.append([product_id, variant_id or None, min(quantity, MAX_LINE_QUANTITY)])
+        return cls(lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    @property
+    def items_count(self):
+        return sum(quantity for _, _, quantity in self.lines)
+
+    def add(self, product_id, variant_id, quantity=1):
+        for line in self.lines:
+            if line[0] == product_id and line[1] == variant_id:
+                line[2] = min(line[2] + quantity, MAX_LINE_QUANTITY)
+                break
+        else:
+            if len(self.lines) >= MAX_GUEST_LINES:
+                return False
+            self.lines.append([product_id, variant_id, min(quantity, MAX_LINE_QUANTITY)])
+        self.modified = True
+        return True
+
+    def set(self, product_id, variant_id, quantity):
+        """Set a line's quantity, adding or removing the line as needed."""
+        for index, line in enumerate(self.lines):
+            if line[0] == product_id and line[1] == variant_id:
+                self.update(index, quantity)
+                return
+        if quantity > 0:
+            self.lines.append([product_id, variant_id, min(quantity, MAX_LINE_QUANTITY)])
+            self.modified = True
+
+    def apply(self, changes):
+        """
+        Apply ``(product_id, variant_id, quantity, replace)`` changes in order:
+        `replace` sets the quantity, otherwise it is added. Returns False,
+        leaving the cart untouched, if the new lines would not fit.
+        """
+        keys = {(product_id, variant_id) for product_id, variant_id, _ in self.lines}
+        new = {(product_id, variant_id) for product_id, variant_id, quantity, _ in changes if quantity > 0} - keys
+        if len(keys) + len(new) > MAX_GUEST_LINES:
+            return False
+        for product_id, variant_id, quantity, replace in changes:
+            if replace:
+                self.set(product_id, variant_id, quantity)
+            else:
+                self.add(product_id, variant_id, quantity)
+        return True
+
+    def update(self, index, quantity):
+        if 0 <= index < len(self.lines):
+            if quantity <= 0:
+                del self.lines[index]
+            else:
+                self.lines[index][2] = min(quantity, MAX_LINE_QUANTITY)
+            self.modified = True
+
+    def remove(self, index):
+        self.update(index, 0)
+
+    def clear(self):
+        self.modified = self.modified or bool(self.lines)
+        self.lines = []
+
+    def get_total(self, currency='UZS'):
+        """Cart total in `currency`, like Cart.get_total."""
+        from core.services.currency import CurrencyService
+
+        total = sum(item.get_subtotal() for item in self.items())
+        if currency != 'UZS':
+            total = CurrencyService().convert(total, 'UZS', currency)
+        return total
+
+    def items(self):
+        """Lines with products and variants loaded; unavailable products are skipped."""
+        if not self.lines:
+            return []
+        products = Product.objects.select_related('category').annotate(
+            image_name=primary_image(OuterRef('pk'))
+        ).in_bulk(
+            {product_id for product_id, _, _ in self.lines}
+        )
+        variant_ids = {variant_id for _, variant_id, _ in self.lines if variant_id}
+        variants = ProductVariant.objects.in_bulk(variant_ids) if variant_ids else {}
+
+        items = []
+        for index, (product_id, variant_id, quantity) in enumerate(self.lines):
+            product = products.get(product_id)
+            variant = variants.get(variant_id) if variant_id else None
+            if product is None or not product.is_active or (variant_id and variant is None):
+                continue
+            items.append(GuestCartItem(index, product, variant, quantity))
+        return items
+
+    def save(self, response):
+        if not self.lines:
+            response.delete_cookie(GUEST_CART_COOKIE)
+            return
+        value = ','.join(f'{product_id}.{variant_id or 0}.{quantity}' for product_id, variant_id, quantity in self.lines)
+        response.set_signed_cookie(
+            GUEST_CART_COOKIE, value, salt=GUEST_CART_SALT, max_age=GUEST_CART_MAX_AGE,
+            samesite='Lax', secure=settings.SESSION_COOKIE_SECURE, httponly=True,
+        )
+
+
+def merge_guest_cart(guest_cart, user):
+    """
+    Move the guest lines into the user's Cart: one read of the existing
+    items, then one bulk UPDATE for lines already there and one bulk
+    INSERT for new ones. Quantities are added together.
+    """
+    from .models import Cart, CartItem
+
+    items = guest_cart.items()
+    if not items:
+        guest_cart.clear()
+        return 0
+
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user)
+        existing = {
+            (item.product_id, item.variant_id): item
+            for item in CartItem.objects.select_for_update().filter(
+                cart=cart, product_id__in=[item.product.pk for item in items]
+            )
+        }
+        to_update, to_create = [], []
+        for item in items:
+            current = existing.get((item.product.pk, item.variant.pk if item.variant else None))
+            if current is not None:
+                current.quantity += item.quantity
+                to_update.append(current)
+            else:
+                to_create.append(CartItem(
+                    cart=cart, product=item.product, variant=item.variant,
+                    quantity=item.quantity, price_snapshot=item.price_snapshot,
+                ))
+        if to_update:
+            CartItem.objects.bulk_update(to_update, ['quantity'])
+        if to_create:
+            CartItem.objects.bulk_create(to_create)
+        cart.touch()
+
+    guest_cart.clear()
+    return len(items)
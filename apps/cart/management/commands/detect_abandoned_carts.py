@@ -0,0 +1,20 @@
+"""
+Record carts that stalled before checkout and queue reminder emails.
+Meant to run every 15 minutes (cron or the `detect_abandoned_carts` Celery task).
+"""
+from django.core.management.base import BaseCommand
+
+from apps.cart.abandonment import scan_abandoned_carts
+
+
+class Command(BaseCommand):
+    help = 'Detect abandoned carts since the last scan and queue reminders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Carts per batch')
+
+    def handle(self, *args, **options):
+        detected, queued = scan_abandoned_carts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{detected} abandoned carts detected, {queued} reminders queued.'
+        ))
@@ -0,0 +1,20 @@
+"""
+Reprice all cart lines against current product prices and discounts.
+Meant to run nightly (cron or the `revalidate_carts` Celery task).
+"""
+from django.core.management.base import BaseCommand
+
+from apps.cart.revalidation import revalidate_all_carts
+
+
+class Command(BaseCommand):
+    help = 'Update cart price snapshots to current prices and count lines short of stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Cart lines per query')
+
+    def handle(self, *args, **options):
+        checked, repriced, short = revalidate_all_carts(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{checked} cart lines checked: {repriced} repriced, {short} short of stock.'
+        ))
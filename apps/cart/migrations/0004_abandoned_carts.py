@@ -0,0 +1,42 @@
+# Generated by Django 4.2.9 on 2026-10-19 15:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cart', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cart',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='updated at'),
+        ),
+        migrations.CreateModel(
+            name='AbandonedCart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('segment', models.CharField(choices=[('high_value', 'High value'), ('returning', 'Returning customer'), ('new', 'New customer')], max_length=20, verbose_name='segment')),
+                ('items_count', models.PositiveIntegerField(default=0, verbose_name='items count')),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='subtotal')),
+                ('cart_updated_at', models.DateTimeField(db_index=True, verbose_name='cart updated at')),
+                ('detected_at', models.DateTimeField(db_index=True, verbose_name='detected at')),
+                ('reminder_queued_at', models.DateTimeField(blank=True, null=True, verbose_name='reminder queued at')),
+                ('reminded_at', models.DateTimeField(blank=True, null=True, verbose_name='reminded at')),
+                ('recovered_at', models.DateTimeField(blank=True, null=True, verbose_name='recovered at')),
+                ('cart', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='abandonment', to='cart.cart', verbose_name='cart')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='abandoned_carts', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'Abandoned Cart',
+                'verbose_name_plural': 'Abandoned Carts',
+                'db_table': 'abandoned_carts',
+            },
+        ),
+    ]
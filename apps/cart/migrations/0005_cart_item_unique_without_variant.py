@@ -0,0 +1,31 @@
+# Generated by Django 4.2.9 on 2026-10-19 15:23
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    CartItem = apps.get_model('cart', 'CartItem')
+    duplicates = (
+        CartItem.objects.filter(variant__isnull=True).values('cart_id', 'product_id')
+        .annotate(lines=Count('pk'), keep=Min('pk'), quantity=Sum('quantity')).filter(lines__gt=1)
+    )
+    for row in duplicates:
+        lines = CartItem.objects.filter(cart_id=row['cart_id'], product_id=row['product_id'], variant__isnull=True)
+        lines.exclude(pk=row['keep']).delete()
+        lines.update(quantity=min(row['quantity'], 999))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0004_abandoned_carts'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('variant__isnull', True)), fields=('cart', 'product'), name='cart_item_unique_without_variant'),
+        ),
+    ]
@@ -4,6 +4,7 @@ Supports persistent carts for authenticated users.
 """
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 
@@ -23,7 +24,8 @@ class Cart(models.Model):
     )
 
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
-    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    # Moved by every item change (see touch); scanned for abandoned carts.
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True, db_index=True)
 
     class Meta:
         db_table = 'carts'
@@ -56,6 +58,12 @@ class Cart(models.Model):
     def clear(self):
         """Remove all items from cart."""
         self.items.all().delete()
+        self.touch()
+
+    def touch(self):
+        """Record a change of the cart's items."""
+        self.updated_at = timezone.now()
+        Cart.objects.filter(pk=self.pk).update(updated_at=self.updated_at)
 
 
 class CartItem(models.Model):
@@ -104,6 +112,13 @@ class CartItem(models.Model):
         verbose_name = _('Cart Item')
         verbose_name_plural = _('Cart Items')
         unique_together = ['cart', 'product', 'variant']
+        constraints = [
+            # unique_together never fires for NULL variants.
+            models.UniqueConstraint(
+                fields=['cart', 'product'], condition=models.Q(variant__isnull=True),
+                name='cart_item_unique_without_variant',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.quantity}x {self.product.name}"
@@ -113,9 +128,63 @@ class CartItem(models.Model):
         return self.price_snapshot * self.quantity
 
     def save(self, *args, **kwargs):
-        """Set price snapshot if not already set."""
+        """Set price snapshot if not already set, rounded as revalidation rounds it."""
         if not self.price_snapshot:
-            self.price_snapshot = self.product.discounted_price
-            if self.variant:
-                self.price_snapshot += self.variant.price_adjustment
-        super().save(*args, **kwargs)
\ No newline at end of file
+            from .revalidation import current_price
+
+            self.price_snapshot = current_price(
+                self.product.price, self.product.discount_percentage,
+                self.variant.price_adjustment if self.variant else None,
+            )
+        super().save(*args, **kwargs)
+
+
+class AbandonedCart(models.Model):
+    """
+    A cart left with items and no checkout. One row per cart, refreshed
+    each time the cart is abandoned again.
+    """
+
+    SEGMENT_HIGH_VALUE = 'high_value'
+    SEGMENT_RETURNING = 'returning'
+    SEGMENT_NEW = 'new'
+
+    SEGMENT_CHOICES = [
+        (SEGMENT_HIGH_VALUE, _('High value')),
+        (SEGMENT_RETURNING, _('Returning customer')),
+        (SEGMENT_NEW, _('New customer')),
+    ]
+
+    cart = models.OneToOneField(
+        Cart,
+        on_delete=models.CASCADE,
+        related_name='abandonment',
+        verbose_name=_('cart')
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='abandoned_carts',
+        verbose_name=_('user')
+    )
+
+    segment = models.CharField(_('segment'), max_length=20, choices=SEGMENT_CHOICES)
+    items_count = models.PositiveIntegerField(_('items count'), default=0)
+    subtotal = models.DecimalField(_('subtotal'), max_digits=15, decimal_places=2, default=0)
+
+    # Cart.updated_at when detected; the newest one is the scan watermark.
+    cart_updated_at = models.DateTimeField(_('cart updated at'), db_index=True)
+    detected_at = models.DateTimeField(_('detected at'), db_index=True)
+    reminder_queued_at = models.DateTimeField(_('reminder queued at'), null=True, blank=True)
+    # Kept across episodes, for per-user reminder throttling.
+    reminded_at = models.DateTimeField(_('reminded at'), null=True, blank=True)
+    recovered_at = models.DateTimeField(_('recovered at'), null=True, blank=True)
+
+    class Meta:
+        db_table = 'abandoned_carts'
+        verbose_name = _('Abandoned Cart')
+        verbose_name_plural = _('Abandoned Carts')
+
+    def __str__(self):
+        return f"Abandoned cart of {self.user.email}"
@@ -0,0 +1,145 @@
+"""
+Revalidation of cart lines against current prices and stock.
+
+``CartItem.price_snapshot`` is taken when a line is added. The cart page
+and checkout recheck their already-loaded lines, which come with product
+and variant joined in, so this costs no extra query. Changed prices are
+written back in one bulk UPDATE. Lines that can no longer be delivered
+in full are reported rather than changed, so the shopper decides. The
+nightly ``revalidate_carts`` sweep reprices every cart line in batches,
+one joined query per batch.
+
+Variant stock is not maintained by order creation, so availability is
+the product's stock; an inactive product or variant counts as sold out.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.contrib import messages
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CartItem
+
+CENT = Decimal('0.01')
+
+
+def current_price(price, discount_percentage, price_adjustment=None):
+    """Unit price like ``Product.discounted_price`` plus the variant adjustment, in cents."""
+    price = Decimal(price)
+    if discount_percentage > 0:
+        price -= price * Decimal(discount_percentage) / 100
+    return (price + (price_adjustment or 0)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def available_quantity(product, variant=None):
+    if not product.is_active or (variant is not None and not variant.is_active):
+        return 0
+    return product.stock
+
+
+class CartChanged(Exception):
+    """Raised by order creation when the cart no longer matches prices or stock."""
+
+    def __init__(self, revalidation=None):
+        super().__init__('Cart prices or stock changed')
+        self.revalidation = revalidation
+
+
+class PriceChange:
+    def __init__(self, item, old_price, new_price):
+        self.item = item
+        self.old_price = old_price
+        self.new_price = new_price
+
+
+class CartRevalidation:
+    """Lines whose price changed and lines with less stock than their quantity."""
+
+    def __init__(self):
+        self.price_changes = []
+        self.stock_issues = []
+
+    @property
+    def has_issues(self):
+        return bool(self.price_changes or self.stock_issues)
+
+
+def revalidate_items(items, apply=True):
+    """
+    Check loaded cart lines (CartItem or guest lines with product and variant).
+    Each line gets an ``available`` attribute. With `apply`, changed prices
+    are saved to the persistent lines.
+    """
+    result = CartRevalidation()
+    for item in items:
+        variant = item.variant
+        price = current_price(
+            item.product.price, item.product.discount_percentage, variant.price_adjustment if variant else None
+        )
+        if price != item.price_snapshot:
+            result.price_changes.append(PriceChange(item, item.price_snapshot, price))
+            item.price_snapshot = price
+        item.available = available_quantity(item.product, variant)
+        if item.quantity > item.available:
+            result.stock_issues.append(item)
+
+    if apply:
+        now = timezone.now()
+        stale = [change.item for change in result.price_changes if isinstance(change.item, CartItem)]
+        for item in stale:
+            item.updated_at = now
+        CartItem.objects.bulk_update(stale, ['price_snapshot', 'updated_at'])
+    return result
+
+
+def announce_changes(request, revalidation):
+    """Flash messages describing what revalidation found."""
+    from .templatetags.cart_filters import format_price
+
+    currency = getattr(request, 'currency', 'UZS')
+    for change in revalidation.price_changes:
+        messages.info(request, (
+            f'The price of {change.item.product.name} changed from '
+            f'{format_price(change.old_price, currency)} to {format_price(change.new_price, currency)}.'
+        ))
+    for item in revalidation.stock_issues:
+        if item.available:
+            messages.warning(request, f'Only {item.available} of {item.product.name} left in stock.')
+        else:
+            messages.warning(request, f'{item.product.name} is out of stock.')
+
+
+def revalidate_all_carts(batch_size=1000):
+    """
+    Reprice every cart line, one joined query and at most one bulk UPDATE
+    per batch. Returns ``(checked, repriced, short_of_stock)``.
+    """
+    checked = repriced = short = 0
+    last_id = 0
+    columns = (
+        'id', 'quantity', 'price_snapshot', 'variant_id',
+        'product__price', 'product__discount_percentage', 'product__stock', 'product__is_active',
+        'variant__price_adjustment', 'variant__is_active',
+    )
+    while True:
+        rows = list(CartItem.objects.filter(id__gt=last_id).order_by('id').values_list(*columns)[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        now = timezone.now()
+
+        stale = []
+        for (pk, quantity, snapshot, variant_id, price, discount, stock, is_active,
+             adjustment, variant_active) in rows:
+            new_price = current_price(price, discount, adjustment)
+            if new_price != snapshot:
+                stale.append(CartItem(id=pk, price_snapshot=new_price, updated_at=now))
+            if not is_active or (variant_id and not variant_active) or quantity > stock:
+                short += 1
+
+        if stale:
+            with transaction.atomic():
+                CartItem.objects.bulk_update(stale, ['price_snapshot', 'updated_at'])
+        checked += len(rows)
+        repriced += len(stale)
+    return checked, repriced, short
@@ -3,8 +3,12 @@ Shopping cart service layer.
 Business logic for cart operations.
 """
 from decimal import Decimal
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.utils import timezone
 
+from .guest import MAX_LINE_QUANTITY
 from .models import Cart, CartItem
 from apps.products.models import Product, ProductVariant
 
@@ -39,6 +43,7 @@ class CartService:
         if not created:
             cart_item.quantity += quantity
             cart_item.save()
+        cart.touch()
 
         return cart_item
 
@@ -55,6 +60,7 @@ class CartService:
         else:
             cart_item.quantity = quantity
             cart_item.save()
+        cart.touch()
 
     @transaction.atomic
     def remove_item(self, cart_item_id: int):
@@ -62,7 +68,8 @@ class CartService:
         Remove item from cart.
         """
         cart = self.get_cart()
-        CartItem.objects.filter(id=cart_item_id, cart=cart).delete()
+        if CartItem.objects.filter(id=cart_item_id, cart=cart).delete()[0]:
+            cart.touch()
 
     @transaction.atomic
     def clear_cart(self):
@@ -72,6 +79,45 @@ class CartService:
         cart = self.get_cart()
         cart.clear()
 
+    @transaction.atomic
+    def apply_changes(self, changes, products, variants):
+        """
+        Apply ``(product_id, variant_id, quantity, replace)`` changes, each as
+        one conditional UPDATE of the line, falling back to an INSERT when the
+        line does not exist yet (a zero quantity with `replace` deletes it).
+        `products` and `variants` map ids to the loaded rows, for the price
+        snapshot of new lines.
+        """
+        cart = self.get_cart()
+        now = timezone.now()
+
+        for product_id, variant_id, quantity, replace in changes:
+            line = CartItem.objects.filter(cart=cart, product_id=product_id, variant_id=variant_id)
+            if replace and quantity <= 0:
+                line.delete()
+                continue
+
+            if replace:
+                new_quantity = Value(min(quantity, MAX_LINE_QUANTITY))
+            else:
+                new_quantity = Least(F('quantity') + quantity, Value(MAX_LINE_QUANTITY))
+            if line.update(quantity=new_quantity, updated_at=now):
+                continue
+            try:
+                with transaction.atomic():
+                    CartItem.objects.create(
+                        cart=cart,
+                        product=products[product_id],
+                        variant=variants.get(variant_id) if variant_id else None,
+                        quantity=min(quantity, MAX_LINE_QUANTITY),
+                    )
+            except IntegrityError:
+                # A parallel request created the line first.
+                line.update(quantity=new_quantity, updated_at=now)
+
+        cart.touch()
+        return cart
+
     def get_cart_total(self, currency='UZS') -> Decimal:
         """
         Calculate cart total in specified currency.
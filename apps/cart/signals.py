@@ -0,0 +1,14 @@
+"""
+Cart signals: move the guest cart into the user's cart on login.
+"""
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from .guest import merge_guest_cart
+
+
+@receiver(user_logged_in)
+def merge_guest_cart_on_login(sender, request, user, **kwargs):
+    guest_cart = getattr(request, 'guest_cart', None)
+    if guest_cart:
+        merge_guest_cart(guest_cart, user)
@@ -0,0 +1,88 @@
+"""
+Read model for the cart and checkout pages.
+
+Items are loaded once, with product, category and variant joined in and
+the primary image path annotated, so a page costs the same handful of
+queries for one item as for a hundred. Count, subtotal and delivery are
+computed from that single list. All amounts are in UZS; templates convert
+them with ``format_price``.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+
+from apps.products.models import ProductImage
+from .models import CartItem
+
+FREE_DELIVERY_THRESHOLD = Decimal('300000')
+DELIVERY_FEE = Decimal('20000')
+
+
+def primary_image(product_ref):
+    """Image name of the product's primary (else first) image, for ``annotate``."""
+    return Subquery(
+        ProductImage.objects.filter(product=product_ref)
+        .order_by('-is_primary', 'order', 'pk')
+        .values('image')[:1]
+    )
+
+
+def image_url(name):
+    if not name:
+        return None
+    return ProductImage._meta.get_field('image').storage.url(name)
+
+
+def cart_items(cart):
+    """The cart's items with everything the cart and checkout templates touch."""
+    return list(
+        CartItem.objects.filter(cart=cart)
+        .select_related('product__category', 'variant')
+        .annotate(image_name=primary_image(OuterRef('product_id')))
+        .order_by('pk')
+    )
+
+
+class CartTotals:
+    """Item count, subtotal and delivery fee of a cart (UZS)."""
+
+    def __init__(self, count, subtotal):
+        self.count = count
+        self.subtotal = subtotal
+        self.is_free_delivery = subtotal >= FREE_DELIVERY_THRESHOLD
+        self.delivery_fee = Decimal('0') if self.is_free_delivery else DELIVERY_FEE
+        self.total = subtotal + self.delivery_fee
+        self.remaining_for_free_delivery = max(FREE_DELIVERY_THRESHOLD - subtotal, Decimal('0'))
+
+    @classmethod
+    def for_cart(cls, cart):
+        """Totals from one aggregate query, without loading the items."""
+        totals = CartItem.objects.filter(cart=cart).aggregate(
+            count=Sum('quantity'),
+            subtotal=Sum(F('price_snapshot') * F('quantity'), output_field=DecimalField(max_digits=15, decimal_places=2)),
+        )
+        return cls(totals['count'] or 0, totals['subtotal'] or Decimal('0'))
+
+
+class CartSummary(CartTotals):
+    """Loaded cart lines plus their totals."""
+
+    def __init__(self, items):
+        self.items = items
+        for item in items:
+            item.image_url = image_url(getattr(item, 'image_name', None))
+        super().__init__(
+            sum(item.quantity for item in items),
+            sum((item.get_subtotal() for item in items), Decimal('0')),
+        )
+
+    @classmethod
+    def for_cart(cls, cart):
+        return cls(cart_items(cart))
+
+    @classmethod
+    def for_guest(cls, guest_cart):
+        return cls(guest_cart.items())
+
+    def __bool__(self):
+        return bool(self.items)
@@ -0,0 +1,28 @@
+"""
+Background tasks for the cart app.
+"""
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def revalidate_carts():
+    """Nightly repricing of all cart lines against current prices."""
+    from .revalidation import revalidate_all_carts
+
+    revalidate_all_carts()
+
+
+@shared_task(ignore_result=True)
+def detect_abandoned_carts():
+    """Record carts that stalled since the last run and queue their reminders."""
+    from .abandonment import scan_abandoned_carts
+
+    scan_abandoned_carts()
+
+
+@shared_task(ignore_result=True)
+def send_cart_reminders(abandoned_ids: list):
+    """Email one batch of abandoned cart reminders."""
+    from .abandonment import send_reminders
+
+    send_reminders(abandoned_ids)
@@ -1,2 +1,296 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.products.models import Category, Product
+from apps.users.models import UserProfile
+from .guest import GUEST_CART_COOKIE
+from .abandonment import abandonment_metrics, mark_recovered, scan_abandoned_carts, send_reminders
+from .models import AbandonedCart, Cart, CartItem
+from .revalidation import CartChanged
+from .services import CartService
+
+
+class GuestCartTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.apple, self.pear = [
+            Product.objects.create(
+                name=name, slug=name.lower(), description='', category=category, price=1000, sku=name, stock=10
+            )
+            for name in ('Apple', 'Pear')
+        ]
+
+    def test_guest_cart_lives_in_a_cookie(self):
+        self.client.post(reverse('cart:add', args=[self.apple.pk]), {'quantity': 2})
+        self.client.post(reverse('cart:add', args=[self.apple.pk]), {'quantity': 1})
+        self.client.post(reverse('cart:add', args=[self.pear.pk]), {'quantity': 1})
+
+        self.assertFalse(Cart.objects.exists())
+        self.assertIn(GUEST_CART_COOKIE, self.client.cookies)
+        response = self.client.get(reverse('cart:view'))
+        self.assertEqual([(item.product, item.quantity) for item in response.context['items']],
+                         [(self.apple, 3), (self.pear, 1)])
+        self.assertEqual(response.context['cart_count'], 4)
+
+        self.client.post(reverse('cart:remove', args=[1]))
+        self.assertEqual(len(self.client.get(reverse('cart:view')).context['items']), 1)
+
+        self.client.cookies[GUEST_CART_COOKIE] = 'tampered'
+        self.assertEqual(self.client.get(reverse('cart:view')).context['items'], [])
+
+    def test_login_merges_guest_lines_into_the_cart(self):
+        user = get_user_model().objects.create_user(
+            username='buyer@example.com', email='buyer@example.com', password='secret-123'
+        )
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=self.apple, quantity=1)
+
+        self.client.post(reverse('cart:add', args=[self.apple.pk]), {'quantity': 2})
+        self.client.post(reverse('cart:add', args=[self.pear.pk]), {'quantity': 1})
+        self.client.post(reverse('users:login'), {'email': 'buyer@example.com', 'password': 'secret-123'})
+
+        self.assertEqual(
+            dict(cart.items.values_list('product__name', 'quantity')), {'Apple': 3, 'Pear': 1}
+        )
+        self.assertEqual(self.client.cookies[GUEST_CART_COOKIE].value, '')
+
+
+class CartPageQueryTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.products = Product.objects.bulk_create([
+            Product(name=f'P{i}', slug=f'p{i}', description='', category=category, price=1000, sku=f'P{i}', stock=10)
+            for i in range(100)
+        ])
+        self.user = get_user_model().objects.create_user(username='buyer@example.com', email='buyer@example.com')
+        self.cart = Cart.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def fill(self, count):
+        CartItem.objects.bulk_create(
+            CartItem(cart=self.cart, product=product, quantity=2, price_snapshot=product.price)
+            for product in self.products[:count]
+        )
+
+    def test_cart_page_query_count_does_not_grow_with_items(self):
+        for count in (1, 100):
+            with self.subTest(items=count):
+                CartItem.objects.all().delete()
+                self.fill(count)
+                self.client.get(reverse('cart:view'))  # warm the session cache
+                with self.assertNumQueries(3):  # user, cart, items
+                    response = self.client.get(reverse('cart:view'))
+                summary = response.context['summary']
+                self.assertEqual(summary.count, count * 2)
+                self.assertEqual(summary.subtotal, count * 2000)
+                self.assertEqual(response.context['cart_count'], count * 2)
+
+    def test_delivery_is_free_above_the_threshold_in_uzs(self):
+        self.fill(100)
+        summary = self.client.get(reverse('cart:view')).context['summary']
+        self.assertFalse(summary.is_free_delivery)
+        self.assertEqual(summary.total, summary.subtotal + summary.delivery_fee)
+        self.assertEqual(summary.remaining_for_free_delivery, 300000 - 200000)
+
+    def test_checkout_summarises_the_cart_once(self):
+        self.fill(3)
+        response = self.client.get(reverse('orders:checkout'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['summary'].items), 3)
+        self.assertContains(response, 'P2 x2')
+
+
+class CartApiTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.apple, self.pear, self.plum = [
+            Product.objects.create(
+                name=name, slug=name.lower(), description='', category=category, price=1000, sku=name, stock=10
+            )
+            for name in ('Apple', 'Pear', 'Plum')
+        ]
+
+    def post(self, name, payload):
+        return self.client.post(reverse(name), json.dumps(payload), content_type='application/json')
+
+    def test_edits_return_only_changed_lines_and_totals(self):
+        user = get_user_model().objects.create_user(username='buyer@example.com', email='buyer@example.com')
+        self.client.force_login(user)
+
+        self.post('cart:api_add', {'product': self.apple.pk})
+        self.post('cart:api_add', {'product': self.apple.pk, 'quantity': 2})
+        self.post('cart:api_add', {'product': self.pear.pk})
+        response = self.post('cart:api_batch', {'lines': [
+            {'product': self.pear.pk, 'quantity': 0},
+            {'product': self.plum.pk, 'quantity': 4},
+        ]}).json()
+
+        self.assertEqual([(line['product'], line['quantity']) for line in response['lines']],
+                         [(self.pear.pk, 0), (self.plum.pk, 4)])
+        self.assertEqual(response['cart']['count'], 7)
+        self.assertEqual(Decimal(response['cart']['subtotal']), 7000)
+        self.assertEqual(
+            dict(CartItem.objects.values_list('product__name', 'quantity')), {'Apple': 3, 'Plum': 4}
+        )
+
+    def test_guest_edits_update_the_cookie(self):
+        self.post('cart:api_batch', {'lines': [
+            {'product': self.apple.pk, 'quantity': 2}, {'product': self.pear.pk, 'quantity': 1},
+        ]})
+        response = self.post('cart:api_remove', {'product': self.apple.pk}).json()
+
+        self.assertEqual(response['lines'][0]['quantity'], 0)
+        self.assertEqual(response['cart']['count'], 1)
+        self.assertEqual(self.client.get(reverse('cart:view')).context['cart_count'], 1)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_lines_without_variant_stay_unique(self):
+        user = get_user_model().objects.create_user(username='buyer@example.com', email='buyer@example.com')
+        self.client.force_login(user)
+        self.post('cart:api_add', {'product': self.apple.pk, 'variant': None})
+
+        # What a parallel add would insert after both requests' UPDATEs matched nothing.
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CartItem.objects.create(cart=user.cart, product=self.apple, quantity=1, price_snapshot=1000)
+
+        self.post('cart:api_add', {'product': self.apple.pk})
+        CartService(user).add_item(self.apple, 2)
+        self.assertEqual(list(CartItem.objects.values_list('quantity', flat=True)), [4])
+
+    def test_invalid_edits_are_rejected(self):
+        self.plum.is_active = False
+        self.plum.save()
+        self.assertEqual(self.post('cart:api_add', {'product': self.plum.pk}).status_code, 400)
+        self.assertEqual(self.post('cart:api_update', {'product': self.apple.pk, 'quantity': -1}).status_code, 400)
+        self.assertEqual(self.post('cart:api_batch', {'lines': []}).status_code, 400)
+
+
+class CartRevalidationTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.product = Product.objects.create(
+            name='Apple', slug='apple', description='', category=category, price=1000, sku='A', stock=10
+        )
+        self.user = get_user_model().objects.create_user(username='buyer@example.com', email='buyer@example.com')
+        self.item = CartItem.objects.create(cart=Cart.objects.create(user=self.user), product=self.product, quantity=3)
+        self.client.force_login(self.user)
+
+    def test_cart_page_reprices_changed_lines(self):
+        Product.objects.filter(pk=self.product.pk).update(price=1200, discount_percentage=25)
+
+        response = self.client.get(reverse('cart:view'))
+        self.assertEqual(response.context['summary'].subtotal, 2700)
+        self.assertContains(response, 'The price of Apple changed')
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.price_snapshot, 900)
+
+    def test_half_cent_snapshot_is_not_a_price_change(self):
+        Product.objects.filter(pk=self.product.pk).update(price=Decimal('10.20'), discount_percentage=Decimal('12.5'))
+        self.item.delete()
+        CartService(self.user).add_item(Product.objects.get(pk=self.product.pk), 1)
+
+        response = self.client.get(reverse('cart:view'))
+        self.assertNotContains(response, 'changed from')
+        self.assertEqual(CartItem.objects.get().price_snapshot, Decimal('8.93'))
+
+        self.client.logout()
+        self.client.post(reverse('cart:add', args=[self.product.pk]), {'quantity': 2})
+        response = self.client.get(reverse('cart:view'))
+        self.assertNotContains(response, 'changed from')
+        self.assertEqual([item.price_snapshot for item in response.context['items']], [Decimal('8.93')])
+        self.assertEqual(response.context['summary'].subtotal, Decimal('17.86'))
+
+    def test_checkout_sends_short_stock_back_to_the_cart(self):
+        Product.objects.filter(pk=self.product.pk).update(stock=2)
+
+        response = self.client.get(reverse('orders:checkout'), follow=True)
+        self.assertRedirects(response, reverse('cart:view'))
+        self.assertContains(response, 'Only 2 of Apple left in stock.')
+
+    def test_order_creation_refuses_a_stale_cart(self):
+        from apps.orders.services import OrderService
+
+        Product.objects.filter(pk=self.product.pk).update(price=1500)
+        with self.assertRaises(CartChanged):
+            OrderService().create_order_from_cart(self.user, self.item.cart, {
+                'customer_name': 'Buyer', 'customer_email': 'buyer@example.com', 'customer_phone': '+998901234567',
+                'delivery_address': 'Street 1', 'delivery_city': 'Tashkent', 'payment_method': 'cash',
+            })
+
+    def test_nightly_sweep_reprices_every_cart(self):
+        Product.objects.filter(pk=self.product.pk).update(price=1100, stock=1)
+
+        out = StringIO()
+        call_command('revalidate_carts', '--batch-size', '1', stdout=out)
+        self.assertIn('1 cart lines checked: 1 repriced, 1 short of stock.', out.getvalue())
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.price_snapshot, 1100)
+
+
+class AbandonedCartTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.product = Product.objects.create(
+            name='Apple', slug='apple', description='', category=category, price=1000, sku='A', stock=10
+        )
+        self.carts = {}
+        for name, notifications in (('returning', True), ('new', True), ('quiet', False)):
+            user = get_user_model().objects.create_user(username=f'{name}@example.com', email=f'{name}@example.com')
+            UserProfile.objects.filter(user=user).update(email_notifications=notifications)
+            cart = Cart.objects.create(user=user)
+            CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+            self.carts[name] = cart
+        Order.objects.create(
+            user=self.carts['returning'].user, customer_name='R', customer_email='returning@example.com',
+            customer_phone='1', delivery_address='A', delivery_city='Tashkent', subtotal=1, total_amount=1,
+            payment_method='cash',
+        )
+        empty = get_user_model().objects.create_user(username='empty@example.com', email='empty@example.com')
+        Cart.objects.create(user=empty)
+        self.stall(minutes=120)
+
+    def stall(self, minutes, carts=None):
+        queryset = Cart.objects.all() if carts is None else Cart.objects.filter(pk__in=[cart.pk for cart in carts])
+        queryset.update(updated_at=timezone.now() - timedelta(minutes=minutes))
+
+    def scan(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            result = scan_abandoned_carts()
+        return result, len(callbacks)
+
+    def test_scan_segments_throttles_and_is_incremental(self):
+        self.assertEqual(self.scan(), ((3, 2), 1))
+        self.assertEqual(
+            dict(AbandonedCart.objects.values_list('user__username', 'segment')),
+            {'returning@example.com': 'returning', 'new@example.com': 'new', 'quiet@example.com': 'new'},
+        )
+
+        send_reminders(AbandonedCart.objects.values_list('pk', flat=True))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['new@example.com', 'returning@example.com'])
+
+        self.assertEqual(self.scan(), ((0, 0), 0))
+
+        self.carts['new'].touch()
+        self.stall(minutes=90, carts=[self.carts['new']])
+        self.assertEqual(self.scan(), ((1, 0), 0))  # reminded within the interval
+
+    def test_metrics_report_abandonment_and_recovery(self):
+        self.scan()
+        mark_recovered(self.carts['returning'])
 
+        metrics = abandonment_metrics()
+        self.assertEqual(metrics['abandoned'], 3)
+        self.assertEqual(metrics['abandonment_rate'], 75.0)  # 3 abandoned, 1 order
+        self.assertEqual(metrics['recovery_rate'], 33.3)
+        self.assertEqual(metrics['segments'], {'high_value': 0, 'returning': 1, 'new': 2})
@@ -2,7 +2,7 @@
 URL configuration for cart app.
 """
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'cart'
 
@@ -12,4 +12,8 @@ urlpatterns = [
     path('update/<int:item_id>/', views.update_cart_view, name='update'),
     path('remove/<int:item_id>/', views.remove_from_cart_view, name='remove'),
     path('clear/', views.clear_cart_view, name='clear'),
+    path('api/add/', api.add_view, name='api_add'),
+    path('api/update/', api.update_view, name='api_update'),
+    path('api/remove/', api.remove_view, name='api_remove'),
+    path('api/batch/', api.batch_view, name='api_batch'),
 ]
\ No newline at end of file
@@ -2,43 +2,37 @@
 Shopping cart views.
 """
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 
 from .services import CartService
+from .revalidation import announce_changes, revalidate_items
+from .summary import CartSummary, cart_items
 from apps.products.models import Product, ProductVariant
 
 
-@login_required
 def cart_view(request):
     """
-    Display shopping cart.
+    Display shopping cart (the guest cart for anonymous visitors).
     """
-    cart_service = CartService(request.user)
-    cart = cart_service.get_cart()
-
-    currency = request.session.get('currency', 'UZS')
-    total = cart.get_total(currency) if cart else 0
-    
-    FREE_DELIVERY_THRESHOLD = 300000
-    delivery_fee = 0 if total >= FREE_DELIVERY_THRESHOLD else 20000
-    is_free_delivery = total >= FREE_DELIVERY_THRESHOLD
+    if request.user.is_authenticated:
+        items = cart_items(CartService(request.user).get_cart())
+    else:
+        items = request.guest_cart.items()
+    announce_changes(request, revalidate_items(items))
+    summary = CartSummary(items)
+    request.cart_summary = summary
 
     context = {
-        'cart': cart,
-        'total': total,
-        'currency': currency,
-        'delivery_fee': delivery_fee,
-        'is_free_delivery': is_free_delivery,
-        'free_delivery_threshold': FREE_DELIVERY_THRESHOLD,
+        'summary': summary,
+        'items': summary.items,
+        'currency': request.currency,
     }
 
     return render(request, 'cart/cart.html', context)
 
 
-@login_required
 @require_http_methods(["POST"])
 def add_to_cart_view(request, product_id):
     """
@@ -52,13 +46,21 @@ def add_to_cart_view(request, product_id):
     if variant_id:
         variant = get_object_or_404(ProductVariant, id=variant_id, product=product)
 
-    cart_service = CartService(request.user)
-    cart_service.add_item(product, quantity, variant)
+    if request.user.is_authenticated:
+        cart_service = CartService(request.user)
+        cart_service.add_item(product, quantity, variant)
+        cart = cart_service.get_cart()
+    else:
+        cart = request.guest_cart
+        if not cart.add(product.pk, variant.pk if variant else None, quantity):
+            messages.error(request, 'Your cart is full. Please sign in to add more products.')
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return JsonResponse({'success': False, 'error': 'Cart is full'})
+            return redirect('cart:view')
 
     messages.success(request, f'✓ {product.name} savatga qo\'shildi!')
 
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        cart = cart_service.get_cart()
         return JsonResponse({
             'success': True,
             'cart_count': cart.items_count if cart else 0,
@@ -69,7 +71,6 @@ def add_to_cart_view(request, product_id):
     return redirect(next_url)
 
 
-@login_required
 @require_http_methods(["POST"])
 def update_cart_view(request, item_id):
     """
@@ -77,33 +78,37 @@ def update_cart_view(request, item_id):
     """
     quantity = int(request.POST.get('quantity', 1))
 
-    cart_service = CartService(request.user)
-    cart_service.update_item(item_id, quantity)
+    if request.user.is_authenticated:
+        CartService(request.user).update_item(item_id, quantity)
+    else:
+        request.guest_cart.update(item_id, quantity)
 
     messages.success(request, 'Cart updated.')
     return redirect('cart:view')
 
 
-@login_required
 @require_http_methods(["POST"])
 def remove_from_cart_view(request, item_id):
     """
     Remove item from cart.
     """
-    cart_service = CartService(request.user)
-    cart_service.remove_item(item_id)
+    if request.user.is_authenticated:
+        CartService(request.user).remove_item(item_id)
+    else:
+        request.guest_cart.remove(item_id)
 
     messages.success(request, 'Item removed from cart.')
     return redirect('cart:view')
 
 
-@login_required
 def clear_cart_view(request):
     """
     Clear entire cart.
     """
-    cart_service = CartService(request.user)
-    cart_service.clear_cart()
+    if request.user.is_authenticated:
+        CartService(request.user).clear_cart()
+    else:
+        request.guest_cart.clear()
 
     messages.info(request, 'Cart cleared.')
     return redirect('cart:view')
\ No newline at end of file
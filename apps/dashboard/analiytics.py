@@ -98,6 +98,14 @@ class DashboardAnalytics:
             'featured': Product.objects.filter(is_active=True, is_featured=True).count(),
         }
 
+    def get_cart_abandonment_metrics(self, days=30):
+        """
+        Abandoned carts, abandonment and recovery rates by segment.
+        """
+        from apps.cart.abandonment import abandonment_metrics
+
+        return abandonment_metrics(days)
+
     def get_top_products(self, limit=10):
         """
         Get top-selling products.
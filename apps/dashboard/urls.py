@@ -17,9 +17,12 @@ urlpatterns = [
 
     path('orders/', views.orders_list_view, name='orders_list'),
     path('orders/<int:order_id>/', views.order_detail_view, name='order_detail'),
+    path('orders/status/', views.orders_bulk_status_view, name='orders_bulk_status'),
 
     path('reviews/', views.reviews_list_view, name='reviews_list'),
     path('reviews/<int:review_id>/moderate/', views.review_moderate_view, name='review_moderate'),
+    path('reviews/moderate/', views.reviews_bulk_moderate_view, name='reviews_bulk_moderate'),
 
     path('api/analytics/', views.analytics_api_view, name='analytics_api'),
+    path('api/listing-cache/', views.listing_cache_stats_view, name='listing_cache_stats'),
 ]
\ No newline at end of file
@@ -8,15 +8,25 @@ from django.contrib import messages
 from django.db.models import Sum, Count, Avg, Q
 from django.db.models.functions import TruncDate
 from django.http import JsonResponse
+from django.utils.http import url_has_allowed_host_and_scheme
 from datetime import datetime, timedelta
 
 from .decorators import admin_required
 from .analytics import DashboardAnalytics
 from apps.users.models import User
 from apps.products.models import Product, Category
+from apps.orders.listing import order_items, order_page, with_details
 from apps.orders.models import Order
+from apps.orders.transitions import MAX_BULK_ORDERS, TRANSITIONS, InvalidTransition, can_transition, transition_orders
 from apps.payments.models import Payment
 from apps.reviews.models import Review
+from apps.reviews.moderation import MAX_BULK_REVIEWS, MODERATION_ACTIONS, moderate_reviews, moderation_queue
+
+MODERATION_MESSAGES = {
+    'approve': '{count} review(s) approved.',
+    'reject': '{count} review(s) rejected.',
+    'flag': '{count} review(s) flagged.',
+}
 
 
 @login_required
@@ -34,6 +44,7 @@ def dashboard_home_view(request):
         'revenue': analytics.get_revenue_metrics(days),
         'orders': analytics.get_order_metrics(days),
         'products': analytics.get_product_metrics(),
+        'abandonment': analytics.get_cart_abandonment_metrics(days),
         'sold_products': analytics.get_sold_products_metrics(),
         'remaining_products': analytics.get_remaining_products_metrics(),
         'recent_orders': Order.objects.all().order_by('-created_at')[:10],
@@ -158,10 +169,10 @@ def products_list_view(request):
 @admin_required
 def orders_list_view(request):
     """
-    Order management view. 
+    Order management view, newest first: ``?cursor=<order id>`` pages on.
     """
     analytics = DashboardAnalytics()
-    orders = Order.objects.all().select_related('user').order_by('-created_at')
+    orders = Order.objects.all()
 
     status = request.GET.get('status')
     payment_status = request.GET.get('payment_status')
@@ -182,9 +193,15 @@ def orders_list_view(request):
             Q(customer_phone__icontains=search)
         )
 
+    orders, next_cursor = order_page(orders, request.GET.get('cursor'))
+    filters = request.GET.copy()
+    filters.pop('cursor', None)
+
     context = {
         'overview': analytics.get_overview_metrics(),
         'orders': orders,
+        'next_cursor': next_cursor,
+        'filters': filters.urlencode(),
         'status_choices': Order.STATUS_CHOICES,
         'search': search,
     }
@@ -198,7 +215,7 @@ def order_detail_view(request, order_id):
     """
     Order detail and management.
     """
-    order = get_object_or_404(Order.objects.select_related('user'), id=order_id)
+    order = get_object_or_404(with_details(Order.objects.select_related('user')), id=order_id)
 
     if request.method == 'POST':
         action = request.POST.get('action')
@@ -208,20 +225,25 @@ def order_detail_view(request, order_id):
             notes = request.POST.get('notes', '')
 
             from apps.orders.services import OrderService
-            OrderService().update_order_status(
-                order=order,
-                new_status=new_status,
-                user=request.user,
-                notes=notes
-            )
-
-            messages.success(request, 'Order status updated successfully.')
+            try:
+                OrderService().update_order_status(
+                    order=order,
+                    new_status=new_status,
+                    user=request.user,
+                    notes=notes
+                )
+                messages.success(request, 'Order status updated successfully.')
+            except InvalidTransition as e:
+                messages.error(request, str(e))
 
         return redirect('dashboard:order_detail', order_id=order.id)
 
     context = {
         'order': order,
-        'status_choices': Order.STATUS_CHOICES,
+        'status_choices': [
+            (value, label) for value, label in Order.STATUS_CHOICES if can_transition(order.status, value)
+        ],
+        'items': order_items(order),
         'status_history': order.status_history.all(),
         'payments': order.payments.all(),
     }
@@ -229,27 +251,55 @@ def order_detail_view(request, order_id):
     return render(request, 'dashboard/order_detail.html', context)
 
 
+@login_required
+@admin_required
+def orders_bulk_status_view(request):
+    """
+    Move many orders to one status (POST ``order_ids``, ``status``, ``notes``).
+    Orders whose status does not allow the move are skipped and reported.
+    """
+    if request.method != 'POST':
+        return redirect('dashboard:orders_list')
+
+    new_status = request.POST.get('status')
+    order_ids = [pk for pk in request.POST.getlist('order_ids') if pk.isdigit()][:MAX_BULK_ORDERS]
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+    if new_status not in TRANSITIONS or not order_ids:
+        if is_ajax:
+            return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
+        messages.error(request, 'Select orders and a status.')
+        return redirect('dashboard:orders_list')
+
+    changed, skipped = transition_orders(order_ids, new_status, request.user, notes=request.POST.get('notes', ''))
+
+    if is_ajax:
+        return JsonResponse({'success': True, 'updated': changed, 'skipped': skipped, 'status': new_status})
+
+    messages.success(request, f'{len(changed)} order(s) updated.')
+    if skipped:
+        messages.warning(request, f'{len(skipped)} order(s) skipped: their status does not allow this change.')
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('dashboard:orders_list')
+
+
 @login_required
 @admin_required
 def reviews_list_view(request):
     """
-    Review moderation view.
+    Review moderation queue, newest first: ``?status=pending&cursor=<review id>``.
     """
     analytics = DashboardAnalytics()
-    reviews = Review.objects.all().select_related('user', 'product').order_by('-created_at')
-
     status = request.GET.get('status')
-
-    if status == 'pending':
-        reviews = reviews.filter(is_approved=False, is_flagged=False)
-    elif status == 'approved':
-        reviews = reviews.filter(is_approved=True)
-    elif status == 'flagged':
-        reviews = reviews.filter(is_flagged=True)
+    reviews, next_cursor = moderation_queue(status, request.GET.get('cursor'))
 
     context = {
         'overview': analytics.get_overview_metrics(),
         'reviews': reviews,
+        'next_cursor': next_cursor,
+        'status': status or '',
     }
 
     return render(request, 'dashboard/reviews_list.html', context)
@@ -265,22 +315,42 @@ def review_moderate_view(request, review_id):
         review = get_object_or_404(Review, id=review_id)
         action = request.POST.get('action')
 
-        if action == 'approve':
-            review.is_approved = True
-            review.is_flagged = False
-            messages.success(request, 'Review approved.')
-        elif action == 'reject':
-            review.is_approved = False
-            messages.success(request, 'Review rejected.')
-        elif action == 'flag':
-            review.is_flagged = True
-            review.moderation_notes = request.POST.get('notes', '')
-            messages.success(request, 'Review flagged.')
+        if action in MODERATION_ACTIONS:
+            moderate_reviews([review.pk], action, request.POST.get('notes', ''))
+            messages.success(request, MODERATION_MESSAGES[action].format(count=1))
+
+    return redirect('dashboard:reviews_list')
 
-        review.save()
 
+@login_required
+@admin_required
+def reviews_bulk_moderate_view(request):
+    """
+    Apply one moderation action to many reviews (POST ``review_ids``, ``action``).
+    Answers JSON to AJAX requests from the keyboard-driven queue.
+    """
+    if request.method != 'POST':
         return redirect('dashboard:reviews_list')
 
+    action = request.POST.get('action')
+    review_ids = [pk for pk in request.POST.getlist('review_ids') if pk.isdigit()][:MAX_BULK_REVIEWS]
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+    if action not in MODERATION_ACTIONS or not review_ids:
+        if is_ajax:
+            return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
+        messages.error(request, 'Select reviews and an action.')
+        return redirect('dashboard:reviews_list')
+
+    updated = moderate_reviews(review_ids, action, request.POST.get('notes', ''))
+
+    if is_ajax:
+        return JsonResponse({'success': True, 'updated': updated, 'action': action})
+
+    messages.success(request, MODERATION_MESSAGES[action].format(count=updated))
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
     return redirect('dashboard:reviews_list')
 
 
@@ -304,4 +374,18 @@ def analytics_api_view(request):
     else:
         data = {}
 
-    return JsonResponse(data)
\ No newline at end of file
+    return JsonResponse(data)
+
+@login_required
+@admin_required
+def listing_cache_stats_view(request):
+    """
+    Product listing cache hit rates per filter/sort combination (AJAX).
+    POST resets the counters.
+    """
+    from apps.products.listing_cache import hit_rates, reset_hit_rates
+
+    if request.method == 'POST':
+        reset_hit_rates()
+
+    return JsonResponse({'combinations': hit_rates()})
@@ -1,5 +1,8 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from .models import Order, OrderItem, OrderStatusHistory
+from .services import OrderService
+from .transitions import can_transition, transition_orders
 
 
 class OrderItemInline(admin.TabularInline):
@@ -8,14 +11,60 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ['product', 'product_name', 'unit_price', 'quantity', 'subtotal']
 
 
+class OrderAdminForm(forms.ModelForm):
+    class Meta:
+        model = Order
+        fields = '__all__'
+
+    def clean_status(self):
+        status = self.cleaned_data['status']
+        current = self.instance.status
+        if self.instance.pk and status != current and not can_transition(current, status):
+            raise forms.ValidationError(f'An order cannot move from {current} to {status}.')
+        return status
+
+
+def _status_action(status, label):
+    def action(modeladmin, request, queryset):
+        changed, skipped = OrderService().update_orders_status(
+            list(queryset.values_list('pk', flat=True)), status, request.user, notes='Changed in admin'
+        )
+        modeladmin.message_user(request, f'{len(changed)} order(s) moved to {label}.')
+        if skipped:
+            modeladmin.message_user(
+                request, f'{len(skipped)} order(s) skipped: their status does not allow this change.', messages.WARNING
+            )
+
+    action.__name__ = f'mark_{status}'
+    action.short_description = f'Move selected orders to {label}'
+    return action
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['order_number', 'user', 'status', 'total_amount', 'is_paid', 'created_at']
+    form = OrderAdminForm
+    list_display = ['order_number', 'user', 'status', 'items_count', 'total_amount', 'is_paid', 'created_at']
     list_filter = ['status', 'is_paid', 'payment_method']
     search_fields = ['order_number', 'customer_email', 'customer_phone']
-    readonly_fields = ['order_number', 'created_at', 'updated_at']
+    readonly_fields = ['order_number', 'items_count', 'created_at', 'updated_at']
     inlines = [OrderItemInline]
-    
+    actions = [_status_action(value, label) for value, label in Order.STATUS_CHOICES]
+
+    def save_model(self, request, obj, form, change):
+        new_status = obj.status
+        if change and 'status' in form.changed_data:
+            # The status moves through transition_orders, which stamps
+            # delivered_at and keeps the purchase ledger in step.
+            obj.status = form.initial['status']
+        super().save_model(request, obj, form, change)
+        if obj.status != new_status:
+            transition_orders([obj.pk], new_status, request.user, notes='Changed in admin')
+            obj.refresh_from_db()
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.recount_items()
+
     def has_delete_permission(self, request, obj=None):
         """Allow superusers to delete orders."""
         return request.user.is_superuser
\ No newline at end of file
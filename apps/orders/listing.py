@@ -0,0 +1,58 @@
+"""
+Read paths for order lists and order pages.
+
+Lists are keyset-paginated newest first: the cursor is the id of the
+last order shown, so later pages cost the same as the first and rely
+on the ``(user, -created_at)`` and ``(-created_at, -id)`` indexes.
+List rows use the stored ``Order.items_count``, so no items are loaded.
+Order pages load their related rows with a fixed number of prefetch
+queries, however many items the order has.
+"""
+from django.db.models import OuterRef, Prefetch, Q
+
+from apps.cart.summary import image_url, primary_image
+from .models import Order, OrderItem, OrderStatusHistory
+
+ORDERING = ('-created_at', '-id')
+ORDERS_PER_PAGE = 20
+
+
+def order_page(queryset, cursor=None, per_page=ORDERS_PER_PAGE):
+    """One page of `queryset` and the cursor of the next page (None on the last)."""
+    if cursor:
+        if not str(cursor).isdigit():
+            return [], None
+        after = queryset.filter(pk=cursor).values('created_at', 'id').first()
+        if after is None:
+            return [], None
+        queryset = queryset.filter(
+            Q(created_at__lt=after['created_at']) | Q(created_at=after['created_at'], id__lt=after['id'])
+        )
+
+    orders = list(queryset.order_by(*ORDERING)[:per_page + 1])
+    next_cursor = orders[per_page - 1].pk if len(orders) > per_page else None
+    return orders[:per_page], next_cursor
+
+
+def with_details(queryset, payments=True):
+    """
+    Prefetch items (with variant and primary image), status history and,
+    optionally, payments: one query each.
+    """
+    prefetches = [
+        Prefetch('items', queryset=OrderItem.objects.select_related('variant').annotate(
+            image_name=primary_image(OuterRef('product_id'))
+        ).order_by('pk')),
+        Prefetch('status_history', queryset=OrderStatusHistory.objects.select_related('changed_by')),
+    ]
+    if payments:
+        prefetches.append('payments')
+    return queryset.prefetch_related(*prefetches)
+
+
+def order_items(order):
+    """The prefetched items of an order from `with_details`, with ``image_url`` set."""
+    items = list(order.items.all())
+    for item in items:
+        item.image_url = image_url(item.image_name)
+    return items
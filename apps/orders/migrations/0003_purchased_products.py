@@ -0,0 +1,40 @@
+# Generated by Django 4.2.9 on 2026-10-19 14:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from apps.orders.purchases import rebuild_ledger
+
+
+def build_ledger(apps, schema_editor):
+    rebuild_ledger(apps.get_model('orders', 'OrderItem'), apps.get_model('orders', 'PurchasedProduct'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_likes_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchasedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delivered_at', models.DateTimeField(verbose_name='delivered at')),
+                ('first_delivered_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='orders.order', verbose_name='first delivered order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchases', to='products.product', verbose_name='product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchased_products', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'Purchased Product',
+                'verbose_name_plural': 'Purchased Products',
+                'db_table': 'purchased_products',
+                'unique_together': {('user', 'product')},
+            },
+        ),
+        migrations.RunPython(build_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.9 on 2026-10-19 15:09
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def count_items(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Order.objects.update(items_count=Coalesce(Subquery(
+        OrderItem.objects.filter(order=OuterRef('pk')).order_by()
+        .values('order').annotate(count=Sum('quantity')).values('count')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_purchased_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='items count'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='orders_created_826ed5_idx'),
+        ),
+        migrations.RunPython(count_items, migrations.RunPython.noop),
+    ]
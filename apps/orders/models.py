@@ -119,6 +119,9 @@ class Order(models.Model):
         validators=[MinValueValidator(0)]
     )
 
+    # Total quantity of the order's items, stored so lists need no join.
+    items_count = models.PositiveIntegerField(_('items count'), default=0)
+
     payment_method = models.CharField(
         _('payment method'),
         max_length=50,
@@ -160,6 +163,7 @@ class Order(models.Model):
         indexes = [
             models.Index(fields=['order_number']),
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['-created_at', '-id']),
             models.Index(fields=['status']),
         ]
 
@@ -175,20 +179,22 @@ class Order(models.Model):
             self.order_number = f"ORD-{timestamp}-{unique_id}"
         super().save(*args, **kwargs)
 
+    CUSTOMER_CANCELLABLE = [STATUS_PENDING, STATUS_ACCEPTED, STATUS_PACKED]
+
     @property
     def can_be_cancelled(self):
         """Check if order can be cancelled by customer."""
-        return self.status in [self.STATUS_PENDING, self.STATUS_ACCEPTED, self.STATUS_PACKED]
+        return self.status in self.CUSTOMER_CANCELLABLE
 
     @property
     def is_completed(self):
         """Check if order is completed."""
         return self.status == self.STATUS_DELIVERED
 
-    @property
-    def items_count(self):
-        """Return total number of items in order."""
-        return sum(item.quantity for item in self.items.all())
+    def recount_items(self):
+        """Store the total quantity of the order's items in `items_count`."""
+        self.items_count = self.items.aggregate(count=models.Sum('quantity'))['count'] or 0
+        Order.objects.filter(pk=self.pk).update(items_count=self.items_count)
 
     def calculate_total(self):
         """Calculate and update order total."""
@@ -204,20 +210,19 @@ class Order(models.Model):
         self.save(update_fields=['is_paid', 'paid_at'])
 
     def cancel(self, user, reason):
-        """Cancel the order."""
-        from django.utils import timezone
+        """Cancel the order and return its items to stock."""
+        from .transitions import InvalidTransition, transition_orders
+
         if not self.can_be_cancelled:
             raise ValueError("Order cannot be cancelled at this stage")
 
-        self.status = self.STATUS_CANCELLED
-        self.cancelled_by = user
-        self.cancellation_reason = reason
-        self.cancelled_at = timezone.now()
-        self.save(update_fields=['status', 'cancelled_by', 'cancellation_reason', 'cancelled_at'])
-
-        for item in self.items.all():
-            item.product.stock += item.quantity
-            item.product.save(update_fields=['stock'])
+        # The UPDATE rechecks the status, in case staff moved the order on meanwhile.
+        changed, _ = transition_orders(
+            [self.pk], self.STATUS_CANCELLED, user, reason=reason, sources=self.CUSTOMER_CANCELLABLE
+        )
+        if not changed:
+            raise InvalidTransition("Order cannot be cancelled at this stage")
+        self.refresh_from_db()
 
 
 class OrderItem(models.Model):
@@ -325,4 +330,43 @@ class OrderStatusHistory(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.order.order_number}:  {self.from_status} → {self.to_status}"
\ No newline at end of file
+        return f"{self.order.order_number}:  {self.from_status} → {self.to_status}"
+
+class PurchasedProduct(models.Model):
+    """
+    Ledger of products each user has received, one row per (user, product).
+    Written when an order is delivered; answers "may this user review
+    this product" with a single indexed lookup.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='purchased_products',
+        verbose_name=_('user')
+    )
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='purchases',
+        verbose_name=_('product')
+    )
+
+    first_delivered_order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('first delivered order')
+    )
+
+    delivered_at = models.DateTimeField(_('delivered at'))
+
+    class Meta:
+        db_table = 'purchased_products'
+        verbose_name = _('Purchased Product')
+        verbose_name_plural = _('Purchased Products')
+        unique_together = ['user', 'product']
+
+    def __str__(self):
+        return f"{self.user_id} → {self.product_id}"
@@ -0,0 +1,97 @@
+"""
+Verified-purchase ledger.
+
+``PurchasedProduct`` holds one row per (user, product) the user has
+received, pointing at the first delivered order. Rows are written when
+an order becomes delivered and withdrawn if it leaves that status, so
+review eligibility is a single lookup on the (user, product) unique
+index instead of a join across orders and order items.
+"""
+from django.apps import apps as django_apps
+from django.db.models.functions import Coalesce
+
+DELIVERED = 'delivered'
+
+
+def _delivered_items(order_item_model, **filters):
+    """(user, product, order, delivered_at) of delivered items, earliest delivery first."""
+    return (
+        order_item_model.objects.filter(order__status=DELIVERED, **filters)
+        .annotate(delivered=Coalesce('order__delivered_at', 'order__updated_at'))
+        .order_by('order__user_id', 'product_id', 'delivered', 'order_id')
+        .values_list('order__user_id', 'product_id', 'order_id', 'delivered')
+    )
+
+
+def _record(ledger_model, rows, batch_size=1000):
+    entries, seen = [], set()
+    for user_id, product_id, order_id, delivered_at in rows:
+        if (user_id, product_id) not in seen:
+            seen.add((user_id, product_id))
+            entries.append(ledger_model(
+                user_id=user_id, product_id=product_id,
+                first_delivered_order_id=order_id, delivered_at=delivered_at,
+            ))
+    # An existing row is an earlier delivery and wins.
+    ledger_model.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
+    return len(entries)
+
+
+def record_delivery(order):
+    """Add the products of a just-delivered order to its user's ledger."""
+    ledger = django_apps.get_model('orders', 'PurchasedProduct')
+    rows = order.items.values_list('product_id', flat=True).distinct()
+    _record(ledger, ((order.user_id, product_id, order.pk, order.delivered_at) for product_id in rows))
+
+
+def record_deliveries(order_ids):
+    """Add the products of just-delivered orders to their users' ledgers."""
+    ledger = django_apps.get_model('orders', 'PurchasedProduct')
+    order_item_model = django_apps.get_model('orders', 'OrderItem')
+    _record(ledger, _delivered_items(order_item_model, order_id__in=order_ids))
+
+
+def revoke_delivery(order):
+    """
+    Withdraw rows pointing at an order that is no longer delivered, falling
+    back to the user's next delivered order of the same product if any.
+    """
+    ledger = django_apps.get_model('orders', 'PurchasedProduct')
+    product_ids = list(
+        ledger.objects.filter(first_delivered_order=order).values_list('product_id', flat=True)
+    )
+    if not product_ids:
+        return
+    ledger.objects.filter(first_delivered_order=order).delete()
+    _record(ledger, _delivered_items(
+        order.items.model, order__user_id=order.user_id, product_id__in=product_ids,
+    ).exclude(order=order))
+
+
+def rebuild_ledger(order_item_model=None, ledger_model=None, batch_size=1000):
+    """Recreate the whole ledger from delivered orders. Returns rows written."""
+    order_item_model = order_item_model or django_apps.get_model('orders', 'OrderItem')
+    ledger_model = ledger_model or django_apps.get_model('orders', 'PurchasedProduct')
+    ledger_model.objects.all().delete()
+    return _record(ledger_model, _delivered_items(order_item_model).iterator(chunk_size=5000), batch_size)
+
+
+def delivered_order_id(user, product_id):
+    """Id of the user's first delivered order containing the product, or None."""
+    if not user.is_authenticated:
+        return None
+    ledger = django_apps.get_model('orders', 'PurchasedProduct')
+    return (
+        ledger.objects.filter(user=user, product_id=product_id)
+        .values_list('first_delivered_order_id', flat=True)
+        .first()
+    )
+
+
+def reviewable_product_ids(user, product_ids=None):
+    """Ids of products the user received but has not reviewed yet."""
+    ledger = django_apps.get_model('orders', 'PurchasedProduct')
+    purchases = ledger.objects.filter(user=user).exclude(product__reviews__user=user)
+    if product_ids is not None:
+        purchases = purchases.filter(product_id__in=product_ids)
+    return set(purchases.values_list('product_id', flat=True))
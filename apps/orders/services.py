@@ -4,10 +4,18 @@ Business logic for order management.
 """
 from decimal import Decimal
 from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
 from .models import Order, OrderItem, OrderStatusHistory
+from .transitions import InvalidTransition, transition_orders
+from apps.cart.abandonment import mark_recovered
 from apps.cart.models import Cart
+from apps.cart.revalidation import CartChanged, revalidate_items
+from apps.cart.summary import cart_items
+from apps.products.catalog_engine import record_product_changes
+from apps.products.listing_cache import bump_catalog_version
+from apps.products.models import Product, StockMovement
 
 
 class OrderService:
@@ -44,7 +52,14 @@ class OrderService:
             latitude = checkout_data.get('latitude')
             longitude = checkout_data.get('longitude')
 
-        subtotal = cart.get_total(currency)
+        items = cart_items(cart)
+        revalidation = revalidate_items(items, apply=False)
+        if revalidation.has_issues:
+            raise CartChanged(revalidation)
+        subtotal = sum((item.get_subtotal() for item in items), Decimal('0'))
+        if currency != 'UZS':
+            from core.services.currency import CurrencyService
+            subtotal = CurrencyService().convert(subtotal, 'UZS', currency)
         delivery_fee = self._calculate_delivery_fee(delivery_city)
         tax_amount = Decimal('0')
         discount_amount = Decimal('0')
@@ -66,11 +81,12 @@ class OrderService:
             tax_amount=tax_amount,
             discount_amount=discount_amount,
             total_amount=total_amount,
+            items_count=sum(item.quantity for item in items),
             payment_method=checkout_data['payment_method'],
             customer_notes=checkout_data.get('customer_notes', ''),
         )
 
-        for cart_item in cart.items.all():
+        for cart_item in items:
             OrderItem.objects.create(
                 order=order,
                 product=cart_item.product,
@@ -82,15 +98,30 @@ class OrderService:
                 subtotal=cart_item.get_subtotal()
             )
 
-            cart_item.product.stock -= cart_item.quantity
-            cart_item.product.sales_count += cart_item.quantity
-            cart_item.product.save(update_fields=['stock', 'sales_count'])
+            # Conditional on stock, so a parallel order cannot oversell.
+            reserved = Product.objects.filter(pk=cart_item.product_id, stock__gte=cart_item.quantity).update(
+                stock=F('stock') - cart_item.quantity,
+                sales_count=F('sales_count') + cart_item.quantity,
+            )
+            if not reserved:
+                raise CartChanged()
+
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=item.product_id, variant_id=item.variant_id, quantity=-item.quantity,
+                reason=StockMovement.REASON_SALE, reference=order.order_number,
+            )
+            for item in items
+        ])
+        record_product_changes([item.product_id for item in items])
+        bump_catalog_version(*{item.product.category_id for item in items})
 
         OrderStatusHistory.objects.create(
             order=order,
             to_status=Order.STATUS_PENDING,
             changed_by=user
         )
+        mark_recovered(cart)
 
         return order
 
@@ -104,29 +135,22 @@ class OrderService:
         else:
             return Decimal('35000')
 
-    @transaction.atomic
     def update_order_status(self, order: Order, new_status: str, user, notes: str = ''):
         """
-        Update order status with history tracking.
+        Move one order to `new_status` with history tracking.
+        Raises InvalidTransition if its current status does not allow it.
         """
-        old_status = order.status
-        order.status = new_status
+        changed, _ = transition_orders([order.pk], new_status, user, notes=notes)
+        if not changed:
+            raise InvalidTransition(f'Order cannot move from {order.status} to {new_status}')
+        order.refresh_from_db()
 
-        if new_status == Order.STATUS_DELIVERED:
-            order.delivered_at = timezone.now()
-
-        order.save()
-
-        OrderStatusHistory.objects.create(
-            order=order,
-            from_status=old_status,
-            to_status=new_status,
-            changed_by=user,
-            notes=notes
-        )
-
-        from core.services.email import EmailService
-        EmailService().send_order_status_update(order)
+    def update_orders_status(self, order_ids, new_status: str, user, notes: str = ''):
+        """
+        Move many orders to `new_status` at once; ineligible orders are skipped.
+        Returns ``(changed_ids, skipped_ids)``.
+        """
+        return transition_orders(order_ids, new_status, user, notes=notes)
 
     @transaction.atomic
     def mark_order_as_paid(self, order: Order):
@@ -0,0 +1,15 @@
+"""
+Background tasks for the orders app.
+"""
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def send_status_updates(order_ids: list):
+    """Email customers the new status of their orders."""
+    from core.services.email import EmailService
+    from .models import Order
+
+    email_service = EmailService()
+    for order in Order.objects.filter(pk__in=order_ids):
+        email_service.send_order_status_update(order)
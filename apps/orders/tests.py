@@ -1,7 +1,317 @@
 
-from django.test import TestCase
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.forms import model_to_dict
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from apps.cart.models import Cart, CartItem
+from apps.products.models import Category, Product, StockMovement
+from .listing import order_page
+from .models import Order, OrderItem, OrderStatusHistory
+from .purchases import delivered_order_id, reviewable_product_ids
+from .services import OrderService
+from .tasks import send_status_updates
+from .transitions import InvalidTransition, transition_orders
 
 class SimpleOrdersTest(TestCase):
 	def test_basic(self):
 		self.assertEqual(2 * 2, 4)
 
+
+
+class PurchaseLedgerTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='buyer', email='b@example.com', password='x')
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.product = Product.objects.create(
+            name='Olma', slug='olma', description='', category=category, price=1, sku='P-1'
+        )
+
+    def place_order(self):
+        order = Order.objects.create(
+            user=self.user, customer_name='B', customer_email='b@example.com', customer_phone='1',
+            delivery_address='A', delivery_city='Tashkent', subtotal=1, total_amount=1, payment_method='cash',
+        )
+        OrderItem.objects.create(order=order, product=self.product, unit_price=1, quantity=1)
+        return order
+
+    def test_delivery_opens_and_closes_review_eligibility(self):
+        first, second = self.place_order(), self.place_order()
+        self.assertIsNone(delivered_order_id(self.user, self.product.pk))
+
+        OrderService().update_order_status(first, Order.STATUS_DELIVERED, self.user)
+        OrderService().update_order_status(second, Order.STATUS_DELIVERED, self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(delivered_order_id(self.user, self.product.pk), first.pk)
+        self.assertEqual(reviewable_product_ids(self.user), {self.product.pk})
+
+        OrderService().update_order_status(first, Order.STATUS_ON_THE_WAY, self.user)
+        self.assertEqual(delivered_order_id(self.user, self.product.pk), second.pk)
+
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse('reviews:create', args=[self.product.pk]), {'rating': 5, 'title': 'Good', 'comment': 'Tasty apples'}
+        )
+        review = self.product.reviews.get()
+        self.assertEqual(review.order_id, second.pk)
+        self.assertEqual(reviewable_product_ids(self.user), set())
+
+    def test_admin_delivery_records_the_purchase(self):
+        order = self.place_order()
+        admin = get_user_model().objects.create_superuser(username='admin@example.com', email='admin@example.com')
+        self.client.force_login(admin)
+
+        url = reverse('admin:orders_order_change', args=[order.pk])
+        data = self.client.get(url).context['adminform'].form.initial
+        data = {key: value for key, value in data.items() if value is not None}
+        data.update({
+            'status': Order.STATUS_DELIVERED,
+            'items-TOTAL_FORMS': 1, 'items-INITIAL_FORMS': 1, 'items-MIN_NUM_FORMS': 0, 'items-MAX_NUM_FORMS': 1000,
+            'items-0-id': order.items.get().pk, 'items-0-order': order.pk, 'items-0-product_sku': 'P-1',
+        })
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+
+        order.refresh_from_db()
+        self.assertIsNotNone(order.delivered_at)
+        self.assertEqual(delivered_order_id(self.user, self.product.pk), order.pk)
+
+
+class OrderListingTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='l@example.com', email='l@example.com')
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.products = [
+            Product.objects.create(
+                name=f'Olma {i}', slug=f'olma-{i}', description='', category=category, price=1000, sku=f'L-{i}', stock=50
+            )
+            for i in range(5)
+        ]
+
+    def place_order(self, items=1):
+        order = Order.objects.create(
+            user=self.user, customer_name='L', customer_email='l@example.com', customer_phone='1',
+            delivery_address='A', delivery_city='Tashkent', subtotal=1, total_amount=1, payment_method='cash',
+        )
+        for product in self.products[:items]:
+            OrderItem.objects.create(order=order, product=product, unit_price=1000, quantity=2)
+        order.recount_items()
+        return order
+
+    def test_items_count_is_stored(self):
+        cart = Cart.objects.create(user=self.user)
+        for product in self.products[:2]:
+            CartItem.objects.create(cart=cart, product=product, quantity=3, price_snapshot=1000)
+        order = OrderService().create_order_from_cart(self.user, cart, {
+            'customer_name': 'L', 'customer_email': 'l@example.com', 'customer_phone': '+998901234567',
+            'delivery_address': 'Street 1', 'delivery_city': 'Tashkent', 'payment_method': 'cash',
+        })
+        self.assertEqual(Order.objects.get(pk=order.pk).items_count, 6)
+
+        order.items.first().delete()
+        order.recount_items()
+        self.assertEqual(Order.objects.get(pk=order.pk).items_count, 3)
+
+    def test_list_pages_by_keyset(self):
+        orders = [self.place_order() for _ in range(5)]
+        newest_first = [order.pk for order in reversed(orders)]
+
+        page, cursor = order_page(Order.objects.filter(user=self.user), per_page=2)
+        self.assertEqual([order.pk for order in page], newest_first[:2])
+        page, cursor = order_page(Order.objects.filter(user=self.user), cursor, per_page=2)
+        self.assertEqual([order.pk for order in page], newest_first[2:4])
+        page, cursor = order_page(Order.objects.filter(user=self.user), cursor, per_page=2)
+        self.assertEqual([order.pk for order in page], newest_first[4:])
+        self.assertIsNone(cursor)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('orders:list'))
+        self.assertContains(response, orders[0].order_number)
+
+    def test_detail_queries_do_not_grow_with_items(self):
+        small, large = self.place_order(items=1), self.place_order(items=5)
+        self.client.force_login(self.user)
+
+        with self.assertNumQueries(5) as small_queries:
+            self.client.get(reverse('orders:detail', args=[small.pk]))
+        with self.assertNumQueries(len(small_queries)):
+            response = self.client.get(reverse('orders:detail', args=[large.pk]))
+        self.assertContains(response, 'Olma 4')
+
+
+class OrderTransitionTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='t@example.com', email='t@example.com')
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.product = Product.objects.create(
+            name='Olma', slug='olma', description='', category=category, price=1000, sku='T-1', stock=5
+        )
+
+    def place_order(self, status=Order.STATUS_PENDING):
+        order = Order.objects.create(
+            user=self.user, status=status, customer_name='T', customer_email='t@example.com', customer_phone='1',
+            delivery_address='A', delivery_city='Tashkent', subtotal=1, total_amount=1, payment_method='cash',
+        )
+        OrderItem.objects.create(order=order, product=self.product, unit_price=1000, quantity=2)
+        return order
+
+    def test_bulk_transition_skips_ineligible_orders(self):
+        pending, packed, cancelled = (
+            self.place_order(), self.place_order(Order.STATUS_PACKED), self.place_order(Order.STATUS_CANCELLED)
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            changed, skipped = transition_orders(
+                [pending.pk, packed.pk, cancelled.pk], Order.STATUS_ON_THE_WAY, self.user, notes='Shift 3'
+            )
+        self.assertEqual((changed, skipped), ([pending.pk, packed.pk], [cancelled.pk]))
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            set(Order.objects.values_list('status', flat=True)), {Order.STATUS_ON_THE_WAY, Order.STATUS_CANCELLED}
+        )
+        self.assertEqual(
+            sorted(OrderStatusHistory.objects.filter(notes='Shift 3').values_list('from_status', flat=True)),
+            [Order.STATUS_PACKED, Order.STATUS_PENDING],
+        )
+
+        send_status_updates(changed)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_invalid_transition_is_refused(self):
+        order = self.place_order(Order.STATUS_CANCELLED)
+        with self.assertRaises(InvalidTransition):
+            OrderService().update_order_status(order, Order.STATUS_ACCEPTED, self.user)
+        with self.assertRaises(InvalidTransition):
+            transition_orders([order.pk], 'lost', self.user)
+        self.assertFalse(OrderStatusHistory.objects.exists())
+
+    def test_cancel_restocks_and_records_history(self):
+        order = self.place_order()
+        order.cancel(self.user, 'Changed my mind')
+
+        self.assertEqual(order.status, Order.STATUS_CANCELLED)
+        self.assertEqual(order.cancellation_reason, 'Changed my mind')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 7)
+        self.assertEqual(StockMovement.objects.get().quantity, 2)
+        self.assertEqual(order.status_history.get().to_status, Order.STATUS_CANCELLED)
+        with self.assertRaises(ValueError):
+            order.cancel(self.user, 'Again')
+
+        stale = self.place_order()
+        Order.objects.filter(pk=stale.pk).update(status=Order.STATUS_ON_THE_WAY)
+        with self.assertRaises(InvalidTransition):
+            stale.cancel(self.user, 'Too late')
+        self.assertEqual(Order.objects.get(pk=stale.pk).status, Order.STATUS_ON_THE_WAY)
+
+    def test_admin_refuses_invalid_moves_and_offers_bulk_actions(self):
+        admin = get_user_model().objects.create_superuser(username='admin@example.com', email='admin@example.com')
+        cancelled, pending = self.place_order(Order.STATUS_CANCELLED), self.place_order()
+        self.client.force_login(admin)
+
+        url = reverse('admin:orders_order_changelist')
+        self.client.post(url, {
+            'action': 'mark_packed', '_selected_action': [cancelled.pk, pending.pk],
+        })
+        self.assertEqual(
+            dict(Order.objects.values_list('pk', 'status')),
+            {cancelled.pk: Order.STATUS_CANCELLED, pending.pk: Order.STATUS_PACKED},
+        )
+        self.assertEqual(OrderStatusHistory.objects.get().order_id, pending.pk)
+
+        from .admin import OrderAdminForm
+
+        data = dict(model_to_dict(cancelled), status=Order.STATUS_PENDING)
+        form = OrderAdminForm({key: value for key, value in data.items() if value is not None}, instance=cancelled)
+        self.assertEqual(list(form.errors), ['status'])
+
+    def test_dashboard_bulk_status(self):
+        admin = get_user_model().objects.create_superuser(username='admin@example.com', email='admin@example.com')
+        orders = [self.place_order() for _ in range(3)]
+        self.client.force_login(admin)
+
+        response = self.client.post(
+            reverse('dashboard:orders_bulk_status'),
+            {'order_ids': [order.pk for order in orders], 'status': Order.STATUS_ACCEPTED},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.json()['updated'], [str(order.pk) for order in orders])
+        self.assertEqual(Order.objects.filter(status=Order.STATUS_ACCEPTED).count(), 3)
+
+
+class StockRestorationTest(TransactionTestCase):
+    CHECKOUT = {
+        'customer_name': 'S', 'customer_email': 's@example.com', 'customer_phone': '+998901234567',
+        'delivery_address': 'Street 1', 'delivery_city': 'Tashkent', 'payment_method': 'cash',
+    }
+
+    def setUp(self):
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.product = Product.objects.create(
+            name='Olma', slug='olma', description='', category=category, price=1000, sku='S-1', stock=100
+        )
+        self.users = [
+            get_user_model().objects.create_user(username=f's{i}@example.com', email=f's{i}@example.com')
+            for i in range(8)
+        ]
+
+    def checkout(self, user, quantity):
+        cart, _ = Cart.objects.get_or_create(user=user)
+        CartItem.objects.update_or_create(
+            cart=cart, product=self.product, defaults={'quantity': quantity, 'price_snapshot': 1000}
+        )
+        return OrderService().create_order_from_cart(user, cart, self.CHECKOUT)
+
+    def test_parallel_checkouts_and_cancellations(self):
+        placed = [self.checkout(user, 2) for user in self.users[:4]]
+        barrier = threading.Barrier(8)
+        errors = []
+
+        def run(action):
+            try:
+                barrier.wait()
+                for attempt in range(50):
+                    try:
+                        action()
+                        break
+                    except OperationalError:
+                        # SQLite has no row locks; a writer may find the database busy.
+                        if connection.vendor != 'sqlite':
+                            raise
+                        time.sleep(0.005 * (attempt + 1))
+                    except InvalidTransition:
+                        # A retried cancel whose first attempt committed before
+                        # failing (e.g. in refresh_from_db) finds it already done.
+                        if not attempt:
+                            raise
+                        break
+                else:
+                    errors.append(action)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        actions = [lambda order=order: order.cancel(order.user, 'Changed my mind') for order in placed]
+        actions += [lambda user=user: self.checkout(user, 3) for user in self.users[4:]]
+        threads = [threading.Thread(target=run, args=(action,)) for action in actions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            set(Order.objects.filter(pk__in=[order.pk for order in placed]).values_list('status', flat=True)),
+            {Order.STATUS_CANCELLED},
+        )
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.sales_count), (88, 12))
+        movements = StockMovement.objects.filter(product=self.product)
+        self.assertEqual(movements.aggregate(total=Sum('quantity'))['total'], 88 - 100)
+        self.assertEqual(movements.filter(reason=StockMovement.REASON_CANCELLATION).count(), 4)
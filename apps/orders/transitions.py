@@ -0,0 +1,143 @@
+"""
+Order status transitions.
+
+TRANSITIONS lists, for each status, the statuses an order may move to;
+every status change goes through ``transition_orders``: the service,
+``Order.cancel``, the dashboard and the admin form and actions. It moves any
+number of orders with one ``UPDATE ... WHERE status IN (<allowed
+sources>)``, so an order that was moved on concurrently, or was never
+eligible, is skipped rather than overwritten. The history rows are
+written with one ``bulk_create``, and customer emails are sent by a
+Celery task after commit instead of inside the request.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.products.catalog_engine import record_product_changes
+from apps.products.listing_cache import bump_catalog_version
+from apps.products.models import Product, StockMovement
+from core.utils.helpers import enqueue_on_commit
+from .models import Order, OrderItem, OrderStatusHistory
+from .purchases import record_deliveries, revoke_delivery
+
+MAX_BULK_ORDERS = 500
+
+TRANSITIONS = {
+    Order.STATUS_PENDING: {
+        Order.STATUS_ACCEPTED, Order.STATUS_PACKED, Order.STATUS_ON_THE_WAY,
+        Order.STATUS_DELIVERED, Order.STATUS_CANCELLED,
+    },
+    Order.STATUS_ACCEPTED: {
+        Order.STATUS_PACKED, Order.STATUS_ON_THE_WAY, Order.STATUS_DELIVERED, Order.STATUS_CANCELLED,
+    },
+    Order.STATUS_PACKED: {Order.STATUS_ON_THE_WAY, Order.STATUS_DELIVERED, Order.STATUS_CANCELLED},
+    Order.STATUS_ON_THE_WAY: {Order.STATUS_DELIVERED, Order.STATUS_CANCELLED},
+    # Undoes a delivery recorded by mistake.
+    Order.STATUS_DELIVERED: {Order.STATUS_ON_THE_WAY},
+    Order.STATUS_CANCELLED: set(),
+}
+
+
+class InvalidTransition(ValueError):
+    """Raised when an order cannot move to the requested status."""
+
+
+def can_transition(from_status, to_status):
+    return to_status in TRANSITIONS.get(from_status, ())
+
+
+def allowed_sources(to_status):
+    """Statuses an order may move to `to_status` from."""
+    if to_status not in TRANSITIONS:
+        raise InvalidTransition(f'Unknown order status: {to_status}')
+    return [status for status, targets in TRANSITIONS.items() if to_status in targets]
+
+
+def transition_orders(order_ids, new_status, user, notes='', reason='', sources=None):
+    """
+    Move the given orders to `new_status`. Orders whose current status does
+    not allow it, or is not among `sources` when given, are left alone.
+    Returns ``(changed_ids, skipped_ids)``.
+    """
+    allowed = allowed_sources(new_status)
+    sources = allowed if sources is None else [status for status in sources if status in allowed]
+    order_ids = list(order_ids)
+    now = timezone.now()
+
+    changes = {'status': new_status, 'updated_at': now}
+    if new_status == Order.STATUS_DELIVERED:
+        changes['delivered_at'] = now
+    elif new_status == Order.STATUS_CANCELLED:
+        changes.update(cancelled_by=user, cancelled_at=now, cancellation_reason=reason or notes)
+
+    with transaction.atomic():
+        previous = dict(
+            Order.objects.select_for_update()
+            .filter(pk__in=order_ids, status__in=sources)
+            .values_list('pk', 'status')
+        )
+        if previous:
+            Order.objects.filter(pk__in=previous, status__in=sources).update(**changes)
+            OrderStatusHistory.objects.bulk_create([
+                OrderStatusHistory(
+                    order_id=pk, from_status=from_status, to_status=new_status, changed_by=user, notes=notes,
+                )
+                for pk, from_status in previous.items()
+            ])
+            _apply_side_effects(previous, new_status)
+
+            from .tasks import send_status_updates
+
+            enqueue_on_commit(send_status_updates, list(previous))
+
+    changed = set(previous)
+    return [pk for pk in order_ids if int(pk) in changed], [pk for pk in order_ids if int(pk) not in changed]
+
+
+def _apply_side_effects(previous, new_status):
+    if new_status == Order.STATUS_DELIVERED:
+        record_deliveries(list(previous))
+    elif new_status == Order.STATUS_CANCELLED:
+        restock(list(previous))
+
+    undelivered = [pk for pk, status in previous.items() if status == Order.STATUS_DELIVERED]
+    if undelivered:
+        for order in Order.objects.filter(pk__in=undelivered):
+            revoke_delivery(order)
+
+
+def restock(order_ids):
+    """
+    Return the items of cancelled orders to stock and take them off the
+    sales counts: one UPDATE for all products, inside the caller's
+    transaction, plus one ledger row per order line.
+    """
+    lines = list(
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values_list('product_id', 'variant_id', 'quantity', 'order__order_number')
+    )
+    if not lines:
+        return
+    quantities = {}
+    for product_id, _, quantity, _ in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    returned = Case(
+        *(When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()),
+        default=Value(0),
+    )
+    Product.objects.filter(pk__in=quantities).update(
+        stock=F('stock') + returned,
+        sales_count=Greatest(F('sales_count') - returned, Value(0)),
+    )
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            product_id=product_id, variant_id=variant_id, quantity=quantity,
+            reason=StockMovement.REASON_CANCELLATION, reference=order_number,
+        )
+        for product_id, variant_id, quantity, order_number in lines
+    ])
+    record_product_changes(quantities)
+    bump_catalog_version(*Product.objects.filter(pk__in=quantities).values_list('category_id', flat=True).distinct())
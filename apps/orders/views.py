@@ -8,8 +8,12 @@ from django.urls import reverse
 
 from .models import Order, OrderItem
 from .forms import CheckoutForm
+from .listing import order_items, order_page, with_details
+from .purchases import reviewable_product_ids
 from .services import OrderService
 from apps.cart.services import CartService
+from apps.cart.revalidation import CartChanged, announce_changes, revalidate_items
+from apps.cart.summary import CartSummary, cart_items
 from core.services.pdf import PDFInvoiceGenerator
 
 
@@ -20,23 +24,37 @@ def checkout_view(request):
     """
     cart_service = CartService(request.user)
     cart = cart_service.get_cart()
+    items = cart_items(cart)
+    revalidation = revalidate_items(items)
+    summary = CartSummary(items)
+    request.cart_summary = summary
 
-    if not cart or cart.items_count == 0:
+    if not summary:
         messages.warning(request, 'Your cart is empty.')
         return redirect('cart:view')
 
+    if revalidation.stock_issues:
+        # The cart page lists what is short.
+        return redirect('cart:view')
+    announce_changes(request, revalidation)
+
     if request.method == 'POST':
         form = CheckoutForm(request.POST, user=request.user)
-        if form.is_valid():
-            currency = request.session.get('currency', 'UZS')
+        # A changed price is shown to the customer before the order is placed.
+        if not revalidation.price_changes and form.is_valid():
+            currency = request.currency
 
             order_service = OrderService()
-            order = order_service.create_order_from_cart(
-                user=request.user,
-                cart=cart,
-                checkout_data=form.cleaned_data,
-                currency=currency
-            )
+            try:
+                order = order_service.create_order_from_cart(
+                    user=request.user,
+                    cart=cart,
+                    checkout_data=form.cleaned_data,
+                    currency=currency
+                )
+            except CartChanged:
+                messages.warning(request, 'Your cart changed while placing the order. Please review it.')
+                return redirect('orders:checkout')
 
             cart_service.clear_cart()
 
@@ -57,23 +75,11 @@ def checkout_view(request):
         }
         form = CheckoutForm(initial=initial_data, user=request.user)
 
-    currency = request.session.get('currency', 'UZS')
-    
-    total_uzs = sum(item.get_subtotal() for item in cart.items.all())
-    
-    if currency != 'UZS':
-        from core.services.currency import CurrencyService
-        currency_service = CurrencyService()
-        total = currency_service.convert(total_uzs, 'UZS', currency)
-    else:
-        total = total_uzs
-
     context = {
         'form': form,
         'cart': cart,
-        'total': total,
-        'total_uzs': total_uzs,
-        'currency': currency,
+        'summary': summary,
+        'currency': request.currency,
     }
 
     return render(request, 'orders/checkout.html', context)
@@ -82,12 +88,13 @@ def checkout_view(request):
 @login_required
 def order_list_view(request):
     """
-    Display user's order history.
+    Display user's order history, newest first: ``?cursor=<order id>``.
     """
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
+    orders, next_cursor = order_page(Order.objects.filter(user=request.user), request.GET.get('cursor'))
 
     context = {
         'orders': orders,
+        'next_cursor': next_cursor,
     }
 
     return render(request, 'orders/order_list.html', context)
@@ -98,10 +105,17 @@ def order_detail_view(request, order_id):
     """
     Display order details. 
     """
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = get_object_or_404(with_details(Order.objects.filter(user=request.user), payments=False), id=order_id)
+    items = order_items(order)
+
+    reviewable_ids = set()
+    if order.is_completed:
+        reviewable_ids = reviewable_product_ids(request.user, [item.product_id for item in items])
 
     context = {
         'order': order,
+        'items': items,
+        'reviewable_ids': reviewable_ids,
     }
 
     return render(request, 'orders/order_detail.html', context)
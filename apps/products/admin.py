@@ -6,7 +6,10 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from .models import Category, Product, ProductImage, ProductVariant
+from .catalog_engine import record_product_changes
+from .category_tree import recount_subtree_products
+from .listing_cache import bump_catalog_version, bump_home_version
+from .models import Category, Product, ProductImage, ProductVariant, StockMovement
 
 
 class ProductImageInline(admin.TabularInline):
@@ -45,7 +48,7 @@ class CategoryAdmin(admin.ModelAdmin):
     
     fieldsets = (
         (_('Basic Information'), {
-            'fields': ('name', 'slug', 'description')
+            'fields': ('name', 'slug', 'parent', 'description')
         }),
         (_('Display'), {
             'fields': ('image', 'image_preview_large', 'icon', 'order'),
@@ -238,28 +241,45 @@ class ProductAdmin(admin.ModelAdmin):
     stock_status.short_description = _('Stock')
     stock_status.admin_order_field = 'stock'
     
+    def _update_products(self, queryset, **changes):
+        """
+        Update the selected products and invalidate their categories' listings.
+        Ids are read before the UPDATE: a changelist filtered on the changed
+        field would match none of them afterwards. Returns the ids.
+        """
+        rows = list(queryset.values_list('pk', 'category_id'))
+        Product.objects.filter(pk__in=[pk for pk, _ in rows]).update(**changes)
+        bump_catalog_version(*{category_id for _, category_id in rows})
+        return [pk for pk, _ in rows]
+
     def activate_products(self, request, queryset):
         """Activate selected products."""
-        updated = queryset.update(is_active=True)
-        self.message_user(request, f'{updated} ta mahsulot faollashtirildi.')
+        ids = self._update_products(queryset, is_active=True)
+        recount_subtree_products()
+        record_product_changes(ids)
+        self.message_user(request, f'{len(ids)} ta mahsulot faollashtirildi.')
     activate_products.short_description = _('Activate selected products')
     
     def deactivate_products(self, request, queryset):
         """Deactivate selected products."""
-        updated = queryset.update(is_active=False)
-        self.message_user(request, f'{updated} ta mahsulot o\'chirildi.')
+        ids = self._update_products(queryset, is_active=False)
+        recount_subtree_products()
+        record_product_changes(ids)
+        self.message_user(request, f'{len(ids)} ta mahsulot o\'chirildi.')
     deactivate_products.short_description = _('Deactivate selected products')
     
     def make_featured(self, request, queryset):
         """Mark products as featured."""
-        updated = queryset.update(is_featured=True)
-        self.message_user(request, f'{updated} ta mahsulot tanlangan mahsulotlar ro\'yxatiga qo\'shildi.')
+        ids = self._update_products(queryset, is_featured=True)
+        bump_home_version()
+        self.message_user(request, f'{len(ids)} ta mahsulot tanlangan mahsulotlar ro\'yxatiga qo\'shildi.')
     make_featured.short_description = _('Mark as featured')
     
     def remove_featured(self, request, queryset):
         """Remove products from featured."""
-        updated = queryset.update(is_featured=False)
-        self.message_user(request, f'{updated} ta mahsulot tanlangan mahsulotlardan olib tashlandi.')
+        ids = self._update_products(queryset, is_featured=False)
+        bump_home_version()
+        self.message_user(request, f'{len(ids)} ta mahsulot tanlangan mahsulotlardan olib tashlandi.')
     remove_featured.short_description = _('Remove from featured')
     
     def duplicate_products(self, request, queryset):
@@ -427,4 +447,18 @@ class ProductVariantAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         """Allow admins to delete product variants."""
-        return request.user.is_superuser or request.user.is_staff
\ No newline at end of file
+        return request.user.is_superuser or request.user.is_staff
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    """Read-only view of the inventory ledger."""
+    list_display = ['product', 'variant', 'quantity', 'reason', 'reference', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['product__name', 'reference']
+    list_select_related = ['product', 'variant']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,331 @@
+"""
+In-memory columnar snapshot of the active catalog.
+
+Each worker process keeps the filter/sort columns of active products in
+compact ``array`` buffers (about 50 bytes per product). Listing filters and
+sorts are answered from the snapshot with vectorized NumPy masks and
+``argsort`` when NumPy is installed, or a plain Python pass otherwise, and
+only the final page's rows are read from the database.
+
+The snapshot follows product changes through a small change log in the
+default cache: every product save/delete appends the changed ids and
+workers re-read just those rows on their next query. Bulk writes that
+bypass signals log a full reload instead. The log only reaches other
+processes when the default cache is shared (Redis, Memcached); with the
+per-process cache a worker sees its own changes only, so every snapshot
+is also reloaded once it is MAX_AGE seconds old. Review ratings are
+picked up when the product next changes or the snapshot is reloaded.
+"""
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Avg
+
+from .listing_cache import ordered_products
+from .models import Product
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+CHANGE_SEQ_KEY = 'catalog:engine:seq'
+CHANGE_KEY = 'catalog:engine:change:{seq}'
+# Change entries live this long; a worker further behind reloads fully.
+CHANGE_TIMEOUT = 60 * 60
+MAX_PENDING_CHANGES = 500
+
+DEFAULTS = {
+    'ENABLED': False,
+    # Above this many active products the engine stays off in this worker.
+    'MAX_PRODUCTS': 200000,
+    # Seconds before a snapshot is reloaded whatever the change log says.
+    'MAX_AGE': 300,
+}
+
+COLUMNS = (
+    ('ids', 'q'),
+    ('category', 'i'),
+    ('brand', 'i'),
+    ('price', 'd'),
+    ('discount', 'd'),
+    ('stock', 'i'),
+    ('sales', 'i'),
+    ('rating', 'd'),
+    ('created', 'd'),
+)
+
+# Sort option -> (column, descending)
+SORT_COLUMNS = {
+    '-created_at': ('created', True),
+    'price_low': ('price', False),
+    'price_high': ('price', True),
+    'popular': ('sales', True),
+    'rating': ('rating', True),
+}
+
+NO_RATING = -1.0
+
+
+def engine_setting(name):
+    return getattr(settings, 'CATALOG_ENGINE', {}).get(name, DEFAULTS[name])
+
+
+def change_seq() -> int:
+    return cache.get(CHANGE_SEQ_KEY) or 0
+
+
+def record_product_changes(ids=None):
+    """
+    Log changed product ids once the transaction commits.
+    ``ids=None`` asks every worker for a full reload.
+    """
+    ids = None if ids is None else sorted(set(ids))
+
+    def _record():
+        if cache.add(CHANGE_SEQ_KEY, 1, None):
+            seq = 1
+        else:
+            try:
+                seq = cache.incr(CHANGE_SEQ_KEY)
+            except ValueError:
+                cache.set(CHANGE_SEQ_KEY, 1, None)
+                seq = 1
+        cache.set(CHANGE_KEY.format(seq=seq), {'ids': ids}, CHANGE_TIMEOUT)
+
+    transaction.on_commit(_record)
+
+
+def pending_changes(since, until):
+    """Ids changed in ``(since, until]``, or None when a full reload is needed."""
+    if until - since > MAX_PENDING_CHANGES or until < since:
+        return None
+    keys = [CHANGE_KEY.format(seq=seq) for seq in range(since + 1, until + 1)]
+    entries = cache.get_many(keys)
+    ids = set()
+    for key in keys:
+        entry = entries.get(key)
+        if entry is None or entry['ids'] is None:
+            return None
+        ids.update(entry['ids'])
+    return ids
+
+
+def _snapshot_rows(queryset):
+    return (
+        queryset.filter(is_active=True)
+        .annotate(avg_rating=Avg('reviews__rating'))
+        .order_by()
+        .values_list(
+            'pk', 'category_id', 'brand', 'price', 'discount_percentage',
+            'stock', 'sales_count', 'avg_rating', 'created_at',
+        )
+    )
+
+
+class CatalogSnapshot:
+    """Column arrays for the active catalog, indexed by row number."""
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, code in COLUMNS}
+        self.alive = bytearray()
+        self.rows = {}
+        self.brand_codes = {'': 0}
+        self.dead = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _values(self, row):
+        pk, category_id, brand, price, discount, stock, sales, rating, created = row
+        brand_key = (brand or '').strip().lower()
+        brand_code = self.brand_codes.setdefault(brand_key, len(self.brand_codes))
+        return (
+            pk, category_id, brand_code, float(price), float(discount), stock, sales,
+            float(rating) if rating is not None else NO_RATING, created.timestamp(),
+        )
+
+    def upsert(self, row):
+        values = self._values(row)
+        index = self.rows.get(values[0])
+        if index is None:
+            self.rows[values[0]] = len(self.alive)
+            self.alive.append(1)
+            for (name, _), value in zip(COLUMNS, values):
+                self.columns[name].append(value)
+        else:
+            for (name, _), value in zip(COLUMNS, values):
+                self.columns[name][index] = value
+
+    def remove(self, pk):
+        index = self.rows.pop(pk, None)
+        if index is not None:
+            self.alive[index] = 0
+            self.dead += 1
+
+    def refresh(self, ids):
+        """Re-read the given products; inactive or deleted ones are dropped."""
+        ids = set(ids)
+        for row in _snapshot_rows(Product.objects.filter(pk__in=ids)):
+            self.upsert(row)
+            ids.discard(row[0])
+        for pk in ids:
+            self.remove(pk)
+        if self.dead > len(self.alive) // 4:
+            self.compact()
+
+    def compact(self):
+        live = [index for index, flag in enumerate(self.alive) if flag]
+        for name, code in COLUMNS:
+            column = self.columns[name]
+            self.columns[name] = array(code, (column[index] for index in live))
+        self.alive = bytearray(b'\x01' * len(live))
+        self.rows = {pk: index for index, pk in enumerate(self.columns['ids'])}
+        self.dead = 0
+
+    def query(self, *, category_ids=None, brand='', min_price=None, max_price=None,
+              in_stock=False, on_sale=False, sort='-created_at'):
+        """Matching product ids in sort order."""
+        if not self.rows:
+            return []
+        brand_code = None
+        if brand:
+            brand_code = self.brand_codes.get(brand.strip().lower())
+            if brand_code is None:
+                return []
+        column, descending = SORT_COLUMNS.get(sort, SORT_COLUMNS['-created_at'])
+        filters = dict(
+            category_ids=category_ids, brand_code=brand_code,
+            min_price=float(min_price) if min_price is not None else None,
+            max_price=float(max_price) if max_price is not None else None,
+            in_stock=in_stock, on_sale=on_sale,
+        )
+        if np is not None:
+            return self._query_numpy(column, descending, **filters)
+        return self._query_python(column, descending, **filters)
+
+    def _query_numpy(self, sort_column, descending, *, category_ids, brand_code, min_price, max_price,
+                     in_stock, on_sale):
+        # Zero-copy views over the array buffers.
+        col = {name: np.frombuffer(self.columns[name], dtype=code) for name, code in COLUMNS}
+        mask = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+
+        if category_ids is not None:
+            mask &= np.isin(col['category'], np.fromiter(category_ids, dtype='i'))
+        if brand_code is not None:
+            mask &= col['brand'] == brand_code
+        if min_price is not None:
+            mask &= col['price'] >= min_price
+        if max_price is not None:
+            mask &= col['price'] <= max_price
+        if in_stock:
+            mask &= col['stock'] > 0
+        if on_sale:
+            mask &= col['discount'] > 0
+
+        matches = np.flatnonzero(mask)
+        keys = col[sort_column][matches]
+        order = np.argsort(-keys if descending else keys, kind='stable')
+        return col['ids'][matches[order]].tolist()
+
+    def _query_python(self, sort_column, descending, *, category_ids, brand_code, min_price, max_price,
+                      in_stock, on_sale):
+        c = self.columns
+        matches = [index for index, flag in enumerate(self.alive) if flag]
+
+        if category_ids is not None:
+            category = c['category']
+            matches = [i for i in matches if category[i] in category_ids]
+        if brand_code is not None:
+            brand = c['brand']
+            matches = [i for i in matches if brand[i] == brand_code]
+        if min_price is not None or max_price is not None:
+            price = c['price']
+            low = min_price if min_price is not None else float('-inf')
+            high = max_price if max_price is not None else float('inf')
+            matches = [i for i in matches if low <= price[i] <= high]
+        if in_stock:
+            stock = c['stock']
+            matches = [i for i in matches if stock[i] > 0]
+        if on_sale:
+            discount = c['discount']
+            matches = [i for i in matches if discount[i] > 0]
+
+        keys = c[sort_column]
+        sign = -1 if descending else 1
+        matches.sort(key=lambda i: sign * keys[i])
+        ids = c['ids']
+        return [ids[i] for i in matches]
+
+
+class CatalogEngine:
+    """Per-process owner of the snapshot; thread-safe."""
+
+    def __init__(self):
+        self.snapshot = None
+        self.seq = None
+        self.oversized_at = None
+        self.loaded_at = 0
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return engine_setting('ENABLED')
+
+    def reset(self):
+        with self.lock:
+            self.snapshot = self.seq = self.oversized_at = None
+
+    def _sync(self):
+        """Bring the snapshot up to date with the change log; caller holds the lock."""
+        current = change_seq()
+        if self.snapshot is not None and time.monotonic() - self.loaded_at > engine_setting('MAX_AGE'):
+            self.snapshot = None
+        if self.snapshot is not None and self.seq != current:
+            ids = pending_changes(self.seq, current)
+            if ids is None:
+                self.snapshot = None
+            else:
+                self.snapshot.refresh(ids)
+                self.seq = current
+        if self.snapshot is None and self.oversized_at != current:
+            self._load(current)
+        return self.snapshot
+
+    def _load(self, current):
+        limit = engine_setting('MAX_PRODUCTS')
+        snapshot = CatalogSnapshot()
+        for count, row in enumerate(_snapshot_rows(Product.objects.all()).iterator(chunk_size=5000), start=1):
+            if count > limit:
+                self.snapshot, self.oversized_at = None, current
+                return
+            snapshot.upsert(row)
+        self.snapshot, self.seq, self.oversized_at = snapshot, current, None
+        self.loaded_at = time.monotonic()
+
+    def search(self, **filters):
+        """Sorted ids for the filters, or None when the engine cannot answer."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            snapshot = self._sync()
+            if snapshot is None:
+                return None
+            return snapshot.query(**filters)
+
+    def get_page(self, page, per_page, **filters):
+        """A Page whose object list is fetched by id, or None."""
+        ids = self.search(**filters)
+        if ids is None:
+            return None
+        page_obj = Paginator(ids, per_page).get_page(page)
+        page_obj.object_list = ordered_products(list(page_obj.object_list))
+        return page_obj
+
+
+catalog_engine = CatalogEngine()
@@ -0,0 +1,257 @@
+"""
+Streaming catalog import/export (CSV, JSONL, XLSX).
+
+Rows are read lazily and upserted by SKU in batches with a single
+INSERT ... ON CONFLICT per batch, so memory use is bounded by the batch
+size rather than the size of the file.
+"""
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .catalog_engine import record_product_changes
+from .category_tree import recount_subtree_products
+from .listing_cache import bump_catalog_version
+from .models import Category, Product
+
+FIELDS = [
+    'sku', 'name', 'slug', 'category', 'description', 'short_description',
+    'price', 'discount_percentage', 'stock', 'brand', 'weight',
+    'is_active', 'is_featured', 'meta_title', 'meta_description',
+]
+REQUIRED_FIELDS = {'sku', 'name', 'category', 'price'}
+DECIMAL_FIELDS = {'price', 'discount_percentage', 'weight'}
+INTEGER_FIELDS = {'stock'}
+BOOLEAN_FIELDS = {'is_active', 'is_featured'}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'ha'}
+
+FORMATS = ('csv', 'jsonl', 'xlsx')
+
+
+class CatalogError(Exception):
+    """Raised for unreadable input or a missing optional dependency."""
+
+
+def detect_format(path, explicit=None):
+    """Return the catalog format from an explicit option or file extension."""
+    fmt = explicit or Path(str(path)).suffix.lstrip('.').lower()
+    if fmt == 'json':
+        fmt = 'jsonl'
+    if fmt not in FORMATS:
+        raise CatalogError(f'Unsupported format "{fmt}", use one of: {", ".join(FORMATS)}')
+    return fmt
+
+
+def _openpyxl():
+    try:
+        import openpyxl
+    except ImportError:
+        raise CatalogError('XLSX support requires openpyxl (pip install openpyxl)')
+    return openpyxl
+
+
+def read_rows(path, fmt):
+    """Yield catalog rows as dicts without loading the whole file."""
+    if fmt == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            yield from csv.DictReader(fh)
+    elif fmt == 'jsonl':
+        with open(path, encoding='utf-8') as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        workbook = _openpyxl().load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+            for values in rows:
+                yield dict(zip(header, values))
+        finally:
+            workbook.close()
+
+
+def write_rows(rows, target, fmt):
+    """Write an iterable of catalog rows to a path or open text stream."""
+    if fmt == 'xlsx':
+        workbook = _openpyxl().Workbook(write_only=True)
+        sheet = workbook.create_sheet('products')
+        sheet.append(FIELDS)
+        for row in rows:
+            values = (row[field] for field in FIELDS)
+            sheet.append([float(value) if isinstance(value, Decimal) else value for value in values])
+        workbook.save(target)
+        return
+
+    if fmt == 'csv':
+        writer = csv.DictWriter(target, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            target.write(json.dumps(row, default=str, ensure_ascii=False) + '\n')
+
+
+def export_rows(queryset=None, chunk_size=2000):
+    """
+    Stream products as export rows.
+    On PostgreSQL ``iterator()`` uses a server-side cursor.
+    """
+    queryset = queryset if queryset is not None else Product.objects.all()
+    columns = [field if field != 'category' else 'category__slug' for field in FIELDS]
+    for values in queryset.order_by('pk').values_list(*columns).iterator(chunk_size=chunk_size):
+        yield dict(zip(FIELDS, values))
+
+
+class CatalogImporter:
+    """
+    Upsert products by SKU in batches.
+
+    Categories are resolved from a map preloaded once; slugs for new
+    products are generated for the whole batch with two queries.
+    """
+
+    def __init__(self, batch_size=1000, create_categories=False):
+        self.batch_size = batch_size
+        self.create_categories = create_categories
+        self.categories = {}
+        for pk, slug, name in Category.objects.values_list('pk', 'slug', 'name'):
+            self.categories[slug] = pk
+            self.categories.setdefault(name.lower(), pk)
+
+        self.processed = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def run(self, rows):
+        """Import an iterable of row dicts. Returns number of upserted rows."""
+        started = time.monotonic()
+        batch = []
+        for line, row in enumerate(rows, start=2):
+            product = self._build(line, row)
+            if product is not None:
+                batch.append(product)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        if self.processed:
+            recount_subtree_products()
+            record_product_changes()
+        self.elapsed = time.monotonic() - started
+        return self.processed
+
+    def _build(self, line, row):
+        row = {key.strip(): value for key, value in row.items() if key and key.strip() in FIELDS}
+        missing = [field for field in REQUIRED_FIELDS if row.get(field) in (None, '')]
+        if missing:
+            self.errors.append((line, f'missing {", ".join(sorted(missing))}'))
+            return None
+
+        data = {}
+        try:
+            for field, value in row.items():
+                if field == 'category':
+                    continue
+                if value is None or value == '':
+                    if field in DECIMAL_FIELDS | INTEGER_FIELDS | BOOLEAN_FIELDS:
+                        continue
+                    value = ''
+                elif field in DECIMAL_FIELDS:
+                    value = Decimal(str(value))
+                elif field in INTEGER_FIELDS:
+                    value = int(value)
+                elif field in BOOLEAN_FIELDS:
+                    value = value if isinstance(value, bool) else str(value).strip().lower() in TRUE_VALUES
+                else:
+                    value = str(value).strip()
+                data[field] = value
+        except (InvalidOperation, ValueError) as e:
+            self.errors.append((line, f'invalid value: {e}'))
+            return None
+
+        category_id = self._category_id(str(row['category']).strip())
+        if category_id is None:
+            self.errors.append((line, f'unknown category "{row["category"]}"'))
+            return None
+
+        product = Product(category_id=category_id, **data)
+        product._import_fields = set(data) | {'category'}
+        return product
+
+    def _category_id(self, value):
+        category_id = self.categories.get(value) or self.categories.get(value.lower())
+        if category_id is None and self.create_categories and value:
+            category = Category.objects.create(name=value, slug=self._free_category_slug(value))
+            category_id = self.categories[category.slug] = self.categories[value.lower()] = category.pk
+        return category_id
+
+    def _free_category_slug(self, name):
+        base = slugify(name) or 'category'
+        slug, n = base, 1
+        while slug in self.categories:
+            n += 1
+            slug = f'{base}-{n}'
+        return slug
+
+    def _flush(self, products):
+        # Last row wins when a SKU repeats inside one batch.
+        products = list({product.sku: product for product in products}.values())
+        self._assign_slugs(products)
+
+        update_fields = set().union(*(product._import_fields for product in products))
+        update_fields = sorted(
+            ('category_id' if field == 'category' else field)
+            for field in update_fields - {'sku', 'slug'}
+        ) + ['updated_at']
+
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=['sku'],
+            update_fields=update_fields,
+        )
+        self.processed += len(products)
+        bump_catalog_version(*{product.category_id for product in products})
+
+    def _assign_slugs(self, products):
+        """Give new products unique slugs; existing SKUs keep theirs."""
+        existing = dict(
+            Product.objects.filter(sku__in=[p.sku for p in products]).values_list('sku', 'slug')
+        )
+        wanted = {}
+        for product in products:
+            if product.sku in existing:
+                product.slug = existing[product.sku]
+            else:
+                product.slug = slugify(product.slug or product.name)[:240] or slugify(product.sku) or 'product'
+                wanted.setdefault(product.slug, []).append(product)
+
+        if not wanted:
+            return
+
+        prefix_query = Q(slug__in=list(wanted))
+        for base in wanted:
+            prefix_query |= Q(slug__startswith=f'{base}-')
+        taken = set(Product.objects.filter(prefix_query).values_list('slug', flat=True))
+        taken.update(existing.values())
+
+        for base, group in wanted.items():
+            n = 1
+            for product in group:
+                slug = base
+                while slug in taken:
+                    n += 1
+                    slug = f'{base}-{n}'
+                product.slug = slug
+                taken.add(slug)
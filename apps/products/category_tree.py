@@ -0,0 +1,209 @@
+"""
+Materialized category tree.
+
+Every category stores its ancestor path (``0000001/0000004/``), its depth
+and the number of active products in its whole subtree. "Category and all
+descendants" is then one indexed ``path LIKE 'prefix%'`` range, and
+breadcrumbs are read from the path instead of walking ``parent`` one
+query per level.
+"""
+from django.core.cache import cache
+from django.db.models import Count, F, Value
+from django.db.models.functions import Concat, Substr
+
+SEGMENT_WIDTH = 7
+SEPARATOR = '/'
+
+TREE_VERSION_KEY = 'catalog:tree:version'
+DESCENDANTS_KEY = 'catalog:tree:{version}:descendants:{pk}'
+
+
+def path_segment(pk) -> str:
+    return f'{pk:0{SEGMENT_WIDTH}d}{SEPARATOR}'
+
+
+def path_ids(path) -> list:
+    """Category ids along a path, root first."""
+    return [int(segment) for segment in path.split(SEPARATOR) if segment]
+
+
+def tree_version() -> int:
+    version = cache.get(TREE_VERSION_KEY)
+    if version is None:
+        cache.add(TREE_VERSION_KEY, 1, None)
+        version = cache.get(TREE_VERSION_KEY, 1)
+    return version
+
+
+def bump_tree_version():
+    try:
+        cache.incr(TREE_VERSION_KEY)
+    except ValueError:
+        cache.add(TREE_VERSION_KEY, 2, None)
+
+
+def _category_model():
+    from .models import Category
+    return Category
+
+
+def compute_paths(nodes) -> dict:
+    """
+    Map ``pk -> path`` for ``(pk, parent_id)`` pairs.
+    A parent cycle is cut where the walk first revisits a node.
+    """
+    parents = dict(nodes)
+    paths = {}
+
+    for pk in parents:
+        chain, current = [], pk
+        while current is not None and current not in paths and current not in chain:
+            chain.append(current)
+            current = parents.get(current)
+
+        prefix = paths.get(current, '')
+        for node in reversed(chain):
+            prefix += path_segment(node)
+            paths[node] = prefix
+
+    return paths
+
+
+def rebuild_paths(category_model=None) -> int:
+    """Recompute every path and depth from ``parent``. Returns rows changed."""
+    category_model = category_model or _category_model()
+    rows = list(category_model.objects.values_list('pk', 'parent_id', 'path', 'depth'))
+    paths = compute_paths((pk, parent_id) for pk, parent_id, _, _ in rows)
+
+    changed = []
+    for pk, _, path, depth in rows:
+        new_path = paths[pk]
+        new_depth = len(path_ids(new_path)) - 1
+        if (path, depth) != (new_path, new_depth):
+            changed.append(category_model(pk=pk, path=new_path, depth=new_depth))
+
+    category_model.objects.bulk_update(changed, ['path', 'depth'], batch_size=500)
+    bump_tree_version()
+    return len(changed)
+
+
+def recount_subtree_products(category_model=None, product_model=None) -> int:
+    """
+    Recompute ``subtree_product_count`` with one grouped query.
+    Used after bulk writes that bypass model signals.
+    """
+    category_model = category_model or _category_model()
+    product_model = product_model or category_model._meta.get_field('products').related_model
+
+    direct = dict(
+        product_model.objects.filter(is_active=True)
+        .values_list('category_id')
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    rows = list(category_model.objects.values_list('pk', 'path', 'subtree_product_count'))
+
+    totals = {pk: 0 for pk, _, _ in rows}
+    for pk, path, _ in rows:
+        count = direct.get(pk, 0)
+        if count:
+            for ancestor_id in path_ids(path) or [pk]:
+                if ancestor_id in totals:
+                    totals[ancestor_id] += count
+
+    changed = [
+        category_model(pk=pk, subtree_product_count=totals[pk])
+        for pk, _, current in rows
+        if current != totals[pk]
+    ]
+    category_model.objects.bulk_update(changed, ['subtree_product_count'], batch_size=500)
+    return len(changed)
+
+
+def place_category(category, previous):
+    """
+    Store the path of a just-saved category and move its subtree.
+    ``previous`` is the stored ``(path, depth, subtree_product_count)``
+    before the save, or None for a new category.
+    """
+    Category = type(category)
+    parent_path = ''
+    if category.parent_id:
+        parent_path = Category.objects.filter(pk=category.parent_id).values_list('path', flat=True).first() or ''
+
+    path = parent_path + path_segment(category.pk)
+    depth = len(path_ids(path)) - 1
+    old_path, old_depth, subtree_count = previous or ('', 0, 0)
+    category._previous_path = old_path
+    if path == old_path:
+        return
+
+    Category.objects.filter(pk=category.pk).update(path=path, depth=depth)
+    if old_path:
+        Category.objects.filter(path__startswith=old_path).exclude(pk=category.pk).update(
+            path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+            depth=F('depth') + (depth - old_depth),
+        )
+        if subtree_count:
+            _shift_counts(path_ids(old_path)[:-1], path_ids(parent_path), subtree_count)
+
+    category.path, category.depth = path, depth
+    bump_tree_version()
+
+
+def shift_product_count(from_category_id, to_category_id, count=1):
+    """Move ``count`` active products between categories (either may be None)."""
+    ids = [pk for pk in (from_category_id, to_category_id) if pk is not None]
+    if not ids or from_category_id == to_category_id:
+        return
+    paths = dict(_category_model().objects.filter(pk__in=ids).values_list('pk', 'path'))
+    _shift_counts(
+        path_ids(paths.get(from_category_id, '')),
+        path_ids(paths.get(to_category_id, '')),
+        count,
+    )
+
+
+def _shift_counts(from_ids, to_ids, count):
+    Category = _category_model()
+    # Shared ancestors keep their totals.
+    decrement = set(from_ids) - set(to_ids)
+    increment = set(to_ids) - set(from_ids)
+    if decrement:
+        Category.objects.filter(pk__in=decrement, subtree_product_count__gte=count).update(
+            subtree_product_count=F('subtree_product_count') - count
+        )
+    if increment:
+        Category.objects.filter(pk__in=increment).update(
+            subtree_product_count=F('subtree_product_count') + count
+        )
+
+
+def descendant_ids(category) -> frozenset:
+    """Ids of the category and all its descendants, cached per tree version."""
+    key = DESCENDANTS_KEY.format(version=tree_version(), pk=category.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(
+            type(category).objects.filter(path__startswith=category.path).values_list('pk', flat=True)
+        ) if category.path else frozenset([category.pk])
+        cache.set(key, ids, None)
+    return ids
+
+
+def build_tree(categories):
+    """
+    Attach ``tree_children`` to each category of a depth-ordered list and
+    return the roots. The whole tree comes from a single query.
+    """
+    by_id = {}
+    roots = []
+    for category in categories:
+        category.tree_children = []
+        by_id[category.pk] = category
+        parent = by_id.get(category.parent_id)
+        if parent is not None:
+            parent.tree_children.append(category)
+        elif category.parent_id is None:
+            roots.append(category)
+    return roots
@@ -0,0 +1,150 @@
+"""
+Facet counts for the product listing.
+
+Counts for every category, brand, price bucket and availability flag are
+computed from one narrow query over the products matching the non-facet
+filters (search, name), followed by a single in-memory pass. Each facet
+is counted with all *other* active facet filters applied, so a count
+shows how many products selecting that value would yield.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+
+from .category_tree import path_ids, tree_version
+from .listing_cache import GLOBAL_SCOPE, catalog_version, listing_cache_setting
+from .models import Category
+
+FACETS_KEY = 'catalog:facets:{signature}'
+CATEGORY_PATHS_KEY = 'catalog:tree:{version}:paths'
+
+# Upper bounds in UZS; the last bucket is open-ended.
+PRICE_BUCKETS = (10000, 50000, 100000, 500000, None)
+
+
+def category_paths() -> dict:
+    """``{category_id: [ancestor ids..., id]}`` for the whole tree, cached."""
+    key = CATEGORY_PATHS_KEY.format(version=tree_version())
+    paths = cache.get(key)
+    if paths is None:
+        paths = {pk: path_ids(path) or [pk] for pk, path in Category.objects.values_list('pk', 'path')}
+        cache.set(key, paths, None)
+    return paths
+
+
+def price_buckets():
+    lower = Decimal(0)
+    for upper in PRICE_BUCKETS:
+        yield lower, (Decimal(upper) if upper is not None else None)
+        if upper is not None:
+            lower = Decimal(upper)
+
+
+def _bucket_index(price):
+    for index, upper in enumerate(PRICE_BUCKETS):
+        if upper is None or price < upper:
+            return index
+    return len(PRICE_BUCKETS) - 1
+
+
+class FacetCounts:
+    """
+    Facet counts for one filter combination.
+
+    Keyword arguments are the active facet filters; ``queryset`` must
+    already carry the non-facet ones, which ``extra_signature`` describes
+    for the cache key.
+    """
+
+    def __init__(self, queryset, *, category=None, brand='', min_price=None, max_price=None,
+                 in_stock=False, on_sale=False, extra_signature=None):
+        self.queryset = queryset
+        self.category = category
+        self.brand = (brand or '').strip().lower()
+        self.min_price = min_price
+        self.max_price = max_price
+        self.in_stock = bool(in_stock)
+        self.on_sale = bool(on_sale)
+
+        signature = json.dumps([
+            category.pk if category else None, self.brand, str(min_price), str(max_price),
+            self.in_stock, self.on_sale, extra_signature, catalog_version(GLOBAL_SCOPE), tree_version(),
+        ], sort_keys=True, default=str)
+        self.key = FACETS_KEY.format(signature=hashlib.sha1(signature.encode()).hexdigest())
+
+    def get(self) -> dict:
+        """Counts from cache, computing and storing them on a miss."""
+        enabled = listing_cache_setting('ENABLED')
+        counts = cache.get(self.key) if enabled else None
+        if counts is None:
+            counts = self.compute()
+            if enabled:
+                cache.set(self.key, counts, listing_cache_setting('TIMEOUT'))
+        return counts
+
+    def compute(self) -> dict:
+        paths = category_paths()
+        category_id = self.category.pk if self.category else None
+
+        total = 0
+        categories = {}
+        brands = {}
+        brand_labels = {}
+        buckets = [0] * len(PRICE_BUCKETS)
+        in_stock = 0
+        on_sale = 0
+
+        rows = self.queryset.order_by().values_list('category_id', 'brand', 'price', 'discount_percentage', 'stock')
+        for product_category_id, brand, price, discount, stock in rows.iterator(chunk_size=5000):
+            brand_key = (brand or '').strip().lower()
+            ancestors = paths.get(product_category_id, [product_category_id])
+
+            failed = []
+            if category_id is not None and category_id not in ancestors:
+                failed.append('category')
+            if self.brand and brand_key != self.brand:
+                failed.append('brand')
+            if (self.min_price is not None and price < self.min_price) or \
+                    (self.max_price is not None and price > self.max_price):
+                failed.append('price')
+            if self.in_stock and stock <= 0:
+                failed.append('in_stock')
+            if self.on_sale and discount <= 0:
+                failed.append('on_sale')
+
+            # A row failing two filters cannot appear in any facet count.
+            if len(failed) > 1:
+                continue
+            only_failed = failed[0] if failed else None
+
+            if only_failed in (None, 'category'):
+                for ancestor_id in ancestors:
+                    categories[ancestor_id] = categories.get(ancestor_id, 0) + 1
+            if only_failed in (None, 'brand') and brand_key:
+                brands[brand_key] = brands.get(brand_key, 0) + 1
+                brand_labels.setdefault(brand_key, brand.strip())
+            if only_failed in (None, 'price'):
+                buckets[_bucket_index(price)] += 1
+            if only_failed in (None, 'in_stock') and stock > 0:
+                in_stock += 1
+            if only_failed in (None, 'on_sale') and discount > 0:
+                on_sale += 1
+            if only_failed is None:
+                total += 1
+
+        return {
+            'total': total,
+            'categories': categories,
+            'brands': sorted(
+                ({'value': brand_labels[key], 'count': count} for key, count in brands.items()),
+                key=lambda b: (-b['count'], b['value'].lower()),
+            ),
+            'price_buckets': [
+                {'min': lower, 'max': upper, 'count': count}
+                for (lower, upper), count in zip(price_buckets(), buckets)
+            ],
+            'in_stock': in_stock,
+            'on_sale': on_sale,
+        }
@@ -16,6 +16,7 @@ class ProductFilter(django_filters.FilterSet):
 
     category = django_filters.ModelChoiceFilter(
         queryset=Category.objects.filter(is_active=True),
+        method='filter_category',
         label='Category'
     )
 
@@ -35,6 +36,12 @@ class ProductFilter(django_filters.FilterSet):
         model = Product
         fields = ['category', 'brand']
 
+    def filter_category(self, queryset, name, value):
+        """Filter products in the category or any of its subcategories."""
+        if value:
+            return queryset.filter(value.subtree_q())
+        return queryset
+
     def filter_in_stock(self, queryset, name, value):
         """Filter products that are in stock."""
         if value:
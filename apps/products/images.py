@@ -0,0 +1,127 @@
+"""
+Responsive image derivatives for product and category images.
+Generates resized AVIF/WebP/JPEG copies stored under content-hash names.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401  (registers the AVIF plugin on older Pillow)
+except ImportError:
+    pass
+
+
+DERIVATIVES_DIR = 'derivatives'
+
+# format -> (Pillow format name, MIME type, encoder options)
+FORMAT_OPTIONS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 50}),
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def derivative_widths():
+    """Return configured derivative widths in ascending order."""
+    return sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', [320, 640, 1024]))
+
+
+def derivative_formats():
+    """Return configured derivative formats the installed Pillow can encode."""
+    Image.init()
+    formats = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ['avif', 'webp', 'jpeg'])
+    return [fmt for fmt in formats if fmt in FORMAT_OPTIONS and FORMAT_OPTIONS[fmt][0] in Image.SAVE]
+
+
+def content_hash(data: bytes) -> str:
+    """Short SHA-256 digest used to name derivatives."""
+    return hashlib.sha256(data).hexdigest()[:24]
+
+
+def derivative_path(digest: str, width: int, fmt: str) -> str:
+    """Storage path of a single derivative."""
+    return f"{DERIVATIVES_DIR}/{digest[:2]}/{digest}-{width}.{fmt}"
+
+
+def _encode(image, fmt):
+    """Encode a Pillow image into bytes for the given derivative format."""
+    pil_format, _, options = FORMAT_OPTIONS[fmt]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode in ('RGBA', 'LA'):
+            background.paste(image, mask=image.getchannel('A'))
+        else:
+            background.paste(image.convert('RGB'))
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_derivatives(name: str, storage=None) -> dict:
+    """
+    Generate derivatives for the stored image `name`.
+
+    Derivatives are named after the content hash of the original, so
+    re-processing the same bytes (or the same file uploaded twice) reuses
+    the already stored files.
+
+    Returns:
+        Dict with source name, hash, original size and a
+        ``{format: {width: path}}`` mapping suitable for a JSONField.
+    """
+    storage = storage or default_storage
+
+    with storage.open(name, 'rb') as fh:
+        data = fh.read()
+
+    digest = content_hash(data)
+
+    with Image.open(BytesIO(data)) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+
+        orig_width, orig_height = original.size
+        widths = [w for w in derivative_widths() if w < orig_width] or [orig_width]
+
+        formats = {}
+        for width in widths:
+            height = max(1, round(orig_height * width / orig_width))
+            resized = original if width == orig_width else original.resize((width, height), Image.LANCZOS)
+
+            for fmt in derivative_formats():
+                path = derivative_path(digest, width, fmt)
+                if not storage.exists(path):
+                    storage.save(path, ContentFile(_encode(resized, fmt)))
+                formats.setdefault(fmt, {})[str(width)] = path
+
+    return {
+        'source': name,
+        'hash': digest,
+        'width': orig_width,
+        'height': orig_height,
+        'formats': formats,
+    }
+
+
+def needs_derivatives(instance) -> bool:
+    """Whether the instance's image has no up-to-date derivatives."""
+    if not instance.image:
+        return False
+    return (instance.derivatives or {}).get('source') != instance.image.name
+
+
+def srcset(derivatives: dict, fmt: str, storage=None) -> str:
+    """Build a ``srcset`` attribute value for one derivative format."""
+    storage = storage or default_storage
+    paths = (derivatives or {}).get('formats', {}).get(fmt, {})
+    return ', '.join(
+        f"{storage.url(path)} {width}w"
+        for width, path in sorted(paths.items(), key=lambda item: int(item[0]))
+    )
@@ -1,12 +1,26 @@
 """
 Product like views for handling AJAX like/unlike actions.
+
+`Product.likes_count` is kept by the ProductLike signals with F()
+updates, and each user's liked product ids are read as one set with an
+indexed query, so a page of cards needs one query to show heart state.
 """
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.shortcuts import get_object_or_404
 from .models import Product, ProductLike
 
+MAX_STATUS_IDS = 200
+
+
+def liked_product_ids(user):
+    """Ids of products the user likes, in one query."""
+    if not user.is_authenticated:
+        return frozenset()
+    return frozenset(ProductLike.objects.filter(user=user).values_list('product_id', flat=True))
+
 
 @login_required
 @require_POST
@@ -16,19 +30,23 @@ def toggle_like(request, product_id):
     Returns JSON with like status and count.
     """
     product = get_object_or_404(Product, id=product_id, is_active=True)
-    
-    try:
-        like = ProductLike.objects.get(product=product, user=request.user)
-        like.delete()
+
+    deleted, _ = ProductLike.objects.filter(product=product, user=request.user).delete()
+    if deleted:
         liked = False
         message = 'Product unliked'
-    except ProductLike.DoesNotExist:
-        ProductLike.objects.create(product=product, user=request.user)
+    else:
+        try:
+            with transaction.atomic():
+                ProductLike.objects.create(product=product, user=request.user)
+        except IntegrityError:
+            # A concurrent request liked it first.
+            pass
         liked = True
         message = 'Product liked'
-    
-    likes_count = product.likes.count()
-    
+
+    likes_count = Product.objects.filter(pk=product.pk).values_list('likes_count', flat=True).first()
+
     return JsonResponse({
         'success': True,
         'liked': liked,
@@ -43,11 +61,30 @@ def get_like_status(request, product_id):
     Get like status for a product.
     """
     product = get_object_or_404(Product, id=product_id, is_active=True)
-    liked = ProductLike.objects.filter(product=product, user=request.user).exists()
-    likes_count = product.likes.count()
-    
+
     return JsonResponse({
         'success': True,
-        'liked': liked,
-        'likes_count': likes_count
+        'liked': product.pk in liked_product_ids(request.user),
+        'likes_count': product.likes_count
+    })
+
+
+@login_required
+def get_like_statuses(request):
+    """
+    Like state for many products at once: ``?ids=1,2,3``.
+    One query for the counts and one for the liked set.
+    """
+    ids = []
+    for value in request.GET.get('ids', '').split(',')[:MAX_STATUS_IDS]:
+        if value.strip().isdigit():
+            ids.append(int(value))
+
+    counts = dict(Product.objects.filter(pk__in=ids, is_active=True).values_list('pk', 'likes_count'))
+    liked = liked_product_ids(request.user)
+
+    return JsonResponse({
+        'success': True,
+        'liked': sorted(pk for pk in counts if pk in liked),
+        'likes_count': {str(pk): count for pk, count in counts.items()},
     })
@@ -0,0 +1,215 @@
+"""
+Result cache for the product listing page.
+
+Entries are keyed on the normalised filter parameters, sort, page,
+language and currency, and embed a per-category version counter: any
+product change bumps the counter of its category, that category's
+ancestors and the catalog-wide one, which orphans every cached page that
+could contain it.
+
+Hit/miss counters are bucketed by which filters are set and the sort, not
+by their values, so the set of counters is fixed and bounded: the dashboard
+reads every bucket instead of tracking a list of labels.
+"""
+import hashlib
+import json
+from itertools import combinations
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Case, IntegerField, When
+
+from .category_tree import path_ids
+from .models import Category, Product
+
+VERSION_KEY = 'catalog:version:{scope}'
+LISTING_KEY = 'catalog:listing:{signature}'
+STATS_KEY = 'catalog:stats:{kind}:{label}'
+
+GLOBAL_SCOPE = 'all'
+HOME_SCOPE = 'home'
+
+FILTER_PARAMS = ('name', 'min_price', 'max_price', 'category', 'brand', 'in_stock', 'on_sale', 'search')
+CASE_INSENSITIVE_PARAMS = {'name', 'brand', 'search'}
+SORT_OPTIONS = ('-created_at', 'price_low', 'price_high', 'popular', 'rating')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    # Deep pages and free-text searches rarely repeat; keep them out of the cache.
+    'MAX_PAGE': 5,
+    'CACHE_SEARCH': False,
+    'STATS_TIMEOUT': 60 * 60 * 24 * 7,
+}
+
+
+def listing_cache_setting(name):
+    return getattr(settings, 'CATALOG_LISTING_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def catalog_version(scope=GLOBAL_SCOPE) -> int:
+    """Current version of a category (or of the whole catalog)."""
+    key = VERSION_KEY.format(scope=scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def _bump(scope):
+    key = VERSION_KEY.format(scope=scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 2, None)
+
+
+def bump_catalog_version(*category_ids):
+    """
+    Invalidate cached listings for the given categories, their ancestors
+    (whose listings include subcategory products) and the whole catalog.
+    """
+    scopes = {GLOBAL_SCOPE}
+    category_ids = {pk for pk in category_ids if pk is not None}
+    if category_ids:
+        scopes |= category_ids
+        for path in Category.objects.filter(pk__in=category_ids).values_list('path', flat=True):
+            scopes.update(path_ids(path))
+    for scope in scopes:
+        _bump(scope)
+
+
+def bump_home_version():
+    """Invalidate the cached home page (featured products, top categories)."""
+    _bump(HOME_SCOPE)
+
+
+def normalize_params(params) -> dict:
+    """Keep only listing filters, drop empty values and normalise case."""
+    normalized = {}
+    for name in FILTER_PARAMS:
+        value = (params.get(name) or '').strip()
+        if not value:
+            continue
+        normalized[name] = value.lower() if name in CASE_INSENSITIVE_PARAMS else value
+    return normalized
+
+
+def ordered_products(ids):
+    """Lazy queryset returning `ids` in the given order."""
+    if not ids:
+        return Product.objects.none()
+    ordering = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(ids)], output_field=IntegerField())
+    return (
+        Product.objects.filter(pk__in=ids)
+        .select_related('category')
+        .prefetch_related('images')
+        .order_by(ordering)
+    )
+
+
+def stats_label(filter_names, sort):
+    """Hit-rate bucket: the names of the filters in use and the sort."""
+    return '&'.join(sorted(filter_names) + [f'sort={sort}'])
+
+
+def _stats_labels():
+    return [
+        stats_label(names, sort)
+        for size in range(len(FILTER_PARAMS) + 1)
+        for names in combinations(FILTER_PARAMS, size)
+        for sort in SORT_OPTIONS
+    ]
+
+
+def _stats_keys():
+    return [STATS_KEY.format(kind=kind, label=label) for label in _stats_labels() for kind in ('hit', 'miss')]
+
+
+def hit_rates():
+    """Per-combination hit/miss counters, most requested first."""
+    counters = cache.get_many(_stats_keys())
+
+    stats = []
+    for label in _stats_labels():
+        hits = counters.get(STATS_KEY.format(kind='hit', label=label), 0)
+        misses = counters.get(STATS_KEY.format(kind='miss', label=label), 0)
+        total = hits + misses
+        if not total:
+            continue
+        stats.append({
+            'combination': label,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3),
+        })
+    return sorted(stats, key=lambda s: s['hits'] + s['misses'], reverse=True)
+
+
+def reset_hit_rates():
+    cache.delete_many(_stats_keys())
+
+
+class ListingCache:
+    """
+    Cache of one listing page: the product ids on the page and the total count.
+    """
+
+    def __init__(self, params, sort, page, *, per_page, category_id=None, language='', currency=''):
+        self.params = normalize_params(params)
+        self.sort = sort
+        self.per_page = per_page
+        try:
+            self.page = max(int(page or 1), 1)
+        except (TypeError, ValueError):
+            self.page = 1
+
+        self.enabled = (
+            listing_cache_setting('ENABLED')
+            and self.page <= listing_cache_setting('MAX_PAGE')
+            and ('search' not in self.params or listing_cache_setting('CACHE_SEARCH'))
+        )
+
+        self.label = stats_label(self.params, sort)
+
+        version = catalog_version(category_id if category_id is not None else GLOBAL_SCOPE)
+        signature = json.dumps(
+            [self.params, sort, self.page, per_page, language, currency, version], sort_keys=True
+        )
+        self.signature = hashlib.sha1(signature.encode()).hexdigest()
+        self.key = LISTING_KEY.format(signature=self.signature)
+
+    @property
+    def timeout(self):
+        return listing_cache_setting('TIMEOUT')
+
+    def get_page(self):
+        """Return a Page rebuilt from cache, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        cached = cache.get(self.key)
+        self._record('hit' if cached is not None else 'miss')
+        if cached is None:
+            return None
+
+        page_obj = Paginator(range(cached['count']), self.per_page).get_page(self.page)
+        page_obj.object_list = ordered_products(cached['ids'])
+        return page_obj
+
+    def set_page(self, page_obj):
+        if not self.enabled:
+            return
+        ids = [product.pk for product in page_obj.object_list]
+        cache.set(self.key, {'ids': ids, 'count': page_obj.paginator.count}, self.timeout)
+
+    def _record(self, kind):
+        key = STATS_KEY.format(kind=kind, label=self.label)
+        if not cache.add(key, 1, listing_cache_setting('STATS_TIMEOUT')):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Expired between add() and incr().
+                cache.add(key, 1, listing_cache_setting('STATS_TIMEOUT'))
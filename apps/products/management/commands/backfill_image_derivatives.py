@@ -0,0 +1,72 @@
+"""
+Generate responsive derivatives for images uploaded before the pipeline existed.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.products.images import build_derivatives
+from apps.products.models import Category, ProductImage
+
+
+def _process(name):
+    """Worker entry point: returns (name, derivatives, error)."""
+    try:
+        return name, build_derivatives(name), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/AVIF/JPEG derivatives for existing product and category images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows saved per UPDATE')
+        parser.add_argument('--force', action='store_true', help='Regenerate up-to-date derivatives too')
+
+    def handle(self, *args, **options):
+        for model in (ProductImage, Category):
+            self._backfill(model, options['workers'], options['batch_size'], options['force'])
+
+    def _backfill(self, model, workers, batch_size, force):
+        rows = (
+            model.objects.exclude(image='').exclude(image__isnull=True)
+            .values_list('pk', 'image', 'derivatives')
+        )
+        pending = {}
+        for pk, name, derivatives in rows.iterator():
+            if force or (derivatives or {}).get('source') != name:
+                pending.setdefault(name, []).append(pk)
+
+        label = model._meta.verbose_name_plural
+        if not pending:
+            self.stdout.write(f'{label}: nothing to do.')
+            return
+
+        self.stdout.write(f'{label}: processing {len(pending)} images with {workers} workers...')
+
+        # Forked workers must not inherit open database sockets.
+        connections.close_all()
+
+        done, failed, batch = 0, 0, []
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            for name, derivatives, error in pool.map(_process, list(pending), chunksize=16):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'  {name}: {error}')
+                    continue
+
+                batch.extend(model(pk=pk, derivatives=derivatives) for pk in pending[name])
+                done += 1
+                if len(batch) >= batch_size:
+                    model.objects.bulk_update(batch, ['derivatives'])
+                    batch = []
+
+        if batch:
+            model.objects.bulk_update(batch, ['derivatives'])
+
+        self.stdout.write(self.style.SUCCESS(f'{label}: {done} processed, {failed} failed.'))
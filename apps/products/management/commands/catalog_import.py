@@ -0,0 +1,42 @@
+"""
+Bulk product catalog import from CSV, JSONL or XLSX.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.products.catalog_io import CatalogError, CatalogImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Upsert products by SKU from a CSV/JSONL/XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file')
+        parser.add_argument('--format', choices=['csv', 'jsonl', 'xlsx'], help='Override format detection')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per upsert statement')
+        parser.add_argument('--create-categories', action='store_true', help='Create unknown categories')
+        parser.add_argument('--atomic', action='store_true', help='Roll back everything on any failure')
+
+    def handle(self, *args, **options):
+        try:
+            fmt = detect_format(options['path'], options['format'])
+            importer = CatalogImporter(
+                batch_size=options['batch_size'],
+                create_categories=options['create_categories'],
+            )
+            rows = read_rows(options['path'], fmt)
+            if options['atomic']:
+                with transaction.atomic():
+                    importer.run(rows)
+            else:
+                importer.run(rows)
+        except (CatalogError, OSError) as e:
+            raise CommandError(str(e))
+
+        for line, error in importer.errors:
+            self.stderr.write(f'  line {line}: {error}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{importer.processed} products upserted, {len(importer.errors)} rows skipped '
+            f'in {importer.elapsed:.1f}s ({importer.throughput:.0f} rows/s).'
+        ))
@@ -0,0 +1,119 @@
+"""
+Import a folder of product photos, matching each file to a product by name.
+Replaces the old scripts/process_uploaded_images.py nested-loop matcher.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import django
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.products.media_import import (
+    IMAGE_EXTENSIONS, ProductNameIndex, init_worker, match_file,
+)
+from apps.products.models import Product, ProductImage
+
+
+def _init_worker(index):
+    django.setup()
+    init_worker(index)
+
+
+def _store(path, digest):
+    """Copy a file into media storage under its content hash."""
+    name = f"products/{digest}{Path(path).suffix.lower()}"
+    if default_storage.exists(name):
+        return name
+    with open(path, 'rb') as fh:
+        return default_storage.save(name, File(fh))
+
+
+class Command(BaseCommand):
+    help = 'Import product images from a folder, matching files to products by name'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Folder with image files (searched recursively)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Matching processes')
+        parser.add_argument('--io-threads', type=int, default=8, help='Threads copying files into storage')
+        parser.add_argument('--min-score', type=float, default=0.3, help='Minimum match score')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT')
+        parser.add_argument('--dry-run', action='store_true', help='Only report matches')
+        parser.add_argument('--skip-derivatives', action='store_true', help='Do not generate derivatives afterwards')
+
+    def handle(self, *args, **options):
+        source = Path(options['source'])
+        if not source.is_dir():
+            raise CommandError(f'{source} is not a directory')
+
+        started = time.monotonic()
+        files = sorted(p for p in source.rglob('*') if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS)
+        if not files:
+            self.stdout.write(f'No images found in {source}.')
+            return
+
+        index = ProductNameIndex(Product.objects.values_list('id', 'name').iterator())
+        known_hashes = set(
+            ProductImage.objects.exclude(derivatives__hash=None).values_list('derivatives__hash', flat=True)
+        )
+        products_with_images = set(ProductImage.objects.values_list('product_id', flat=True).distinct())
+
+        self.stdout.write(
+            f'Matching {len(files)} files against {len(index.names)} products with {options["workers"]} workers...'
+        )
+
+        # Forked workers must not inherit open database sockets.
+        connections.close_all()
+
+        matched, unmatched, duplicates = [], [], 0
+        with ProcessPoolExecutor(
+                max_workers=options['workers'], initializer=_init_worker, initargs=(index,)
+        ) as pool:
+            for path, digest, product_id, score in pool.map(match_file, files, chunksize=64):
+                if digest in known_hashes:
+                    duplicates += 1
+                elif product_id is None or score < options['min_score']:
+                    unmatched.append(path)
+                else:
+                    known_hashes.add(digest)
+                    matched.append((path, digest, product_id, score))
+
+        if options['dry_run']:
+            for path, _, product_id, score in matched:
+                self.stdout.write(f'  {Path(path).name} -> {index.names[product_id]} ({score:.2f})')
+        else:
+            self._save(matched, products_with_images, options)
+
+        for path in unmatched:
+            self.stdout.write(f'  unmatched: {path}')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(matched)} matched, {len(unmatched)} unmatched, {duplicates} duplicates '
+            f'in {elapsed:.1f}s ({len(files) / max(elapsed, 1e-6):.0f} files/s).'
+        ))
+
+        if matched and not options['dry_run'] and not options['skip_derivatives']:
+            call_command('backfill_image_derivatives', workers=options['workers'], stdout=self.stdout)
+
+    def _save(self, matched, products_with_images, options):
+        with ThreadPoolExecutor(max_workers=options['io_threads']) as pool:
+            names = list(pool.map(lambda m: _store(m[0], m[1]), matched))
+
+        images = []
+        for (_, digest, product_id, _), name in zip(matched, names):
+            is_primary = product_id not in products_with_images
+            products_with_images.add(product_id)
+            images.append(ProductImage(
+                product_id=product_id,
+                image=name,
+                is_primary=is_primary,
+                derivatives={'hash': digest},
+            ))
+
+        ProductImage.objects.bulk_create(images, batch_size=options['batch_size'])
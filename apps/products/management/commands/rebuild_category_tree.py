@@ -0,0 +1,28 @@
+"""
+Rebuild the materialized category tree from the parent links.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.products.category_tree import rebuild_paths, recount_subtree_products
+from apps.products.listing_cache import bump_catalog_version, bump_home_version
+
+
+class Command(BaseCommand):
+    help = 'Recompute category paths, depths and subtree product counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--counts-only', action='store_true', help='Only recount subtree products')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            paths = 0 if options['counts_only'] else rebuild_paths()
+            counts = recount_subtree_products()
+
+        if paths or counts:
+            bump_catalog_version()
+            bump_home_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{paths} category paths and {counts} subtree counts updated.'
+        ))
@@ -0,0 +1,135 @@
+"""
+Bulk media import: match image files to products by name.
+
+Product names are tokenised into an inverted index so each file is only
+scored against the handful of products that share a rare token with it,
+instead of against the whole catalogue.
+"""
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif'}
+
+# Filename words in English/Uzbek that describe the same product group.
+KEYWORD_GROUPS = {
+    'non': ['bread', 'non', 'oq', 'qora', 'bulka'],
+    'sut': ['milk', 'sut', 'qatiq', 'yogurt'],
+    'gosht': ['meat', 'gosht', 'mol', 'qoy', 'tovuq', 'baliq', 'fish', 'chicken', 'beef', 'lamb'],
+    'meva': ['fruit', 'meva', 'olma', 'apple', 'banan', 'banana', 'apelsin', 'orange', 'uzum', 'grape'],
+    'sabzavot': ['vegetable', 'sabzi', 'pomidor', 'tomato', 'bodring', 'cucumber', 'qalampir', 'pepper'],
+    'don': ['grain', 'guruch', 'rice', 'makaron', 'pasta', 'loviya', 'bean', 'noxat'],
+    'taom': ['dish', 'osh', 'plov', 'lagmon', 'manti', 'somsa', 'shashlik', 'kabob', 'kebab', 'dumpling'],
+    'ichimlik': ['drink', 'cola', 'pepsi', 'fanta', 'sprite', 'juice'],
+    'shirinlik': ['cake', 'tort', 'sweet', 'candy', 'shirinlik'],
+    'pishloq': ['cheese', 'pishloq'],
+    'sariyog': ['butter', 'sariyog'],
+    'tuxum': ['egg', 'tuxum'],
+}
+WORD_GROUP = {word: group for group, words in KEYWORD_GROUPS.items() for word in words}
+
+PREFIX_LENGTH = 4
+MAX_CANDIDATES = 50
+# Tokens shared by more than this share of products carry no signal.
+MAX_DOCUMENT_FREQUENCY = 0.05
+
+
+def clean_name(text: str) -> str:
+    """Lowercase, drop apostrophes and replace digits/punctuation with spaces."""
+    text = re.sub(r"[‘’'`ʻʼ]", '', text.lower())
+    return re.sub(r'[^a-zа-яё]+', ' ', text).strip()
+
+
+def tokenize(text: str) -> set:
+    """Index keys for a name: words, word prefixes and keyword groups."""
+    keys = set()
+    for word in clean_name(text).split():
+        if len(word) < 2:
+            continue
+        keys.add(word)
+        if len(word) > PREFIX_LENGTH:
+            keys.add('p:' + word[:PREFIX_LENGTH])
+        if word in WORD_GROUP:
+            keys.add('g:' + WORD_GROUP[word])
+    return keys
+
+
+class ProductNameIndex:
+    """
+    Inverted index from name tokens to product ids.
+    Picklable, so it can be shipped once to each worker process.
+    """
+
+    def __init__(self, products):
+        self.names = {}
+        self.postings = defaultdict(list)
+
+        for product_id, name in products:
+            self.names[product_id] = name
+            for key in tokenize(name):
+                self.postings[key].append(product_id)
+
+        total = max(len(self.names), 1)
+        max_df = max(int(total * MAX_DOCUMENT_FREQUENCY), 20)
+        self.idf = {
+            key: math.log(total / len(ids))
+            for key, ids in self.postings.items()
+            if len(ids) <= max_df
+        }
+        self.postings = {key: ids for key, ids in self.postings.items() if key in self.idf}
+
+    def candidates(self, text: str, limit: int = MAX_CANDIDATES):
+        """Product ids sharing the most informative tokens with `text`."""
+        weights = Counter()
+        for key in tokenize(text):
+            for product_id in self.postings.get(key, ()):
+                weights[product_id] += self.idf[key]
+        return [product_id for product_id, _ in weights.most_common(limit)]
+
+    def best_match(self, filename: str):
+        """Return (product_id, score) of the best candidate, or (None, 0)."""
+        name = clean_name(Path(filename).stem)
+        name_groups = {WORD_GROUP[w] for w in name.split() if w in WORD_GROUP}
+
+        best_id, best_score = None, 0.0
+        for product_id in self.candidates(name):
+            product_name = clean_name(self.names[product_id])
+            score = SequenceMatcher(None, name, product_name).ratio()
+
+            if product_name and product_name in name:
+                score += 0.5
+
+            product_groups = {WORD_GROUP[w] for w in product_name.split() if w in WORD_GROUP}
+            score += 0.3 * len(name_groups & product_groups)
+
+            if score > best_score:
+                best_id, best_score = product_id, score
+
+        return best_id, best_score
+
+
+def file_digest(path, chunk_size=1 << 20) -> str:
+    """Content hash compatible with image derivative naming."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:24]
+
+
+_worker_index = None
+
+
+def init_worker(index):
+    """Process pool initializer: keep one index copy per worker."""
+    global _worker_index
+    _worker_index = index
+
+
+def match_file(path):
+    """Worker entry point: hash and match one file."""
+    product_id, score = _worker_index.best_match(path)
+    return str(path), file_digest(path), product_id, score
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-19 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='image derivatives'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='image derivatives'),
+        ),
+    ]
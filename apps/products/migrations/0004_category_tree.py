@@ -0,0 +1,38 @@
+# Generated by Django 4.2.9 on 2026-10-19 14:36
+
+from django.db import migrations, models
+
+from apps.products.category_tree import rebuild_paths, recount_subtree_products
+
+
+def build_tree(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+    rebuild_paths(Category)
+    recount_subtree_products(Category, Product)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='depth'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, verbose_name='tree path'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='subtree_product_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Active products in this category and all subcategories', verbose_name='products in subtree'),
+        ),
+        migrations.RunPython(build_tree, migrations.RunPython.noop),
+    ]
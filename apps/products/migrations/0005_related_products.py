@@ -0,0 +1,31 @@
+# Generated by Django 4.2.9 on 2026-10-19 14:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_category_tree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='rank')),
+                ('score', models.FloatField(verbose_name='score')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='products.product', verbose_name='product')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours_of', to='products.product', verbose_name='related product')),
+            ],
+            options={
+                'verbose_name': 'Related Product',
+                'verbose_name_plural': 'Related Products',
+                'db_table': 'related_products',
+                'ordering': ['product', 'rank'],
+                'unique_together': {('product', 'rank')},
+            },
+        ),
+    ]
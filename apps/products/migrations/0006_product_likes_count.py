@@ -0,0 +1,31 @@
+# Generated by Django 4.2.9 on 2026-10-19 14:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_likes(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductLike = apps.get_model('products', 'ProductLike')
+    likes = (
+        ProductLike.objects.filter(product=OuterRef('pk'))
+        .order_by().values('product').annotate(n=Count('pk')).values('n')
+    )
+    Product.objects.update(likes_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_related_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='likes'),
+        ),
+        migrations.RunPython(count_likes, migrations.RunPython.noop),
+    ]
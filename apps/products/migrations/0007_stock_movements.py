@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-19 15:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_likes_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(verbose_name='quantity')),
+                ('reason', models.CharField(choices=[('sale', 'Sale'), ('cancellation', 'Cancellation')], max_length=20, verbose_name='reason')),
+                ('reference', models.CharField(blank=True, help_text='Order number', max_length=50, verbose_name='reference')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='products.product', verbose_name='product')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.productvariant', verbose_name='variant')),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'db_table': 'stock_movements',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['product', '-created_at'], name='stock_movem_product_407bbc_idx')],
+            },
+        ),
+    ]
@@ -7,8 +7,11 @@ import uuid
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import slugify
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Avg
+from django.db.models import Avg, Q
+
+from .category_tree import descendant_ids, path_ids, place_category
 
 
 def product_image_path(instance, filename):
@@ -37,12 +40,21 @@ class Category(models.Model):
     )
 
     image = models.ImageField(_('image'), upload_to='categories/', blank=True, null=True)
+    derivatives = models.JSONField(_('image derivatives'), default=dict, blank=True, editable=False)
     icon = models.CharField(_('icon class'), max_length=100, blank=True, help_text='CSS icon class')
 
     order = models.PositiveIntegerField(_('order'), default=0)
 
     is_active = models.BooleanField(_('active'), default=True)
 
+    # Materialized tree, maintained by save() and `rebuild_category_tree`.
+    path = models.CharField(_('tree path'), max_length=255, blank=True, db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(_('depth'), default=0, editable=False)
+    subtree_product_count = models.PositiveIntegerField(
+        _('products in subtree'), default=0, editable=False,
+        help_text='Active products in this category and all subcategories'
+    )
+
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
 
@@ -55,16 +67,68 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_id and self.pk in self._parent_path_ids():
+            raise ValidationError({'parent': _('A category cannot be moved under itself or its subcategory.')})
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'parent' not in update_fields:
+            super().save(*args, **kwargs)
+            return
+
+        previous = None
+        if self.pk:
+            if self.parent_id and self.pk in self._parent_path_ids():
+                raise ValueError('A category cannot be moved under itself or its subcategory.')
+            previous = (
+                Category.objects.filter(pk=self.pk)
+                .values_list('path', 'depth', 'subtree_product_count')
+                .first()
+            )
         super().save(*args, **kwargs)
+        place_category(self, previous)
+
+    def _parent_path_ids(self):
+        parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first()
+        return path_ids(parent_path or '') + [self.parent_id]
 
     @property
     def product_count(self):
         """Return number of active products in this category."""
         return self.products.filter(is_active=True).count()
 
+    @property
+    def ancestor_ids(self):
+        """Ids of all ancestors, root first, read from the stored path."""
+        return path_ids(self.path)[:-1]
+
+    def get_ancestors(self, include_self=False):
+        """Ancestors root first, in one query (for breadcrumbs)."""
+        ids = self.ancestor_ids + ([self.pk] if include_self else [])
+        return Category.objects.filter(pk__in=ids).order_by('depth')
+
+    def get_descendant_ids(self):
+        """Ids of this category and all subcategories (cached)."""
+        return descendant_ids(self)
+
+    def subtree_q(self):
+        """Product lookup for this category or any subcategory: an indexed range on the path."""
+        if not self.path:
+            # Not placed in the tree yet; an empty prefix would match every product.
+            if self.pk is None:
+                return Q(pk__in=[])
+            return Q(category_id__in=self.get_descendant_ids())
+        return Q(category__path__startswith=self.path)
+
+    def get_subtree_products(self):
+        """Products in this category or any subcategory."""
+        return Product.objects.filter(self.subtree_q())
+
 
 class Product(models.Model):
     """
@@ -118,6 +182,7 @@ class Product(models.Model):
 
     views_count = models.PositiveIntegerField(_('views'), default=0)
     sales_count = models.PositiveIntegerField(_('sales'), default=0)
+    likes_count = models.PositiveIntegerField(_('likes'), default=0, editable=False)
 
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
@@ -157,7 +222,7 @@ class Product(models.Model):
     @property
     def average_rating(self):
         """Calculate average rating from approved reviews."""
-        from django.db.models import Avg
+        from django.db.models import Avg, Q
         avg = self.reviews.filter(is_approved=True).aggregate(Avg('rating'))['rating__avg']
         return round(avg, 1) if avg else 0
 
@@ -185,6 +250,7 @@ class ProductImage(models.Model):
     )
 
     image = models.ImageField(_('image'), upload_to=product_image_path)
+    derivatives = models.JSONField(_('image derivatives'), default=dict, blank=True, editable=False)
     alt_text = models.CharField(_('alt text'), max_length=200, blank=True)
     is_primary = models.BooleanField(_('primary image'), default=False)
     order = models.PositiveIntegerField(_('order'), default=0)
@@ -274,3 +340,79 @@ class ProductLike(models.Model):
     def __str__(self):
         return f"{self.user.email} likes {self.product.name}"
 
+
+
+class RelatedProduct(models.Model):
+    """
+    Precomputed item-to-item neighbours (co-purchases and co-likes).
+    Rebuilt offline by `build_related_products`.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='neighbours',
+        verbose_name=_('product')
+    )
+    related = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='neighbours_of',
+        verbose_name=_('related product')
+    )
+    rank = models.PositiveSmallIntegerField(_('rank'))
+    score = models.FloatField(_('score'))
+
+    class Meta:
+        db_table = 'related_products'
+        verbose_name = _('Related Product')
+        verbose_name_plural = _('Related Products')
+        ordering = ['product', 'rank']
+        unique_together = ['product', 'rank']
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class StockMovement(models.Model):
+    """
+    Inventory ledger: one row per order line that took or returned stock.
+    `quantity` is signed; negative when stock leaves the warehouse.
+    """
+
+    REASON_SALE = 'sale'
+    REASON_CANCELLATION = 'cancellation'
+
+    REASON_CHOICES = [
+        (REASON_SALE, _('Sale')),
+        (REASON_CANCELLATION, _('Cancellation')),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_movements',
+        verbose_name=_('product')
+    )
+    variant = models.ForeignKey(
+        ProductVariant,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        verbose_name=_('variant')
+    )
+    quantity = models.IntegerField(_('quantity'))
+    reason = models.CharField(_('reason'), max_length=20, choices=REASON_CHOICES)
+    reference = models.CharField(_('reference'), max_length=50, blank=True, help_text='Order number')
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        db_table = 'stock_movements'
+        verbose_name = _('Stock Movement')
+        verbose_name_plural = _('Stock Movements')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.quantity:+d} ({self.reason})"
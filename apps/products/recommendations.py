@@ -0,0 +1,173 @@
+"""
+Offline "related products" job.
+
+Builds item-to-item similarity from two signals: products bought in the
+same order (``OrderItem``) and products liked by the same user
+(``ProductLike``). Each signal is a binary basket x product matrix X; the
+co-occurrence matrix is XᵀX and similarity is its cosine normalisation
+``c_ij / sqrt(n_i * n_j)``. With SciPy installed this is one sparse
+matrix product; otherwise co-occurrences are counted per basket, which
+gives the same result for the small baskets of this shop.
+
+The top N neighbours per product are stored in ``RelatedProduct``.
+"""
+import math
+import time
+from collections import Counter, defaultdict
+from itertools import groupby
+
+from django.apps import apps
+from django.db import transaction
+
+from .models import Product, ProductLike, RelatedProduct
+
+try:
+    from scipy import sparse
+except ImportError:  # pragma: no cover - optional dependency
+    sparse = None
+
+TOP_N = 12
+PURCHASE_WEIGHT = 0.7
+LIKE_WEIGHT = 0.3
+# Very large baskets (wholesale orders, users liking everything) add noise.
+MAX_BASKET_SIZE = 50
+
+
+def purchase_baskets():
+    """Product ids per non-cancelled order."""
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    rows = (
+        OrderItem.objects.exclude(order__status='cancelled')
+        .order_by('order_id')
+        .values_list('order_id', 'product_id')
+        .iterator(chunk_size=5000)
+    )
+    return _baskets(rows)
+
+
+def like_baskets():
+    """Liked product ids per user."""
+    rows = ProductLike.objects.order_by('user_id').values_list('user_id', 'product_id').iterator(chunk_size=5000)
+    return _baskets(rows)
+
+
+def _baskets(rows):
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        basket = {product_id for _, product_id in group}
+        if 1 < len(basket) <= MAX_BASKET_SIZE:
+            yield basket
+
+
+def cosine_similarity(baskets) -> dict:
+    """``{product_id: {other_id: similarity}}`` from co-occurrence in baskets."""
+    if sparse is not None:
+        return _cosine_sparse(baskets)
+
+    counts = Counter()
+    pairs = defaultdict(Counter)
+    for basket in baskets:
+        counts.update(basket)
+        for product_id in basket:
+            row = pairs[product_id]
+            for other_id in basket:
+                if other_id != product_id:
+                    row[other_id] += 1
+
+    return {
+        product_id: {
+            other_id: together / math.sqrt(counts[product_id] * counts[other_id])
+            for other_id, together in row.items()
+        }
+        for product_id, row in pairs.items()
+    }
+
+
+def _cosine_sparse(baskets):
+    columns = {}
+    indptr, indices = [0], []
+    for basket in baskets:
+        indices.extend(columns.setdefault(product_id, len(columns)) for product_id in basket)
+        indptr.append(len(indices))
+    if not columns:
+        return {}
+
+    matrix = sparse.csr_matrix(
+        ([1.0] * len(indices), indices, indptr), shape=(len(indptr) - 1, len(columns))
+    )
+    cooccurrence = (matrix.T @ matrix).tocsr()
+    norms = 1.0 / (cooccurrence.diagonal() ** 0.5)
+    similarity = sparse.diags(norms) @ cooccurrence @ sparse.diags(norms)
+    similarity.setdiag(0)
+    similarity = similarity.tocsr()
+    similarity.eliminate_zeros()
+
+    product_ids = [None] * len(columns)
+    for product_id, column in columns.items():
+        product_ids[column] = product_id
+
+    result = {}
+    for column, product_id in enumerate(product_ids):
+        start, end = similarity.indptr[column], similarity.indptr[column + 1]
+        if start != end:
+            result[product_id] = {
+                product_ids[other]: float(value)
+                for other, value in zip(similarity.indices[start:end], similarity.data[start:end])
+            }
+    return result
+
+
+def top_neighbours(purchase, likes, active_ids, top_n=TOP_N):
+    """Blend both similarities and keep the best `top_n` active neighbours per product."""
+    neighbours = {}
+    for product_id in set(purchase) | set(likes):
+        scores = Counter()
+        for other_id, value in purchase.get(product_id, {}).items():
+            scores[other_id] += PURCHASE_WEIGHT * value
+        for other_id, value in likes.get(product_id, {}).items():
+            scores[other_id] += LIKE_WEIGHT * value
+        best = [(other_id, score) for other_id, score in scores.most_common() if other_id in active_ids]
+        if best:
+            neighbours[product_id] = best[:top_n]
+    return neighbours
+
+
+def build_related_products(top_n=TOP_N, batch_size=1000):
+    """Recompute and store neighbours for every product. Returns (products, rows, seconds)."""
+    started = time.monotonic()
+    purchase = cosine_similarity(purchase_baskets())
+    likes = cosine_similarity(like_baskets())
+    active_ids = set(Product.objects.filter(is_active=True).values_list('pk', flat=True))
+    neighbours = top_neighbours(purchase, likes, active_ids, top_n)
+
+    rows = [
+        RelatedProduct(product_id=product_id, related_id=other_id, rank=rank, score=round(score, 6))
+        for product_id, best in neighbours.items()
+        for rank, (other_id, score) in enumerate(best, start=1)
+    ]
+    with transaction.atomic():
+        RelatedProduct.objects.all().delete()
+        RelatedProduct.objects.bulk_create(rows, batch_size=batch_size)
+
+    return len(neighbours), len(rows), time.monotonic() - started
+
+
+def related_products(product, limit=4):
+    """
+    Precomputed neighbours of `product` (one query), topped up with other
+    products from the same category when there are not enough.
+    """
+    related = list(
+        Product.objects.filter(neighbours_of__product=product, is_active=True)
+        .select_related('category')
+        .prefetch_related('images')
+        .order_by('neighbours_of__rank')[:limit]
+    )
+    if len(related) < limit:
+        related += list(
+            Product.objects.filter(category_id=product.category_id, is_active=True)
+            .exclude(pk__in=[product.pk, *(p.pk for p in related)])
+            .select_related('category')
+            .prefetch_related('images')
+            .order_by('-sales_count')[:limit - len(related)]
+        )
+    return related
@@ -0,0 +1,101 @@
+"""
+Product signals: image derivative generation, listing/home cache invalidation
+and denormalized counters.
+"""
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.utils.helpers import enqueue_on_commit
+from .catalog_engine import record_product_changes
+from .category_tree import path_ids, shift_product_count
+from .images import needs_derivatives
+from .listing_cache import bump_catalog_version, bump_home_version
+from .models import Category, Product, ProductImage, ProductLike
+
+# Saves touching only these fields do not change what listings show.
+LISTING_IRRELEVANT_FIELDS = {'views_count'}
+TRACKED_FIELDS = {'category', 'is_featured', 'is_active'}
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Category)
+def schedule_image_derivatives(sender, instance, **kwargs):
+    """Queue derivative generation once the uploaded image is committed."""
+    if not needs_derivatives(instance):
+        return
+
+    from .tasks import generate_image_derivatives
+
+    enqueue_on_commit(generate_image_derivatives, sender._meta.label, instance.pk)
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_state(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the stored category/featured/active flags so a change can
+    invalidate both sides and move the subtree product counts.
+    """
+    instance._previous_state = None
+    if instance.pk and (update_fields is None or TRACKED_FIELDS & set(update_fields)):
+        instance._previous_state = (
+            Product.objects.filter(pk=instance.pk).values_list('category_id', 'is_featured', 'is_active').first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def invalidate_listings_on_product_save(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= LISTING_IRRELEVANT_FIELDS:
+        return
+    previous = getattr(instance, '_previous_state', None)
+    previous_category_id, was_featured, was_active = previous or (None, False, False)
+
+    if created or previous:
+        shift_product_count(
+            previous_category_id if was_active else None,
+            instance.category_id if instance.is_active else None,
+        )
+
+    record_product_changes([instance.pk])
+    bump_catalog_version(instance.category_id, previous_category_id)
+    if instance.is_featured or was_featured:
+        bump_home_version()
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_listings_on_product_delete(sender, instance, **kwargs):
+    if instance.is_active:
+        shift_product_count(instance.category_id, None)
+    record_product_changes([instance.pk])
+    bump_catalog_version(instance.category_id)
+    if instance.is_featured:
+        bump_home_version()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_listings_on_image_change(sender, instance, **kwargs):
+    product = Product.objects.filter(pk=instance.product_id).values_list('category_id', 'is_featured').first()
+    if product:
+        bump_catalog_version(product[0])
+        if product[1]:
+            bump_home_version()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_on_category_change(sender, instance, **kwargs):
+    # After a move the old ancestors lose the subtree as well.
+    bump_catalog_version(instance.pk, *path_ids(getattr(instance, '_previous_path', '')))
+    bump_home_version()
+
+
+@receiver(post_save, sender=ProductLike)
+def count_like(sender, instance, created=False, **kwargs):
+    if created:
+        Product.objects.filter(pk=instance.product_id).update(likes_count=F('likes_count') + 1)
+
+
+@receiver(post_delete, sender=ProductLike)
+def uncount_like(sender, instance, **kwargs):
+    Product.objects.filter(pk=instance.product_id, likes_count__gt=0).update(likes_count=F('likes_count') - 1)
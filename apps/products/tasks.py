@@ -0,0 +1,32 @@
+"""
+Background tasks for the products app.
+"""
+from celery import shared_task
+from django.apps import apps
+
+from .images import build_derivatives
+
+
+@shared_task(ignore_result=True)
+def generate_image_derivatives(model_label: str, pk: int):
+    """
+    Generate responsive derivatives for a ProductImage or Category image.
+
+    The update is conditioned on the image name so a newer upload that
+    arrived while this task was running is not overwritten.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only('image').first()
+    if instance is None or not instance.image:
+        return
+
+    derivatives = build_derivatives(instance.image.name)
+    model.objects.filter(pk=pk, image=instance.image.name).update(derivatives=derivatives)
+
+
+@shared_task(ignore_result=True)
+def rebuild_related_products():
+    """Nightly rebuild of precomputed related products."""
+    from .recommendations import build_related_products
+
+    build_related_products()
@@ -0,0 +1,57 @@
+"""
+Template tags for responsive product and category images.
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from apps.products.images import FORMAT_OPTIONS, srcset
+
+register = template.Library()
+
+DEFAULT_SIZES = '(max-width: 576px) 50vw, (max-width: 992px) 33vw, 300px'
+
+
+@register.simple_tag
+def image_srcset(obj, fmt='jpeg'):
+    """
+    Return the srcset value for one derivative format.
+    Usage: <img srcset="{% image_srcset image 'webp' %}">
+    """
+    return srcset(getattr(obj, 'derivatives', None), fmt)
+
+
+@register.simple_tag
+def responsive_image(obj, alt='', css_class='', sizes=DEFAULT_SIZES, loading='lazy'):
+    """
+    Render a <picture> element with AVIF/WebP sources and a JPEG fallback.
+    Falls back to the original upload until derivatives are generated.
+    Usage: {% responsive_image product.images.all.0 alt=product.name css_class="product-image" %}
+    """
+    image = getattr(obj, 'image', None)
+    if not image:
+        return ''
+
+    derivatives = getattr(obj, 'derivatives', None) or {}
+    formats = derivatives.get('formats', {})
+
+    sources = format_html_join(
+        '',
+        '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (FORMAT_OPTIONS[fmt][1], srcset(derivatives, fmt), sizes)
+            for fmt in ('avif', 'webp')
+            if formats.get(fmt)
+        ),
+    )
+
+    jpeg_srcset = srcset(derivatives, 'jpeg')
+    img = format_html(
+        '<img src="{}"{} alt="{}" class="{}" loading="{}" decoding="async">',
+        image.url,
+        format_html(' srcset="{}" sizes="{}"', jpeg_srcset, sizes) if jpeg_srcset else '',
+        alt,
+        css_class,
+        loading,
+    )
+
+    return format_html('<picture>{}{}</picture>', sources, img)
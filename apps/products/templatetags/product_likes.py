@@ -0,0 +1,23 @@
+"""
+Template tags for product like (heart) state.
+"""
+from django import template
+
+from apps.products.likes import liked_product_ids
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def is_liked(context, product):
+    """
+    Whether the current user likes `product`.
+    The liked set is loaded once per request, however many cards use it.
+    Usage: {% is_liked product as liked %}
+    """
+    request = context.get('request')
+    if request is None or not request.user.is_authenticated:
+        return False
+    if not hasattr(request, '_liked_product_ids'):
+        request._liked_product_ids = liked_product_ids(request.user)
+    return product.pk in request._liked_product_ids
@@ -1,2 +1,420 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO, StringIO
 
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .catalog_engine import catalog_engine
+from .catalog_io import CatalogImporter, export_rows
+from .facets import FacetCounts
+from .filters import ProductFilter
+from .images import build_derivatives
+from .listing_cache import HOME_SCOPE, catalog_version, hit_rates
+from .media_import import ProductNameIndex
+from .models import Category, Product, ProductImage, ProductLike, RelatedProduct
+from .recommendations import build_related_products, related_products
+from .tasks import generate_image_derivatives
+
+
+def make_upload(name='photo.png', size=(800, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageDerivativeTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            IMAGE_DERIVATIVE_WIDTHS=[320, 640, 1024],
+            IMAGE_DERIVATIVE_FORMATS=['webp', 'jpeg'],
+        )
+        self.override.enable()
+        category = Category.objects.create(name='Fruit', slug='fruit')
+        self.product = Product.objects.create(
+            name='Apple', slug='apple', description='Red', category=category, price=1000, sku='APL-1'
+        )
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_derivatives_are_content_addressed(self):
+        image = ProductImage.objects.create(product=self.product, image=make_upload())
+        result = build_derivatives(image.image.name)
+
+        self.assertEqual(result['source'], image.image.name)
+        self.assertEqual(set(result['formats']), {'webp', 'jpeg'})
+        # 1024 is wider than the original and is skipped.
+        self.assertEqual(set(result['formats']['webp']), {'320', '640'})
+        self.assertIn(result['hash'], result['formats']['jpeg']['320'])
+
+        other = ProductImage.objects.create(product=self.product, image=make_upload('copy.png'))
+        self.assertEqual(build_derivatives(other.image.name)['formats'], result['formats'])
+
+    def test_task_stores_derivatives_and_tag_renders_srcset(self):
+        image = ProductImage.objects.create(product=self.product, image=make_upload())
+        generate_image_derivatives(ProductImage._meta.label, image.pk)
+        image.refresh_from_db()
+
+        html = Template(
+            '{% load product_images %}{% responsive_image image alt="Apple" css_class="product-image" %}'
+        ).render(Context({'image': image}))
+
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn(' 320w', html)
+        self.assertIn(image.image.url, html)
+
+
+class ProductNameIndexTest(TestCase):
+    def test_candidates_are_pruned_to_shared_tokens(self):
+        index = ProductNameIndex([
+            (1, "Qo'y go'shti"),
+            (2, 'Coca-Cola 1L'),
+            (3, 'Oq non'),
+        ] + [(i, f'Pepsi {i}') for i in range(4, 60)])
+
+        self.assertEqual(index.candidates('coca cola'), [2])
+        self.assertEqual(index.best_match('coca_cola_1.jpg')[0], 2)
+        self.assertEqual(index.best_match('qoy-goshti.png')[0], 1)
+        self.assertEqual(index.best_match('unrelated.png'), (None, 0.0))
+
+
+class CatalogImportExportTest(TestCase):
+    def setUp(self):
+        Category.objects.create(name='Ichimliklar', slug='ichimliklar')
+        Product.objects.create(
+            name='Cola', slug='cola', description='', category=Category.objects.get(), price=5000, sku='OLD-1'
+        )
+
+    def test_upsert_by_sku_with_unique_slugs(self):
+        rows = [
+            {'sku': 'C-1', 'name': 'Cola', 'category': 'ichimliklar', 'price': '7000', 'stock': '5'},
+            {'sku': 'C-2', 'name': 'Cola', 'category': 'Ichimliklar', 'price': '8000'},
+            {'sku': 'C-3', 'name': 'Fanta', 'category': 'missing', 'price': '1'},
+        ]
+        importer = CatalogImporter(batch_size=2)
+        importer.run(rows)
+
+        self.assertEqual(importer.processed, 2)
+        self.assertEqual(len(importer.errors), 1)
+        self.assertEqual(
+            set(Product.objects.values_list('slug', flat=True)), {'cola', 'cola-2', 'cola-3'}
+        )
+
+        CatalogImporter().run([{'sku': 'C-1', 'name': 'Cola Zero', 'category': 'ichimliklar', 'price': '7500'}])
+        product = Product.objects.get(sku='C-1')
+        self.assertEqual((product.name, product.price, product.stock), ('Cola Zero', 7500, 5))
+        self.assertEqual(Product.objects.count(), 3)
+
+    def test_export_rows_round_trip(self):
+        rows = list(export_rows())
+        self.assertEqual(rows[0]['category'], 'ichimliklar')
+
+        Product.objects.all().delete()
+        CatalogImporter().run(rows)
+        self.assertEqual(Product.objects.get().slug, 'cola')
+
+
+class ListingCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Meva', slug='meva')
+        self.product = Product.objects.create(
+            name='Olma', slug='olma', description='', category=self.category, price=1000, sku='M-1', stock=3
+        )
+        self.url = reverse('products:list') + '?category=meva&sort=popular'
+
+    def test_repeated_listing_is_served_from_cache(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Olma')
+
+        Category.objects.create(name='Sabzavot', slug='sabzavot')
+        self.client.get(reverse('products:list') + '?category=sabzavot&sort=popular')
+        stats = {row['combination']: row for row in hit_rates()}
+        self.assertEqual(list(stats), ['category&sort=popular'])
+        self.assertEqual((stats['category&sort=popular']['hits'], stats['category&sort=popular']['misses']), (1, 2))
+
+    def test_product_change_bumps_category_version(self):
+        version = catalog_version(self.category.id)
+
+        self.product.increment_views()
+        self.assertEqual(catalog_version(self.category.id), version)
+
+        self.product.stock = 0
+        self.product.save()
+        self.assertEqual(catalog_version(self.category.id), version + 1)
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Olma')
+
+    def test_featured_change_bumps_home_version(self):
+        version = catalog_version(HOME_SCOPE)
+
+        self.product.stock = 1
+        self.product.save()
+        self.assertEqual(catalog_version(HOME_SCOPE), version)
+
+        self.product.is_featured = True
+        self.product.save()
+        self.assertEqual(catalog_version(HOME_SCOPE), version + 1)
+
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Olma')
+        self.assertContains(response, 'Meva')
+
+
+class CategoryTreeTest(TestCase):
+    def setUp(self):
+        self.root = Category.objects.create(name='Oziq-ovqat', slug='oziq-ovqat')
+        self.dairy = Category.objects.create(name='Sut', slug='sut', parent=self.root)
+        self.cheese = Category.objects.create(name='Pishloq', slug='pishloq', parent=self.dairy)
+        self.other = Category.objects.create(name='Ichimlik', slug='ichimlik')
+        self.product = Product.objects.create(
+            name='Brynza', slug='brynza', description='', category=self.cheese, price=1, sku='P-1'
+        )
+
+    def counts(self):
+        return dict(Category.objects.values_list('slug', 'subtree_product_count'))
+
+    def test_paths_and_subtree_counts(self):
+        self.cheese.refresh_from_db()
+        self.assertEqual(self.cheese.ancestor_ids, [self.root.pk, self.dairy.pk])
+        self.assertEqual(self.cheese.depth, 2)
+        self.assertEqual(
+            [c.slug for c in self.cheese.get_ancestors(include_self=True)], ['oziq-ovqat', 'sut', 'pishloq']
+        )
+        self.assertEqual(set(self.root.get_descendant_ids()), {self.root.pk, self.dairy.pk, self.cheese.pk})
+        self.assertEqual(list(self.root.get_subtree_products()), [self.product])
+        self.assertFalse(Category(name='New', slug='new').get_subtree_products().exists())
+        Category.objects.filter(pk=self.other.pk).update(path='')
+        self.other.refresh_from_db()
+        self.assertFalse(self.other.get_subtree_products().exists())
+        filtered = ProductFilter({'category': self.other.pk}, queryset=Product.objects.all()).qs
+        self.assertFalse(filtered.exists())
+        self.assertEqual(self.counts(), {'oziq-ovqat': 1, 'sut': 1, 'pishloq': 1, 'ichimlik': 0})
+
+        self.product.is_active = False
+        self.product.save()
+        self.assertEqual(self.counts()['oziq-ovqat'], 0)
+
+    def test_move_updates_subtree(self):
+        self.dairy.refresh_from_db()
+        self.dairy.parent = self.other
+        self.dairy.save()
+
+        self.cheese.refresh_from_db()
+        self.assertEqual(self.cheese.ancestor_ids, [self.other.pk, self.dairy.pk])
+        self.assertEqual(self.counts(), {'oziq-ovqat': 0, 'sut': 1, 'pishloq': 1, 'ichimlik': 1})
+        self.assertNotIn(self.cheese.pk, self.root.get_descendant_ids())
+
+        self.dairy.parent = self.cheese
+        with self.assertRaises(ValueError):
+            self.dairy.save()
+
+    def test_rebuild_and_subtree_listing(self):
+        Category.objects.update(path='', depth=0, subtree_product_count=0)
+        call_command('rebuild_category_tree', stdout=StringIO())
+        self.assertEqual(self.counts()['oziq-ovqat'], 1)
+
+        response = self.client.get(reverse('products:list') + '?category=oziq-ovqat')
+        self.assertContains(response, 'Brynza')
+
+
+class FacetCountsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        food = Category.objects.create(name='Oziq-ovqat', slug='oziq-ovqat')
+        dairy = Category.objects.create(name='Sut', slug='sut', parent=food)
+        drinks = Category.objects.create(name='Ichimlik', slug='ichimlik')
+        for sku, category, brand, price, stock, discount in [
+            ('F-1', dairy, 'Nestle', 8000, 5, 0),
+            ('F-2', dairy, 'nestle', 20000, 0, 10),
+            ('F-3', food, 'Lactel', 60000, 2, 0),
+            ('D-1', drinks, 'Coca-Cola', 9000, 1, 5),
+        ]:
+            Product.objects.create(
+                name=sku, slug=sku.lower(), description='', category=category, brand=brand,
+                price=price, stock=stock, discount_percentage=discount, sku=sku,
+            )
+        self.food, self.drinks = food, drinks
+
+    def test_counts_apply_other_filters_only(self):
+        facets = FacetCounts(Product.objects.filter(is_active=True), category=self.food, brand='NESTLE').get()
+
+        self.assertEqual(facets['total'], 2)
+        # Category counts ignore the category filter but keep the brand one.
+        self.assertEqual(facets['categories'], {self.food.pk: 2, Category.objects.get(slug='sut').pk: 2})
+        # Brand counts ignore the brand filter but keep the category one.
+        self.assertEqual(facets['brands'], [{'value': 'Nestle', 'count': 2}, {'value': 'Lactel', 'count': 1}])
+        self.assertEqual([b['count'] for b in facets['price_buckets']], [1, 1, 0, 0, 0])
+        self.assertEqual((facets['in_stock'], facets['on_sale']), (1, 1))
+
+    def test_listing_and_json_endpoint(self):
+        response = self.client.get(reverse('products:list') + '?category=oziq-ovqat&in_stock=true')
+        self.assertEqual(response.context['facets']['total'], 2)
+        self.assertEqual(response.context['facets']['in_stock'], 2)
+
+        data = self.client.get(reverse('products:facets') + f'?category={self.drinks.pk}').json()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['categories'][str(self.food.pk)], 3)
+
+
+@override_settings(CATALOG_ENGINE={'ENABLED': True, 'MAX_PRODUCTS': 100})
+class CatalogEngineTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        catalog_engine.reset()
+        self.addCleanup(catalog_engine.reset)
+        self.fruit = Category.objects.create(name='Meva', slug='meva')
+        self.apple = Product.objects.create(
+            name='Olma', slug='olma', description='', category=self.fruit, brand='Bog',
+            price=12000, stock=4, sales_count=10, sku='E-1',
+        )
+        self.pear = Product.objects.create(
+            name='Nok', slug='nok', description='', category=self.fruit, brand='bog',
+            price=9000, stock=0, sales_count=30, discount_percentage=5, sku='E-2',
+        )
+
+    def test_filters_and_sorts_from_snapshot(self):
+        search = catalog_engine.search
+        self.assertEqual(search(sort='price_low'), [self.pear.pk, self.apple.pk])
+        self.assertEqual(search(sort='popular', brand='BOG'), [self.pear.pk, self.apple.pk])
+        self.assertEqual(search(in_stock=True), [self.apple.pk])
+        self.assertEqual(search(on_sale=True, max_price=10000), [self.pear.pk])
+        self.assertEqual(search(category_ids=self.fruit.get_descendant_ids(), min_price=20000), [])
+        self.assertEqual(search(brand='missing'), [])
+
+    def test_snapshot_follows_product_changes(self):
+        catalog_engine.search()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pear.is_active = False
+            self.pear.save()
+            Product.objects.create(
+                name='Behi', slug='behi', description='', category=self.fruit, price=1, sku='E-3'
+            )
+        with self.assertNumQueries(1):
+            ids = catalog_engine.search(sort='price_low')
+        self.assertEqual(ids, [Product.objects.get(sku='E-3').pk, self.apple.pk])
+
+    def test_snapshot_is_reloaded_when_too_old(self):
+        catalog_engine.search()
+        # A write in another process: no change reaches this worker's log.
+        Product.objects.filter(pk=self.pear.pk).update(is_active=False)
+        self.assertEqual(catalog_engine.search(sort='price_low'), [self.pear.pk, self.apple.pk])
+
+        catalog_engine.loaded_at -= 301
+        self.assertEqual(catalog_engine.search(sort='price_low'), [self.apple.pk])
+
+    def test_admin_deactivation_through_filtered_changelist(self):
+        admin_user = get_user_model().objects.create_superuser(
+            username='admin@example.com', email='admin@example.com', password='x'
+        )
+        self.client.force_login(admin_user)
+        catalog_engine.search()
+        version = catalog_version(self.fruit.id)
+
+        url = reverse('admin:products_product_changelist') + '?is_active__exact=1'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {
+                'action': 'deactivate_products', '_selected_action': [self.apple.pk, self.pear.pk],
+            })
+
+        self.assertEqual(catalog_version(self.fruit.id), version + 1)
+        self.assertEqual(catalog_engine.search(), [])
+
+    def test_listing_page_uses_engine(self):
+        response = self.client.get(reverse('products:list') + '?sort=price_high&in_stock=true')
+        self.assertEqual([p.pk for p in response.context['page_obj']], [self.apple.pk])
+
+
+class RelatedProductsTest(TestCase):
+    def setUp(self):
+        from apps.orders.models import Order, OrderItem
+
+        category = Category.objects.create(name='Non', slug='non')
+        self.bread, self.butter, self.jam, self.milk = [
+            Product.objects.create(
+                name=name, slug=name.lower(), description='', category=category, price=1000, sku=name
+            )
+            for name in ('Bread', 'Butter', 'Jam', 'Milk')
+        ]
+        user = get_user_model().objects.create_user(username='buyer', email='b@example.com', password='x')
+        for basket in ([self.bread, self.butter], [self.bread, self.butter], [self.bread, self.jam]):
+            order = Order.objects.create(
+                user=user, customer_name='B', customer_email='b@example.com', customer_phone='1',
+                delivery_address='A', delivery_city='T', subtotal=0, total_amount=0,
+            )
+            for product in basket:
+                OrderItem.objects.create(order=order, product=product, unit_price=1000, quantity=1)
+        ProductLike.objects.create(product=self.milk, user=user)
+        ProductLike.objects.create(product=self.bread, user=user)
+
+    def test_neighbours_ranked_by_blended_similarity(self):
+        build_related_products()
+
+        neighbours = list(
+            RelatedProduct.objects.filter(product=self.bread).values_list('related__name', flat=True)
+        )
+        self.assertEqual(neighbours, ['Butter', 'Jam', 'Milk'])
+
+        # Neighbours plus their prefetched images.
+        with self.assertNumQueries(2):
+            self.assertEqual(related_products(self.bread, limit=3), [self.butter, self.jam, self.milk])
+
+        # Bread from co-purchases, then category fallback.
+        related = related_products(self.butter, limit=4)
+        self.assertEqual(related[0], self.bread)
+        self.assertEqual(len(related), 3)
+
+
+class ProductLikeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.products = [
+            Product.objects.create(
+                name=f'Olma {i}', slug=f'olma-{i}', description='', category=category, price=1, sku=f'L-{i}'
+            )
+            for i in range(3)
+        ]
+        self.user = get_user_model().objects.create_user(username='liker', email='l@example.com', password='x')
+        self.client.force_login(self.user)
+
+    def test_toggle_maintains_counter(self):
+        url = reverse('products:toggle_like', args=[self.products[0].pk])
+
+        data = self.client.post(url).json()
+        self.assertEqual((data['liked'], data['likes_count']), (True, 1))
+        data = self.client.post(url).json()
+        self.assertEqual((data['liked'], data['likes_count']), (False, 0))
+
+        ProductLike.objects.create(product=self.products[0], user=self.user)
+        self.user.delete()
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].likes_count, 0)
+
+    def test_batch_status_and_card_rendering(self):
+        ProductLike.objects.create(product=self.products[1], user=self.user)
+        ids = ','.join(str(p.pk) for p in self.products)
+
+        data = self.client.get(reverse('products:like_statuses') + f'?ids={ids}').json()
+        self.assertEqual(data['liked'], [self.products[1].pk])
+        self.assertEqual(data['likes_count'][str(self.products[1].pk)], 1)
+
+        with self.assertNumQueries(3):  # user, counts, liked set (session from cache)
+            self.client.get(reverse('products:like_statuses') + f'?ids={ids}')
+
+        html = Template(
+            '{% load product_likes %}{% for product in products %}{% is_liked product as liked %}{{ liked|yesno:"1,0" }}{% endfor %}'
+        ).render(Context({'products': self.products, 'request': self.client.get('/').wsgi_request}))
+        self.assertEqual(html, '010')
@@ -10,7 +10,9 @@ app_name = 'products'
 urlpatterns = [
     path('', views.product_list_view, name='list'),
     path('categories/', views.category_list_view, name='categories'),
+    path('facets/', views.product_facets_view, name='facets'),
     path('like/<int:product_id>/', likes.toggle_like, name='toggle_like'),
+    path('like-status/', likes.get_like_statuses, name='like_statuses'),
     path('like-status/<int:product_id>/', likes.get_like_status, name='like_status'),
     path('<slug:slug>/', views.product_detail_view, name='detail'),
 ]
\ No newline at end of file
@@ -3,63 +3,179 @@ Product catalog views.
 """
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.db.models import Q, Avg
+from django.utils.translation import get_language
 
+from apps.reviews.listing import DEFAULT_SORT, REVIEW_SORT_LABELS, review_page, review_summary
+
+from .catalog_engine import catalog_engine
+from .category_tree import build_tree
+from .facets import FacetCounts
 from .models import Product, Category
 from .filters import ProductFilter
+from .listing_cache import SORT_OPTIONS, ListingCache
+from .recommendations import related_products
+
+
+PRODUCTS_PER_PAGE = 12
+
+
+def _search_q(search_query):
+    return (
+        Q(name__icontains=search_query) |
+        Q(description__icontains=search_query) |
+        Q(brand__icontains=search_query)
+    )
+
+
+def _filter_data(product_filter):
+    """Cleaned filter values; like ProductFilter.qs, invalid fields (e.g. a slug in `category`) are left out."""
+    product_filter.form.is_valid()
+    return getattr(product_filter.form, 'cleaned_data', {})
+
+
+def _engine_page(product_filter, category, sort_by, page_number):
+    """Listing page from the in-memory catalog engine, or None if it cannot answer."""
+    data = _filter_data(product_filter)
+    if data.get('name'):
+        return None
+    category = category or data.get('category')
+    return catalog_engine.get_page(
+        page_number,
+        PRODUCTS_PER_PAGE,
+        category_ids=category.get_descendant_ids() if category else None,
+        brand=data.get('brand') or '',
+        min_price=data.get('min_price'),
+        max_price=data.get('max_price'),
+        in_stock=bool(data.get('in_stock')),
+        on_sale=bool(data.get('on_sale')),
+        sort=sort_by,
+    )
+
+
+def _facet_counts(product_filter, category, search_query):
+    """FacetCounts for the current filters; search and name narrow the base set."""
+    data = _filter_data(product_filter)
+
+    queryset = Product.objects.filter(is_active=True)
+    if data.get('name'):
+        queryset = queryset.filter(name__icontains=data['name'])
+    if search_query:
+        queryset = queryset.filter(_search_q(search_query))
+
+    return FacetCounts(
+        queryset,
+        category=category or data.get('category'),
+        brand=data.get('brand'),
+        min_price=data.get('min_price'),
+        max_price=data.get('max_price'),
+        in_stock=data.get('in_stock'),
+        on_sale=data.get('on_sale'),
+        extra_signature=[(data.get('name') or '').lower(), search_query.lower()],
+    )
 
 
 def product_list_view(request):
     """
     Product listing with filtering and pagination.
+    Result pages are served from ListingCache when possible, then from the
+    in-memory catalog engine, and only then from a database query.
     """
-    products = Product.objects.filter(is_active=True).select_related('category')
-
-    product_filter = ProductFilter(request.GET, queryset=products)
-    products = product_filter.qs
-
     search_query = request.GET.get('search', '')
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(brand__icontains=search_query)
-        )
 
+    category = None
     category_param = request.GET.get('category')
     if category_param:
         if category_param.isdigit():
             category = get_object_or_404(Category, id=int(category_param))
         else:
             category = get_object_or_404(Category, slug=category_param)
-        products = products.filter(category=category)
 
     sort_by = request.GET.get('sort', '-created_at')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'popular':
-        products = products.order_by('-sales_count')
-    elif sort_by == 'rating':
-        products = products.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
-    else:
-        products = products.order_by(sort_by)
-
-    paginator = Paginator(products, 12)
+    if sort_by not in SORT_OPTIONS:
+        sort_by = '-created_at'
+
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+
+    listing_cache = ListingCache(
+        request.GET,
+        sort_by,
+        page_number,
+        per_page=PRODUCTS_PER_PAGE,
+        category_id=category.id if category else None,
+        language=get_language(),
+        currency=request.currency,
+    )
+
+    products = Product.objects.filter(is_active=True).select_related('category').prefetch_related('images')
+    product_filter = ProductFilter(request.GET, queryset=products)
+
+    page_obj = listing_cache.get_page()
+    if page_obj is None:
+        if not search_query:
+            page_obj = _engine_page(product_filter, category, sort_by, page_number)
+        if page_obj is None:
+            products = product_filter.qs
+
+            if search_query:
+                products = products.filter(_search_q(search_query))
+
+            if category:
+                products = products.filter(category.subtree_q())
+
+            if sort_by == 'price_low':
+                products = products.order_by('price')
+            elif sort_by == 'price_high':
+                products = products.order_by('-price')
+            elif sort_by == 'popular':
+                products = products.order_by('-sales_count')
+            elif sort_by == 'rating':
+                products = products.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
+            else:
+                products = products.order_by(sort_by)
+
+            paginator = Paginator(products, PRODUCTS_PER_PAGE)
+            page_obj = paginator.get_page(page_number)
+        listing_cache.set_page(page_obj)
+
+    facets = _facet_counts(product_filter, category, search_query).get()
+    categories = list(Category.objects.filter(is_active=True, parent=None))
+    for root in categories:
+        root.facet_count = facets['categories'].get(root.pk, 0)
+
+    # Rendered cards contain no per-user state for anonymous visitors.
+    cache_grid = listing_cache.enabled and not request.user.is_authenticated
 
     context = {
         'page_obj': page_obj,
         'filter': product_filter,
-        'categories': Category.objects.filter(is_active=True, parent=None),
+        'facets': facets,
+        'selected_category': category,
+        'categories': categories,
         'search_query': search_query,
+        'grid_cache_key': listing_cache.signature if cache_grid else None,
+        'grid_cache_timeout': listing_cache.timeout,
     }
 
     return render(request, 'products/product_list.html', context)
 
 
+def product_facets_view(request):
+    """
+    Facet counts for the current listing filters as JSON, for filter
+    widgets that refresh without reloading the page.
+    """
+    search_query = request.GET.get('search', '')
+    category = None
+    category_param = request.GET.get('category')
+    if category_param and not category_param.isdigit():
+        category = Category.objects.filter(slug=category_param).first()
+
+    product_filter = ProductFilter(request.GET, queryset=Product.objects.filter(is_active=True))
+    return JsonResponse(_facet_counts(product_filter, category, search_query).get())
+
+
 def product_detail_view(request, slug):
     """
     Product detail view with reviews and related products.
@@ -72,14 +188,13 @@ def product_detail_view(request, slug):
 
     product.increment_views()
 
-    reviews = product.reviews.filter(is_approved=True).select_related('user').order_by('-created_at')
+    breadcrumbs = product.category.get_ancestors(include_self=True)
 
-    related_products = Product.objects.filter(
-        category=product.category,
-        is_active=True
-    ).exclude(id=product.id)[:4]
+    review_sort = request.GET.get('review_sort', DEFAULT_SORT)
+
+    related = related_products(product)
 
-    currency = request.session.get('currency', 'UZS')
+    currency = request.currency
 
     from core.services.currency import CurrencyService
     currency_service = CurrencyService()
@@ -87,9 +202,12 @@ def product_detail_view(request, slug):
 
     context = {
         'product': product,
-        'reviews': reviews,
-        'related_products': related_products,
+        'review_page': review_page(product.pk, review_sort),
+        'review_summary': review_summary(product.pk),
+        'review_sorts': REVIEW_SORT_LABELS,
+        'related_products': related,
         'display_price': display_price,
+        'breadcrumbs': breadcrumbs,
     }
 
     return render(request, 'products/product_detail.html', context)
@@ -97,9 +215,9 @@ def product_detail_view(request, slug):
 
 def category_list_view(request):
     """
-    Display all categories.
+    Display the category tree, loaded with one query.
     """
-    categories = Category.objects.filter(is_active=True, parent=None).prefetch_related('children')
+    categories = build_tree(Category.objects.filter(is_active=True).order_by('depth', 'order', 'name'))
 
     context = {
         'categories': categories,
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .moderation import moderate_reviews
 from .models import Review, ReviewImage, ReviewVote
 
 
@@ -10,12 +11,12 @@ class ReviewAdmin(admin.ModelAdmin):
     actions = ['approve_reviews', 'flag_reviews']
 
     def approve_reviews(self, request, queryset):
-        queryset.update(is_approved=True, is_flagged=False)
+        moderate_reviews(queryset.values_list('pk', flat=True), 'approve')
 
     approve_reviews.short_description = "Approve selected reviews"
 
     def flag_reviews(self, request, queryset):
-        queryset.update(is_flagged=True)
+        moderate_reviews(queryset.values_list('pk', flat=True), 'flag')
 
     flag_reviews.short_description = "Flag selected reviews"
     
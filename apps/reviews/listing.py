@@ -0,0 +1,134 @@
+"""
+Paginated review lists for the product page.
+
+Reviews are loaded a page at a time with keyset pagination: the cursor is
+the id of the last review shown and the next page continues after its
+sort key, so page 50 costs the same as page 1. The first page of every
+sort order, and the rating summary, are cached per product under a
+version that is bumped whenever a review of the product changes.
+"""
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+from django.utils.translation import gettext_lazy as _
+
+from .models import Review
+
+REVIEW_SORTS = {
+    'newest': ('-created_at', '-id'),
+    'helpful': ('-helpful_count', '-created_at', '-id'),
+    'rating_high': ('-rating', '-created_at', '-id'),
+    'rating_low': ('rating', '-created_at', '-id'),
+}
+REVIEW_SORT_LABELS = [
+    ('newest', _('Newest')),
+    ('helpful', _('Most helpful')),
+    ('rating_high', _('Highest rating')),
+    ('rating_low', _('Lowest rating')),
+]
+DEFAULT_SORT = 'newest'
+REVIEWS_PER_PAGE = 10
+CACHE_TIMEOUT = 60 * 10
+
+VERSION_KEY = 'reviews:version:{product_id}'
+FIRST_PAGE_KEY = 'reviews:{product_id}:{version}:first:{sort}:{per_page}'
+SUMMARY_KEY = 'reviews:{product_id}:{version}:summary'
+
+
+def reviews_version(product_id) -> int:
+    key = VERSION_KEY.format(product_id=product_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_reviews_version(*product_ids):
+    """Invalidate cached review pages and summaries of the given products."""
+    for product_id in set(product_ids):
+        key = VERSION_KEY.format(product_id=product_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 2, None)
+
+
+# First pages are pickled into the shared cache: load only what the
+# templates show of the author, never the password hash.
+AUTHOR_FIELDS = ('first_name', 'last_name', 'email')
+
+
+def approved_reviews(product_id):
+    return (
+        Review.objects.filter(product_id=product_id, is_approved=True)
+        .select_related('user')
+        .only(*(field.name for field in Review._meta.concrete_fields), *(f'user__{name}' for name in AUTHOR_FIELDS))
+        .prefetch_related('images')
+    )
+
+
+def _after(ordering, values):
+    """Rows strictly after `values` in `ordering` (lexicographic keyset condition)."""
+    condition = Q()
+    equal = Q()
+    for field in ordering:
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': values[name]})
+        equal &= Q(**{name: values[name]})
+    return condition
+
+
+class ReviewPage:
+    """One page of reviews plus the cursor of the next page (None on the last)."""
+
+    def __init__(self, reviews, next_cursor, sort):
+        self.reviews = reviews
+        self.next_cursor = next_cursor
+        self.sort = sort
+
+
+def review_page(product_id, sort=DEFAULT_SORT, cursor=None, per_page=REVIEWS_PER_PAGE) -> ReviewPage:
+    if sort not in REVIEW_SORTS:
+        sort = DEFAULT_SORT
+    ordering = REVIEW_SORTS[sort]
+
+    if not cursor:
+        key = FIRST_PAGE_KEY.format(
+            product_id=product_id, version=reviews_version(product_id), sort=sort, per_page=per_page
+        )
+        cached = cache.get(key)
+        if cached is None:
+            cached = _load_page(approved_reviews(product_id).order_by(*ordering), per_page)
+            cache.set(key, cached, CACHE_TIMEOUT)
+        reviews, next_cursor = cached
+        return ReviewPage(reviews, next_cursor, sort)
+
+    if not str(cursor).isdigit():
+        return ReviewPage([], None, sort)
+    names = [field.lstrip('-') for field in ordering]
+    values = Review.objects.filter(pk=cursor, product_id=product_id).values(*names).first()
+    if values is None:
+        return ReviewPage([], None, sort)
+
+    queryset = approved_reviews(product_id).filter(_after(ordering, values)).order_by(*ordering)
+    return ReviewPage(*_load_page(queryset, per_page), sort)
+
+
+def _load_page(queryset, per_page):
+    reviews = list(queryset[:per_page + 1])
+    next_cursor = reviews[per_page - 1].pk if len(reviews) > per_page else None
+    return reviews[:per_page], next_cursor
+
+
+def review_summary(product_id) -> dict:
+    """Approved review count and average rating, cached with the review pages."""
+    key = SUMMARY_KEY.format(product_id=product_id, version=reviews_version(product_id))
+    summary = cache.get(key)
+    if summary is None:
+        stats = Review.objects.filter(product_id=product_id, is_approved=True).aggregate(
+            count=Count('pk'), average=Avg('rating')
+        )
+        summary = {'count': stats['count'], 'average': round(stats['average'], 1) if stats['average'] else 0}
+        cache.set(key, summary, CACHE_TIMEOUT)
+    return summary
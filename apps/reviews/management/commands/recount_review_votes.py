@@ -0,0 +1,14 @@
+"""
+Repair review helpful/not-helpful counters from the ReviewVote rows.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.reviews.votes import recount_votes
+
+
+class Command(BaseCommand):
+    help = 'Recount review helpfulness counters from ReviewVote'
+
+    def handle(self, *args, **options):
+        fixed = recount_votes()
+        self.stdout.write(self.style.SUCCESS(f'{fixed} reviews had their vote counters corrected.'))
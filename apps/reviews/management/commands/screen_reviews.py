@@ -0,0 +1,34 @@
+"""
+Pre-screen reviews in bulk: catches up on reviews whose background
+screening was missed and re-scores the moderation backlog.
+"""
+import os
+
+from django.core.management.base import BaseCommand
+
+from apps.reviews.models import Review
+from apps.reviews.screening import screen_backlog
+
+
+class Command(BaseCommand):
+    help = 'Score pending reviews for spam and auto-approve or auto-flag them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rescreen', action='store_true', help='Also re-score pending reviews screened before')
+        parser.add_argument('--all', action='store_true', help='Re-score every review, moderated ones included')
+        parser.add_argument('--dry-run', action='store_true', help='Store scores without approving or flagging')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Text analysis processes')
+        parser.add_argument('--chunk-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.all()
+        if not options['all']:
+            reviews = reviews.filter(is_approved=False, is_flagged=False)
+            if not options['rescreen']:
+                reviews = reviews.filter(screening__isnull=True)
+
+        decisions = screen_backlog(
+            reviews, workers=options['workers'], chunk_size=options['chunk_size'], apply=not options['dry_run']
+        )
+        summary = ', '.join(f'{count} {decision}' for decision, count in decisions.items())
+        self.stdout.write(self.style.SUCCESS(f'Screened {sum(decisions.values())} reviews: {summary}.'))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-19 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['is_approved', 'is_flagged', '-created_at'], name='reviews_is_appr_5e2509_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.9 on 2026-10-19 14:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_moderation_queue_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewScreening',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0, verbose_name='spam score')),
+                ('decision', models.CharField(choices=[('approved', 'Auto-approved'), ('flagged', 'Auto-flagged'), ('manual', 'Needs manual review')], db_index=True, max_length=20, verbose_name='decision')),
+                ('reasons', models.JSONField(blank=True, default=list, verbose_name='reasons')),
+                ('signature', models.BinaryField(blank=True, null=True, verbose_name='MinHash signature')),
+                ('similarity', models.FloatField(default=0, verbose_name='similarity')),
+                ('screened_at', models.DateTimeField(auto_now=True, verbose_name='screened at')),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reviews.review', verbose_name='duplicate of')),
+                ('review', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='screening', to='reviews.review', verbose_name='review')),
+            ],
+            options={
+                'verbose_name': 'Review Screening',
+                'verbose_name_plural': 'Review Screenings',
+                'db_table': 'review_screenings',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, verbose_name='band key')),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='reviews.review', verbose_name='review')),
+            ],
+            options={
+                'verbose_name': 'Review Fingerprint',
+                'verbose_name_plural': 'Review Fingerprints',
+                'db_table': 'review_fingerprints',
+            },
+        ),
+    ]
@@ -75,6 +75,7 @@ class Review(models.Model):
         indexes = [
             models.Index(fields=['product', '-created_at']),
             models.Index(fields=['is_approved']),
+            models.Index(fields=['is_approved', 'is_flagged', '-created_at']),
         ]
 
     def __str__(self):
@@ -194,3 +195,75 @@ class ProductRating(models.Model):
 
     def __str__(self):
         return f"{self.user.email} - {self.product.name} - {self.rating} stars"
+
+
+class ReviewScreening(models.Model):
+    """
+    Result of the automatic pre-screening of a review.
+    """
+
+    DECISION_APPROVED = 'approved'
+    DECISION_FLAGGED = 'flagged'
+    DECISION_MANUAL = 'manual'
+
+    DECISION_CHOICES = [
+        (DECISION_APPROVED, _('Auto-approved')),
+        (DECISION_FLAGGED, _('Auto-flagged')),
+        (DECISION_MANUAL, _('Needs manual review')),
+    ]
+
+    review = models.OneToOneField(
+        Review,
+        on_delete=models.CASCADE,
+        related_name='screening',
+        verbose_name=_('review')
+    )
+
+    score = models.FloatField(_('spam score'), default=0)
+    decision = models.CharField(_('decision'), max_length=20, choices=DECISION_CHOICES, db_index=True)
+    reasons = models.JSONField(_('reasons'), default=list, blank=True)
+
+    signature = models.BinaryField(_('MinHash signature'), blank=True, null=True)
+    duplicate_of = models.ForeignKey(
+        Review,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name=_('duplicate of')
+    )
+    similarity = models.FloatField(_('similarity'), default=0)
+
+    screened_at = models.DateTimeField(_('screened at'), auto_now=True)
+
+    class Meta:
+        db_table = 'review_screenings'
+        verbose_name = _('Review Screening')
+        verbose_name_plural = _('Review Screenings')
+
+    def __str__(self):
+        return f"{self.review_id}: {self.decision} ({self.score:.2f})"
+
+
+class ReviewFingerprint(models.Model):
+    """
+    LSH band keys of a review's MinHash signature, one row per band.
+    Reviews sharing a key are near-duplicate candidates.
+    """
+
+    review = models.ForeignKey(
+        Review,
+        on_delete=models.CASCADE,
+        related_name='fingerprints',
+        verbose_name=_('review')
+    )
+
+    key = models.BigIntegerField(_('band key'), db_index=True)
+
+    class Meta:
+        db_table = 'review_fingerprints'
+        verbose_name = _('Review Fingerprint')
+        verbose_name_plural = _('Review Fingerprints')
+
+    def __str__(self):
+        return f"{self.review_id}: {self.key}"
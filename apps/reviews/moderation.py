@@ -0,0 +1,74 @@
+"""
+Dashboard moderation queue.
+
+The queue is read with keyset pagination (newest first), and moderation
+actions apply to any number of reviews with one UPDATE. Cached review
+pages, listings and catalog snapshots of the affected products are then
+refreshed together rather than once per review.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.products.catalog_engine import record_product_changes
+from apps.products.listing_cache import bump_catalog_version
+from apps.products.models import Product
+from .listing import _after, bump_reviews_version
+from .models import Review
+
+QUEUE_ORDERING = ('-created_at', '-id')
+QUEUE_PER_PAGE = 50
+MAX_BULK_REVIEWS = 500
+
+QUEUE_STATUSES = {
+    'pending': {'is_approved': False, 'is_flagged': False},
+    'approved': {'is_approved': True},
+    'flagged': {'is_flagged': True},
+}
+
+MODERATION_ACTIONS = {
+    'approve': {'is_approved': True, 'is_flagged': False},
+    'reject': {'is_approved': False},
+    'flag': {'is_flagged': True},
+}
+
+
+def moderation_queue(status=None, cursor=None, per_page=QUEUE_PER_PAGE):
+    """One page of the queue and the cursor of the next page (None on the last)."""
+    reviews = Review.objects.filter(**QUEUE_STATUSES.get(status, {}))
+    if cursor:
+        if not str(cursor).isdigit():
+            return [], None
+        values = Review.objects.filter(pk=cursor).values('created_at', 'id').first()
+        if values is None:
+            return [], None
+        reviews = reviews.filter(_after(QUEUE_ORDERING, values))
+
+    page = list(reviews.select_related('user', 'product', 'screening').order_by(*QUEUE_ORDERING)[:per_page + 1])
+    next_cursor = page[per_page - 1].pk if len(page) > per_page else None
+    return page[:per_page], next_cursor
+
+
+def moderate_reviews(review_ids, action, notes=''):
+    """Apply `action` to the given reviews in one UPDATE. Returns the number changed."""
+    if action not in MODERATION_ACTIONS:
+        raise ValueError(f'Unknown moderation action: {action}')
+    changes = dict(MODERATION_ACTIONS[action], updated_at=timezone.now())
+    if action == 'flag' and notes:
+        changes['moderation_notes'] = notes
+
+    with transaction.atomic():
+        reviews = Review.objects.filter(pk__in=review_ids)
+        product_ids = set(reviews.values_list('product_id', flat=True))
+        updated = reviews.update(**changes)
+    refresh_product_ratings(product_ids)
+    return updated
+
+
+def refresh_product_ratings(product_ids):
+    """Invalidate everything derived from the approved reviews of these products."""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    bump_reviews_version(*product_ids)
+    record_product_changes(product_ids)
+    bump_catalog_version(*Product.objects.filter(pk__in=product_ids).values_list('category_id', flat=True).distinct())
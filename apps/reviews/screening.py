@@ -0,0 +1,163 @@
+"""
+Automatic pre-screening of new reviews.
+
+Every new review is scored in the background (``tasks.screen_review``):
+text heuristics, near-duplicates of earlier reviews found through the
+MinHash/LSH index in ``ReviewFingerprint``, and per-user posting rates.
+Clean reviews of verified purchases are approved, obvious spam is
+flagged, and everything in between stays in the manual queue. Nothing
+here needs the network. The backlog is re-scored with the
+``screen_reviews`` command, which computes text signals in parallel
+worker processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Review, ReviewFingerprint, ReviewScreening
+from .moderation import moderate_reviews
+from .text_signals import analyse, band_keys, pack_signature, similarity, unpack_signature
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Scores below this auto-approve, at or above AUTO_FLAG_SCORE auto-flag.
+    'AUTO_APPROVE_BELOW': 0.2,
+    'AUTO_FLAG_SCORE': 0.8,
+    'REQUIRE_VERIFIED_PURCHASE': True,
+    'DUPLICATE_SIMILARITY': 0.8,
+    'MAX_REVIEWS_PER_HOUR': 5,
+    'MAX_REVIEWS_PER_DAY': 20,
+}
+
+DUPLICATE_WEIGHT = 0.6
+RATE_LIMIT_WEIGHT = 0.5
+
+
+def screening_setting(name):
+    return getattr(settings, 'REVIEW_SCREENING', {}).get(name, DEFAULTS[name])
+
+
+def _posting_rate_reasons(review):
+    """Reviews by the same user in the hour / day up to this one."""
+    recent = Review.objects.filter(
+        user_id=review.user_id,
+        created_at__gt=review.created_at - timedelta(days=1),
+        created_at__lte=review.created_at,
+    )
+    reasons = []
+    if recent.count() > screening_setting('MAX_REVIEWS_PER_DAY'):
+        reasons.append('rate_day')
+    if recent.filter(created_at__gt=review.created_at - timedelta(hours=1)).count() > screening_setting('MAX_REVIEWS_PER_HOUR'):
+        reasons.append('rate_hour')
+    return reasons
+
+
+def _nearest_duplicate(review, signature):
+    """Most similar earlier review above the duplicate threshold, as (id, similarity)."""
+    candidates = (
+        ReviewFingerprint.objects.filter(key__in=band_keys(signature), review_id__lt=review.pk)
+        .values_list('review_id', flat=True)
+        .distinct()
+    )
+    best = (None, 0.0)
+    rows = ReviewScreening.objects.filter(review_id__in=candidates, signature__isnull=False)
+    for other_id, other_signature in rows.values_list('review_id', 'signature'):
+        score = similarity(signature, unpack_signature(other_signature))
+        if score > best[1]:
+            best = (other_id, score)
+    return best if best[1] >= screening_setting('DUPLICATE_SIMILARITY') else (None, 0.0)
+
+
+def decide(score, verified):
+    if score >= screening_setting('AUTO_FLAG_SCORE'):
+        return ReviewScreening.DECISION_FLAGGED
+    if score < screening_setting('AUTO_APPROVE_BELOW') and (verified or not screening_setting('REQUIRE_VERIFIED_PURCHASE')):
+        return ReviewScreening.DECISION_APPROVED
+    return ReviewScreening.DECISION_MANUAL
+
+
+def screen_review(review, analysis=None, apply=True):
+    """
+    Score one review and store the result. `analysis` is a precomputed
+    ``text_signals.analyse`` result. With `apply`, a still-pending review
+    is approved or flagged according to the decision.
+    """
+    score, reasons, signature = analysis or analyse(review.title, review.comment)
+    reasons = list(reasons)
+
+    duplicate_id, duplicate_similarity = (None, 0.0)
+    if signature is not None:
+        duplicate_id, duplicate_similarity = _nearest_duplicate(review, signature)
+        if duplicate_id is not None:
+            reasons.append('duplicate')
+            score += DUPLICATE_WEIGHT
+
+    rate_reasons = _posting_rate_reasons(review)
+    if rate_reasons:
+        reasons += rate_reasons
+        score += RATE_LIMIT_WEIGHT
+    score = min(1.0, score)
+
+    decision = decide(score, verified=review.order_id is not None)
+
+    with transaction.atomic():
+        screening, _ = ReviewScreening.objects.update_or_create(review=review, defaults={
+            'score': round(score, 3),
+            'decision': decision,
+            'reasons': reasons,
+            'signature': pack_signature(signature) if signature is not None else None,
+            'duplicate_of_id': duplicate_id,
+            'similarity': round(duplicate_similarity, 3),
+        })
+        ReviewFingerprint.objects.filter(review=review).delete()
+        if signature is not None:
+            ReviewFingerprint.objects.bulk_create(
+                ReviewFingerprint(review=review, key=key) for key in band_keys(signature)
+            )
+
+    if apply and decision != ReviewScreening.DECISION_MANUAL:
+        pending = Review.objects.filter(pk=review.pk, is_approved=False, is_flagged=False)
+        if pending.exists():
+            if decision == ReviewScreening.DECISION_APPROVED:
+                moderate_reviews([review.pk], 'approve')
+            else:
+                moderate_reviews([review.pk], 'flag', 'Auto-flagged: ' + ', '.join(reasons))
+    return screening
+
+
+def screen_backlog(reviews, workers=1, chunk_size=200, apply=True):
+    """
+    Screen many reviews in id order. Text analysis runs in `workers`
+    processes; lookups and writes stay in this process, in order, so each
+    review is compared against the ones screened before it.
+    Returns the number of reviews per decision.
+    """
+    reviews = reviews.order_by('pk')
+    decisions = {choice: 0 for choice, _ in ReviewScreening.DECISION_CHOICES}
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        batch = []
+        for review in reviews.iterator(chunk_size=chunk_size):
+            batch.append(review)
+            if len(batch) >= chunk_size:
+                _screen_batch(batch, executor, workers, decisions, apply)
+                batch = []
+        if batch:
+            _screen_batch(batch, executor, workers, decisions, apply)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return decisions
+
+
+def _screen_batch(batch, executor, workers, decisions, apply):
+    titles = [review.title for review in batch]
+    comments = [review.comment for review in batch]
+    if executor is None:
+        analyses = map(analyse, titles, comments)
+    else:
+        analyses = executor.map(analyse, titles, comments, chunksize=max(1, len(batch) // (workers * 4)))
+    for review, analysis in zip(batch, analyses):
+        decisions[screen_review(review, analysis, apply).decision] += 1
@@ -0,0 +1,35 @@
+"""
+Review signals: invalidate cached review pages of the product and queue
+pre-screening of new reviews.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.utils.helpers import enqueue_on_commit
+from .listing import bump_reviews_version
+from .models import Review, ReviewImage
+from .screening import screening_setting
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_pages(sender, instance, **kwargs):
+    bump_reviews_version(instance.product_id)
+
+
+@receiver(post_save, sender=ReviewImage)
+@receiver(post_delete, sender=ReviewImage)
+def invalidate_review_pages_on_image(sender, instance, **kwargs):
+    product_id = Review.objects.filter(pk=instance.review_id).values_list('product_id', flat=True).first()
+    if product_id:
+        bump_reviews_version(product_id)
+
+
+@receiver(post_save, sender=Review)
+def schedule_screening(sender, instance, created, **kwargs):
+    if not created or not screening_setting('ENABLED'):
+        return
+
+    from .tasks import screen_review
+
+    enqueue_on_commit(screen_review, instance.pk)
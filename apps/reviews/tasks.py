@@ -0,0 +1,15 @@
+"""
+Background tasks for the reviews app.
+"""
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def screen_review(review_id: int):
+    """Pre-screen a new review and auto-approve or auto-flag it."""
+    from .models import Review
+    from .screening import screen_review as screen
+
+    review = Review.objects.filter(pk=review_id).first()
+    if review is not None:
+        screen(review)
@@ -1,2 +1,243 @@
-from django.test import TestCase
+import threading
+import time
+from io import StringIO
 
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from apps.products.models import Category, Product
+from .listing import review_page, review_summary
+from .moderation import moderation_queue
+from .models import Review, ReviewScreening, ReviewVote
+from .screening import screen_review
+from .text_signals import minhash, similarity
+from .votes import cast_vote
+
+
+class ReviewPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.product = Product.objects.create(
+            name='Olma', slug='olma', description='', category=category, price=1, sku='R-1'
+        )
+        user = get_user_model().objects.create_user(username='reviewer', email='r@example.com', password='x')
+        self.reviews = [
+            Review.objects.create(
+                product=self.product, user=user, rating=i % 5 + 1, title=f'Review {i}', comment='...',
+                helpful_count=i % 3, is_approved=True,
+            )
+            for i in range(25)
+        ]
+
+    def test_cursor_pages_cover_every_review_once(self):
+        for sort in ('newest', 'helpful', 'rating_low'):
+            seen, cursor = [], None
+            while True:
+                page = review_page(self.product.pk, sort, cursor)
+                seen += [review.pk for review in page.reviews]
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+            self.assertEqual(sorted(seen), sorted(r.pk for r in self.reviews))
+            self.assertEqual(len(seen), 25)
+
+    def test_first_page_cached_until_moderation(self):
+        author = review_page(self.product.pk).reviews[0].user
+        self.assertEqual(author.get_deferred_fields() & {'password', 'first_name', 'email'}, {'password'})
+        with self.assertNumQueries(0):
+            page = review_page(self.product.pk)
+            [list(review.images.all()) for review in page.reviews]
+        self.assertEqual(review_summary(self.product.pk)['count'], 25)
+
+        newest = self.reviews[-1]
+        newest.is_approved = False
+        newest.save()
+        self.assertNotIn(newest, review_page(self.product.pk).reviews)
+        self.assertEqual(review_summary(self.product.pk)['count'], 24)
+
+    def test_ajax_endpoint_and_detail_page(self):
+        response = self.client.get(reverse('products:detail', args=[self.product.slug]) + '?review_sort=helpful')
+        page = response.context['review_page']
+        self.assertEqual(len(page.reviews), 10)
+
+        data = self.client.get(
+            reverse('reviews:list', args=[self.product.pk]) + f'?sort=helpful&cursor={page.next_cursor}'
+        ).json()
+        self.assertEqual(data['html'].count('class="card mb-3"'), 10)
+        self.assertIsNotNone(data['next_cursor'])
+
+
+@override_settings(REVIEW_SCREENING={'ENABLED': False})
+class ReviewVoteTest(TransactionTestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Meva', slug='meva')
+        product = Product.objects.create(
+            name='Olma', slug='olma', description='', category=category, price=1, sku='V-1'
+        )
+        self.users = [
+            get_user_model().objects.create_user(username=f'voter{i}', email=f'v{i}@example.com')
+            for i in range(8)
+        ]
+        self.review = Review.objects.create(
+            product=product, user=self.users[0], rating=5, title='Good', comment='...', is_approved=True
+        )
+
+    def counts(self):
+        return Review.objects.values_list('helpful_count', 'not_helpful_count').get(pk=self.review.pk)
+
+    def test_repeat_and_switch(self):
+        user = self.users[1]
+        self.assertEqual(cast_vote(self.review.pk, user, ReviewVote.VOTE_HELPFUL), (1, 0))
+        self.assertEqual(cast_vote(self.review.pk, user, ReviewVote.VOTE_HELPFUL), (1, 0))
+        self.assertEqual(cast_vote(self.review.pk, user, ReviewVote.VOTE_NOT_HELPFUL), (0, 1))
+
+        self.client.force_login(self.users[2])
+        data = self.client.post(reverse('reviews:vote', args=[self.review.pk]), {'vote_type': 'helpful'}).json()
+        self.assertEqual((data['helpful_count'], data['not_helpful_count']), (1, 1))
+
+    def test_parallel_votes_are_all_counted(self):
+        barrier = threading.Barrier(len(self.users))
+        errors = []
+
+        def vote(user, vote_type):
+            try:
+                barrier.wait()
+                for attempt in range(50):
+                    try:
+                        cast_vote(self.review.pk, user, vote_type)
+                        break
+                    except OperationalError:
+                        # SQLite has no row locks; a writer may find the database busy.
+                        if connection.vendor != 'sqlite':
+                            raise
+                        time.sleep(0.005 * (attempt + 1))
+                else:
+                    errors.append(user.username)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=vote, args=(user, ReviewVote.VOTE_HELPFUL if i % 3 else ReviewVote.VOTE_NOT_HELPFUL))
+            for i, user in enumerate(self.users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.counts(), (5, 3))
+
+    def test_recount_command_repairs_counters(self):
+        for user in self.users[:3]:
+            cast_vote(self.review.pk, user, ReviewVote.VOTE_HELPFUL)
+        Review.objects.filter(pk=self.review.pk).update(helpful_count=42, not_helpful_count=7)
+
+        call_command('recount_review_votes', stdout=StringIO())
+        self.assertEqual(self.counts(), (3, 0))
+
+
+class ModerationQueueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.product = Product.objects.create(
+            name='Olma', slug='olma', description='', category=category, price=1, sku='M-1'
+        )
+        users = [
+            get_user_model().objects.create_user(username=f'author{i}', email=f'a{i}@example.com')
+            for i in range(30)
+        ]
+        self.reviews = [
+            Review.objects.create(product=self.product, user=user, rating=4, title='Ok', comment='...')
+            for user in users
+        ]
+        self.moderator = get_user_model().objects.create_user(
+            username='moderator', email='m@example.com', is_staff=True
+        )
+
+    def test_queue_pages_with_cursor(self):
+        first, cursor = moderation_queue('pending', per_page=20)
+        second, last = moderation_queue('pending', cursor, per_page=20)
+        self.assertEqual(len(first), 20)
+        self.assertEqual(len(second), 10)
+        self.assertIsNone(last)
+        self.assertEqual({r.pk for r in first + second}, {r.pk for r in self.reviews})
+
+    def test_bulk_approve_is_one_update(self):
+        self.assertEqual(review_summary(self.product.pk)['count'], 0)
+        self.client.force_login(self.moderator)
+        ids = [review.pk for review in self.reviews[:25]]
+
+        response = self.client.post(
+            reverse('dashboard:reviews_bulk_moderate'),
+            {'action': 'approve', 'review_ids': ids},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.json()['updated'], 25)
+        self.assertEqual(Review.objects.filter(is_approved=True).count(), 25)
+        self.assertEqual(review_summary(self.product.pk)['count'], 25)
+
+        response = self.client.get(reverse('dashboard:reviews_list') + '?status=pending')
+        self.assertEqual(len(response.context['reviews']), 5)
+
+
+@override_settings(REVIEW_SCREENING={'REQUIRE_VERIFIED_PURCHASE': False})
+class ReviewScreeningTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Meva', slug='meva')
+        self.products = [
+            Product.objects.create(
+                name=f'Olma {i}', slug=f'olma-{i}', description='', category=category, price=1, sku=f'S-{i}'
+            )
+            for i in range(3)
+        ]
+        self.users = [
+            get_user_model().objects.create_user(username=f'writer{i}', email=f'w{i}@example.com')
+            for i in range(3)
+        ]
+
+    def review(self, user, product, comment, title='Review'):
+        return Review.objects.create(product=product, user=user, rating=4, title=title, comment=comment)
+
+    def test_minhash_estimates_similarity(self):
+        text = 'fresh crisp apples delivered quickly and packed with care, would order again from this shop'
+        self.assertEqual(similarity(minhash(text), minhash(text)), 1.0)
+        self.assertGreater(similarity(minhash(text), minhash(text + ' soon')), 0.7)
+        self.assertLess(similarity(minhash(text), minhash('the blender broke after two days of light use')), 0.2)
+
+    def test_clean_review_approved_and_spam_flagged(self):
+        clean = self.review(self.users[0], self.products[0], 'Sweet and juicy apples, arrived fresh and well packed.')
+        spam = self.review(
+            self.users[1], self.products[0], 'Best casino bonus, write me on telegram @bonus_king www.bonus.xyz'
+        )
+
+        self.assertEqual(screen_review(clean).decision, ReviewScreening.DECISION_APPROVED)
+        self.assertEqual(screen_review(spam).decision, ReviewScreening.DECISION_FLAGGED)
+        clean.refresh_from_db()
+        spam.refresh_from_db()
+        self.assertTrue(clean.is_approved)
+        self.assertTrue(spam.is_flagged)
+        self.assertIn('spam_terms', spam.moderation_notes)
+
+    def test_copied_review_is_a_duplicate(self):
+        text = 'Great quality for the price, the apples stayed fresh for two weeks in the fridge.'
+        original = self.review(self.users[0], self.products[0], text)
+        screen_review(original)
+        copies = [self.review(self.users[1], product, text) for product in self.products]
+
+        screening = screen_review(copies[0])
+        self.assertEqual(screening.duplicate_of_id, original.pk)
+        self.assertIn('duplicate', screening.reasons)
+
+        call_command('screen_reviews', '--workers', '2', stdout=StringIO())
+        self.assertEqual(
+            set(ReviewScreening.objects.filter(review__in=copies[1:]).values_list('decision', flat=True)),
+            {ReviewScreening.DECISION_MANUAL},
+        )
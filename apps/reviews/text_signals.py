@@ -0,0 +1,126 @@
+"""
+Offline text analysis for review screening.
+
+Pure functions without database or network access, so the backlog can be
+scored in worker processes. ``analyse`` returns a spam score from simple
+heuristics plus a MinHash signature of the comment: 64 hash minima over
+its word 3-gram shingles, whose agreement estimates Jaccard similarity.
+Signatures are cut into 16 bands of 4 rows for LSH; reviews sharing any
+band key are near-duplicate candidates (about 50% similar or more).
+"""
+import re
+import struct
+from hashlib import blake2b
+from random import Random
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures are stored and compared across processes and releases.
+_rng = Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_SIGNATURE = struct.Struct(f'<{NUM_PERM}Q')
+
+LINK_RE = re.compile(r'https?://|www\.|\b[\w-]+\.(?:com|net|org|ru|uz|io|xyz|top)\b', re.I)
+CONTACT_RE = re.compile(r'(?:\+?\d[\d\s()-]{8,}\d)|(?:\bt\.me/)|(?:@[a-z0-9_]{4,})|(?:\b[\w.+-]+@[\w-]+\.\w+)', re.I)
+REPEAT_RE = re.compile(r'(.)\1{4,}')
+WORD_RE = re.compile(r'\w+', re.U)
+
+SPAM_TERMS = frozenset({
+    'casino', 'betting', 'crypto', 'bitcoin', 'forex', 'viagra', 'porn',
+    'promocode', 'referral', 'whatsapp', 'telegram', 'kazino', 'stavka',
+})
+TOXIC_TERMS = frozenset({
+    'idiot', 'stupid', 'moron', 'scam', 'scammers', 'garbage', 'trash', 'fraud',
+})
+
+# Weight of each signal in the spam score (capped at 1.0).
+WEIGHTS = {
+    'link': 0.5,
+    'contact': 0.4,
+    'spam_terms': 0.5,
+    'toxic_terms': 0.3,
+    'shouting': 0.2,
+    'repeated_chars': 0.1,
+    'too_short': 0.1,
+}
+MIN_COMMENT_LENGTH = 20
+
+
+def words(text):
+    return WORD_RE.findall((text or '').lower())
+
+
+def text_score(title, comment):
+    """Spam score in [0, 1] and the names of the signals that fired."""
+    text = f'{title or ""} {comment or ""}'
+    tokens = set(words(text))
+    reasons = []
+
+    if LINK_RE.search(text):
+        reasons.append('link')
+    if CONTACT_RE.search(text):
+        reasons.append('contact')
+    if tokens & SPAM_TERMS:
+        reasons.append('spam_terms')
+    if tokens & TOXIC_TERMS:
+        reasons.append('toxic_terms')
+    letters = [char for char in text if char.isalpha()]
+    if len(letters) >= 20 and sum(char.isupper() for char in letters) / len(letters) > 0.6:
+        reasons.append('shouting')
+    if REPEAT_RE.search(text):
+        reasons.append('repeated_chars')
+    if len((comment or '').strip()) < MIN_COMMENT_LENGTH:
+        reasons.append('too_short')
+
+    return min(1.0, sum(WEIGHTS[reason] for reason in reasons)), reasons
+
+
+def shingles(text):
+    tokens = words(text)
+    if len(tokens) < SHINGLE_SIZE:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def _hash(value):
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), 'little') % _PRIME
+
+
+def minhash(text):
+    """MinHash signature (tuple of NUM_PERM ints), or None for empty text."""
+    hashes = [_hash(shingle) for shingle in shingles(text)]
+    if not hashes:
+        return None
+    return tuple(min((a * x + b) % _PRIME for x in hashes) for a, b in _PERMUTATIONS)
+
+
+def band_keys(signature):
+    """One signed 64-bit key per band, for the LSH index."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = blake2b(struct.pack(f'<B{ROWS}Q', band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+def pack_signature(signature):
+    return _SIGNATURE.pack(*signature)
+
+
+def unpack_signature(data):
+    return _SIGNATURE.unpack(bytes(data))
+
+
+def analyse(title, comment):
+    """``(score, reasons, signature)`` for one review; safe to run in a worker process."""
+    score, reasons = text_score(title, comment)
+    return score, reasons, minhash(comment)
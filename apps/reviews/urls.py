@@ -10,5 +10,6 @@ app_name = 'reviews'
 urlpatterns = [
     path('create/<int:product_id>/', views.create_review_view, name='create'),
     path('vote/<int:review_id>/', views.vote_review_view, name='vote'),
+    path('product/<int:product_id>/', views.review_list_view, name='list'),
     path('rate/<int:product_id>/', rate_product_view, name='rate'),
 ]
\ No newline at end of file
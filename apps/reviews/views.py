@@ -5,11 +5,14 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.template.loader import render_to_string
 
-from .models import Review, ReviewVote, ReviewImage
+from .listing import review_page
+from .models import Review, ReviewImage
+from .votes import COUNTER_FIELDS, cast_vote
 from .forms import ReviewForm
 from apps.products.models import Product
-from apps.orders.models import Order
+from apps.orders.purchases import delivered_order_id
 
 
 @login_required
@@ -19,13 +22,9 @@ def create_review_view(request, product_id):
     """
     product = get_object_or_404(Product, id=product_id)
 
-    has_purchased = Order.objects.filter(
-        user=request.user,
-        items__product=product,
-        status=Order.STATUS_DELIVERED
-    ).exists()
+    order_id = delivered_order_id(request.user, product.pk)
 
-    if not has_purchased:
+    if order_id is None:
         messages.error(request, 'You can only review products you have purchased.')
         return redirect('products:detail', slug=product.slug)
 
@@ -39,15 +38,7 @@ def create_review_view(request, product_id):
             review = form.save(commit=False)
             review.user = request.user
             review.product = product
-            review.save()
-
-            order = Order.objects.filter(
-                user=request.user,
-                items__product=product,
-                status=Order.STATUS_DELIVERED
-            ).first()
-            review.order = order
-
+            review.order_id = order_id
             review.save()
 
             for f in request.FILES.getlist('images'):
@@ -73,43 +64,13 @@ def vote_review_view(request, review_id):
     Vote on review helpfulness (AJAX).
     """
     if request.method == 'POST':
-        review = get_object_or_404(Review, id=review_id)
+        review = get_object_or_404(Review.objects.only('pk'), id=review_id)
         vote_type = request.POST.get('vote_type')
 
-        if vote_type not in ['helpful', 'not_helpful']:
+        if vote_type not in COUNTER_FIELDS:
             return JsonResponse({'success': False, 'error': 'Invalid vote type'})
 
-        existing_vote = ReviewVote.objects.filter(review=review, user=request.user).first()
-
-        if existing_vote:
-            if existing_vote.vote_type != vote_type:
-                if existing_vote.vote_type == ReviewVote.VOTE_HELPFUL:
-                    review.helpful_count -= 1
-                else:
-                    review.not_helpful_count -= 1
-
-                existing_vote.vote_type = vote_type
-                existing_vote.save()
-
-                if vote_type == 'helpful':
-                    review.helpful_count += 1
-                else:
-                    review.not_helpful_count += 1
-
-                review.save()
-        else:
-            ReviewVote.objects.create(
-                review=review,
-                user=request.user,
-                vote_type=vote_type
-            )
-
-            if vote_type == 'helpful':
-                review.helpful_count += 1
-            else:
-                review.not_helpful_count += 1
-
-            review.save()
+        review.helpful_count, review.not_helpful_count = cast_vote(review.pk, request.user, vote_type)
 
         return JsonResponse({
             'success': True,
@@ -118,4 +79,18 @@ def vote_review_view(request, review_id):
             'helpful_percentage': review.helpful_percentage
         })
 
-    return JsonResponse({'success': False, 'error': 'Invalid request'})
\ No newline at end of file
+    return JsonResponse({'success': False, 'error': 'Invalid request'})
+
+
+def review_list_view(request, product_id):
+    """
+    Further pages of approved reviews (AJAX): ``?sort=helpful&cursor=<review id>``.
+    """
+    page = review_page(product_id, request.GET.get('sort'), request.GET.get('cursor'))
+    html = render_to_string('reviews/_review_list.html', {'reviews': page.reviews}, request=request)
+
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'next_cursor': page.next_cursor,
+    })
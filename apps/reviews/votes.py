@@ -0,0 +1,93 @@
+"""
+Review helpfulness votes.
+
+A vote is an upsert on ReviewVote plus one conditional UPDATE of the
+review counters with F() expressions, inside a single transaction, so
+parallel votes never overwrite each other's counts. Votes do not bump
+the cached review pages, so counts shown there may lag a few minutes;
+the vote response carries the fresh counts.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .listing import bump_reviews_version
+from .models import Review, ReviewVote
+
+COUNTER_FIELDS = {
+    ReviewVote.VOTE_HELPFUL: 'helpful_count',
+    ReviewVote.VOTE_NOT_HELPFUL: 'not_helpful_count',
+}
+
+
+def _decrement(field):
+    return Case(When(**{f'{field}__gt': 0}, then=F(field) - 1), default=Value(0), output_field=IntegerField())
+
+
+def cast_vote(review_id, user, vote_type):
+    """
+    Record `user`'s vote and adjust the counters. Repeating the same vote
+    is a no-op; switching moves one count from the old field to the new.
+    Returns ``(helpful_count, not_helpful_count)``.
+    """
+    if vote_type not in COUNTER_FIELDS:
+        raise ValueError(f'Invalid vote type: {vote_type}')
+
+    with transaction.atomic():
+        previous = (
+            ReviewVote.objects.select_for_update()
+            .filter(review_id=review_id, user=user)
+            .values_list('vote_type', flat=True)
+            .first()
+        )
+        if previous is None:
+            try:
+                with transaction.atomic():
+                    ReviewVote.objects.create(review_id=review_id, user=user, vote_type=vote_type)
+            except IntegrityError:
+                # A parallel request by the same user inserted first; treat ours as a switch.
+                previous = (
+                    ReviewVote.objects.select_for_update()
+                    .filter(review_id=review_id, user=user)
+                    .values_list('vote_type', flat=True)
+                    .get()
+                )
+
+        if previous is None:
+            Review.objects.filter(pk=review_id).update(**{COUNTER_FIELDS[vote_type]: F(COUNTER_FIELDS[vote_type]) + 1})
+        elif previous != vote_type:
+            ReviewVote.objects.filter(review_id=review_id, user=user).update(vote_type=vote_type)
+            Review.objects.filter(pk=review_id).update(**{
+                COUNTER_FIELDS[previous]: _decrement(COUNTER_FIELDS[previous]),
+                COUNTER_FIELDS[vote_type]: F(COUNTER_FIELDS[vote_type]) + 1,
+            })
+
+        return Review.objects.filter(pk=review_id).values_list('helpful_count', 'not_helpful_count').get()
+
+
+def recount_votes():
+    """Repair both counters from ReviewVote. Returns the number of reviews fixed."""
+    def votes(vote_type):
+        return Coalesce(
+            Subquery(
+                ReviewVote.objects.filter(review=OuterRef('pk'), vote_type=vote_type)
+                .order_by().values('review').annotate(n=Count('pk')).values('n')
+            ),
+            0,
+        )
+
+    stale = Review.objects.annotate(
+        helpful=votes(ReviewVote.VOTE_HELPFUL),
+        not_helpful=votes(ReviewVote.VOTE_NOT_HELPFUL),
+    ).filter(~Q(helpful_count=F('helpful')) | ~Q(not_helpful_count=F('not_helpful')))
+    stale = dict(stale.values_list('pk', 'product_id'))
+    if not stale:
+        return 0
+
+    with transaction.atomic():
+        fixed = Review.objects.filter(pk__in=list(stale)).update(
+            helpful_count=votes(ReviewVote.VOTE_HELPFUL),
+            not_helpful_count=votes(ReviewVote.VOTE_NOT_HELPFUL),
+        )
+    bump_reviews_version(*stale.values())
+    return fixed
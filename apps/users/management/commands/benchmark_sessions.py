@@ -0,0 +1,82 @@
+"""
+Compare session backends on the real views.
+
+Each backend serves the same pages to an anonymous and a signed-in client
+through the Django test client; the command reports median and p95
+latency, queries per request and how many of them touch the session
+table. Everything runs in a transaction that is rolled back, so the
+benchmark user and any sessions it creates leave no trace.
+"""
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.products.models import Product
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request latency and queries of the session backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends', nargs='+', default=list(settings.SESSION_BACKENDS),
+            choices=list(settings.SESSION_BACKENDS), help='Backends to compare',
+        )
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per page')
+        parser.add_argument('--url', action='append', default=[], help='Extra path to include')
+
+    def pages(self, extra):
+        pages = [reverse('home'), reverse('products:list'), reverse('cart:view')]
+        product = Product.objects.filter(is_active=True).only('slug').first()
+        if product is not None:
+            pages.append(reverse('products:detail', args=[product.slug]))
+        return pages + extra
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1.')
+
+        rows = []
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            user = User.objects.create_user(username=f'session-benchmark-{uuid.uuid4().hex[:8]}')
+            pages = self.pages(options['url'])
+            for backend in options['backends']:
+                with override_settings(SESSION_ENGINE=settings.SESSION_BACKENDS[backend]):
+                    for signed_in in (False, True):
+                        client = Client()
+                        if signed_in:
+                            client.force_login(user)
+                        for page in pages:
+                            rows.append((backend, signed_in, page, *self.measure(client, page, options['requests'])))
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'{"backend":<16}{"user":<11}{"page":<40}{"median ms":>10}{"p95 ms":>9}{"queries":>9}{"session":>9}'
+        )
+        for backend, signed_in, page, median, p95, queries, session_queries in rows:
+            self.stdout.write(
+                f'{backend:<16}{"signed in" if signed_in else "anonymous":<11}{page[:39]:<40}'
+                f'{median:>10.2f}{p95:>9.2f}{queries:>9.1f}{session_queries:>9.1f}'
+            )
+
+    def measure(self, client, page, requests):
+        client.get(page, follow=True)  # warm caches and the session
+        timings, queries, session_queries = [], 0, 0
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                client.get(page, follow=True)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries += len(captured)
+            session_queries += sum('django_session' in query['sql'] for query in captured)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        return statistics.median(timings), p95, queries / requests, session_queries / requests
@@ -0,0 +1,14 @@
+"""
+Background tasks for the users app.
+"""
+from celery import shared_task
+from django.conf import settings
+
+
+@shared_task(ignore_result=True)
+def save_preferred_currency(user_id: int, currency: str):
+    """Persist a currency switch of a user (see CurrencyMiddleware)."""
+    from .models import User
+
+    if currency in settings.SUPPORTED_CURRENCIES:
+        User.objects.filter(pk=user_id).exclude(preferred_currency=currency).update(preferred_currency=currency)
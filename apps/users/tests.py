@@ -1,2 +1,65 @@
-from django.test import TestCase
+from io import StringIO
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from core.middleware import CURRENCY_COOKIE, CurrencyMiddleware
+from core.services.currency import remember_preferred_currency
+from .models import User
+from .tasks import save_preferred_currency
+
+
+class CurrencyMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seen = []
+
+        def view(request):
+            self.seen.append(request.currency)
+            return HttpResponse()
+
+        self.middleware = CurrencyMiddleware(view)
+
+    def test_anonymous_requests_need_no_session_or_queries(self):
+        with self.assertNumQueries(0):
+            response = self.middleware(RequestFactory().get('/'))
+        self.assertEqual(self.seen, [settings.DEFAULT_CURRENCY])
+        self.assertNotIn(CURRENCY_COOKIE, response.cookies)
+
+        response = self.client.get(reverse('products:list') + '?currency=USD')
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertIn(CURRENCY_COOKIE, response.cookies)
+
+        self.client.get(reverse('products:list'))
+        self.assertEqual(self.client.get(reverse('products:list')).wsgi_request.currency, 'USD')
+
+    def test_switches_carry_their_value_to_the_task(self):
+        user = User.objects.create_user(username='shopper', email='s@example.com')
+        with self.captureOnCommitCallbacks() as callbacks:
+            remember_preferred_currency(user.pk, 'USD')
+            remember_preferred_currency(user.pk, 'EUR')
+        self.assertEqual(len(callbacks), 2)
+
+        save_preferred_currency(user.pk, 'USD')
+        save_preferred_currency(user.pk, 'EUR')
+        save_preferred_currency(user.pk, 'XYZ')
+        user.refresh_from_db()
+        self.assertEqual(user.preferred_currency, 'EUR')
+
+
+class SessionBenchmarkTest(TestCase):
+    def test_benchmark_reports_every_backend(self):
+        out = StringIO()
+        call_command('benchmark_sessions', '--requests', '2', '--backends', 'db', 'cached_db', stdout=out)
+        lines = out.getvalue().splitlines()[1:]
+
+        session_queries = {
+            (line.split()[0], line.split()[1]): float(line.split()[-1]) for line in lines if '/cart/' in line
+        }
+        self.assertGreater(session_queries[('db', 'signed')], 0)
+        self.assertEqual(session_queries[('cached_db', 'signed')], 0)
+        self.assertFalse(User.objects.filter(username__startswith='session-benchmark').exists())
@@ -9,6 +9,7 @@ from django.views.decorators.http import require_http_methods
 
 from .forms import UserRegistrationForm, UserLoginForm, UserProfileForm, AddressForm
 from .models import Address
+from core.middleware import set_currency_cookie
 
 
 @require_http_methods(["GET", "POST"])
@@ -92,9 +93,12 @@ def profile_view(request):
     if request.method == 'POST':
         form = UserProfileForm(request.POST, request.FILES, instance=request.user)
         if form.is_valid():
-            form.save()
+            user = form.save()
             messages.success(request, 'Your profile has been updated.')
-            return redirect('users:profile')
+            response = redirect('users:profile')
+            if 'preferred_currency' in form.changed_data:
+                set_currency_cookie(response, user.preferred_currency)
+            return response
     else:
         form = UserProfileForm(instance=request.user)
 
@@ -4,8 +4,10 @@ Production-grade configuration with security best practices.
 """
 
 import os
+import sys
 from pathlib import Path
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,6 +53,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.cart.middleware.GuestCartMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     # custom middlewarelar eng pastda bo‘lsin!
     'core.middleware.CurrencyMiddleware',
@@ -138,6 +141,10 @@ STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Responsive image derivatives (see apps.products.images)
+IMAGE_DERIVATIVE_WIDTHS = [320, 640, 1024]
+IMAGE_DERIVATIVE_FORMATS = ['avif', 'webp', 'jpeg']
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CRISPY_ALLOWED_TEMPLATE_PACKS = 'bootstrap5'
@@ -171,6 +178,29 @@ GOOGLE_MAPS_API_KEY = config('GOOGLE_MAPS_API_KEY', default='')
 SESSION_COOKIE_AGE = 86400 * 30
 SESSION_SAVE_EVERY_REQUEST = False
 
+# Session storage: 'cached_db' reads sessions from the 'sessions' cache and
+# falls back to the database; 'signed_cookies' keeps them in the browser.
+# Outside DEBUG and tests the cache backends need SESSION_CACHE_URL: a
+# per-process cache would let each worker keep its own copy of a session,
+# so a logout on one worker would not be seen by the others. Without it
+# the default is 'db'.
+SESSION_BACKENDS = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_CACHE_URL = config('SESSION_CACHE_URL', default='')
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+SESSION_CACHE_USABLE = bool(SESSION_CACHE_URL) or DEBUG or TESTING
+SESSION_BACKEND = config('SESSION_BACKEND', default='cached_db' if SESSION_CACHE_USABLE else 'db')
+if SESSION_BACKEND in ('cached_db', 'cache') and not SESSION_CACHE_USABLE:
+    raise ImproperlyConfigured(
+        f"SESSION_BACKEND={SESSION_BACKEND!r} needs a shared cache: set SESSION_CACHE_URL."
+    )
+SESSION_ENGINE = SESSION_BACKENDS[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = 'sessions'
+
 if not DEBUG:
     SECURE_SSL_REDIRECT = False
     SESSION_COOKIE_SECURE = False
@@ -193,6 +223,7 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=DEBUG, cast=bool)
 
 CACHES = {
     'default': {
@@ -201,11 +232,55 @@ CACHES = {
         'OPTIONS': {
             'MAX_ENTRIES': 1000,
         },
-    }
+    },
+    # Separate alias so listing/page caches never evict sessions. Set
+    # SESSION_CACHE_URL (e.g. redis://host:6379/1) to share it between
+    # workers; the local-memory fallback is for DEBUG and tests only.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': SESSION_CACHE_URL,
+    } if SESSION_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
 }
 
 CACHE_MIDDLEWARE_SECONDS = 600
 
+# Product listing result cache (see apps.products.listing_cache)
+CATALOG_LISTING_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    'MAX_PAGE': 5,
+    'CACHE_SEARCH': False,
+    'STATS_TIMEOUT': 60 * 60 * 24 * 7,
+}
+
+# Per-worker in-memory catalog snapshot for listing filters (see apps.products.catalog_engine)
+CATALOG_ENGINE = {
+    'ENABLED': config('CATALOG_ENGINE_ENABLED', default=False, cast=bool),
+    'MAX_PRODUCTS': config('CATALOG_ENGINE_MAX_PRODUCTS', default=200000, cast=int),
+    'MAX_AGE': config('CATALOG_ENGINE_MAX_AGE', default=300, cast=int),
+}
+
+# Automatic review pre-screening (see apps.reviews.screening)
+REVIEW_SCREENING = {
+    'ENABLED': config('REVIEW_SCREENING_ENABLED', default=True, cast=bool),
+    'AUTO_APPROVE_BELOW': 0.2,
+    'AUTO_FLAG_SCORE': 0.8,
+    'REQUIRE_VERIFIED_PURCHASE': True,
+}
+
+# Abandoned cart reminders (apps/cart/abandonment.py)
+CART_ABANDONMENT = {
+    'ENABLED': config('CART_ABANDONMENT_ENABLED', default=True, cast=bool),
+    'ABANDON_AFTER_MINUTES': 60,
+    'REMINDER_INTERVAL_HOURS': 72,
+}
+
 # LOGGING konfiguratsiyasi
 LOGGING = {
     'version': 1,
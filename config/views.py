@@ -1,16 +1,51 @@
 """
 Home view for Market platform.
 """
+import random
+
 from django.shortcuts import render, redirect
-from django.utils.translation import activate
+from django.utils.translation import activate, get_language
 from django.conf import settings
 from django.http import HttpResponseRedirect
+from apps.products.listing_cache import HOME_SCOPE, catalog_version
 from apps.products.models import Product, Category
 
 
+HOME_CACHE_TIMEOUT = 120
+
+STAR_COLORS = ['#fffbe6', '#fff', '#ffe066', '#fff9c4']
+
+
+def _generate_stars(count=250, seed=250):
+    """Decorative hero star layout; seeded so every worker renders the same sky."""
+    rng = random.Random(seed)
+    stars = []
+    for _ in range(count):
+        size = rng.randint(2, 7)
+        opacity = round(rng.uniform(0.5, 1.0), 2)
+        color = rng.choice(STAR_COLORS)
+        blur = rng.randint(2, 10)
+        twinkle = rng.uniform(1.5, 4.5)
+        stars.append({
+            'top': rng.randint(2, 97),
+            'left': rng.randint(2, 97),
+            'size': size,
+            'opacity': opacity,
+            'color': color,
+            'filter': f'drop-shadow(0 0 {blur}px {color}) brightness(1.7)',
+            'twinkle': twinkle,
+        })
+    return stars
+
+
+HERO_STARS = _generate_stars()
+
+
 def home_view(request):
     """
     Home page view with featured products and categories.
+    Anonymous visitors get the page body from a per-language, per-currency
+    fragment cache; the querysets below stay lazy and are skipped on a hit.
     """
     featured_products = Product.objects.filter(
         is_active=True,
@@ -20,32 +55,22 @@ def home_view(request):
     categories = Category.objects.filter(
         is_active=True,
         parent=None
-    )[: 12]
+    )[:12]
 
+    home_cache_key = None
+    if not request.user.is_authenticated:
+        home_cache_key = ':'.join([
+            get_language() or '',
+            request.currency,
+            str(catalog_version(HOME_SCOPE)),
+        ])
 
-    # Generate star positions in Python
-    import random
-    stars = []
-    for i in range(250):
-        size = random.randint(2, 7)
-        opacity = round(random.uniform(0.5, 1.0), 2)
-        color = random.choice(['#fffbe6', '#fff', '#ffe066', '#fff9c4'])
-        blur = random.randint(2, 10)
-        twinkle = random.uniform(1.5, 4.5)
-        star = {
-            'top': random.randint(2, 97),
-            'left': random.randint(2, 97),
-            'size': size,
-            'opacity': opacity,
-            'color': color,
-            'filter': f'drop-shadow(0 0 {blur}px {color}) brightness(1.7)',
-            'twinkle': twinkle,
-        }
-        stars.append(star)
     context = {
         'featured_products': featured_products,
         'categories': categories,
-        'stars': stars,
+        'stars': HERO_STARS,
+        'home_cache_key': home_cache_key,
+        'home_cache_timeout': HOME_CACHE_TIMEOUT,
     }
     return render(request, 'home.html', context)
 
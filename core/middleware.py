@@ -3,30 +3,56 @@ Custom middleware for Market platform.
 """
 from django.conf import settings
 
+CURRENCY_COOKIE = 'currency'
+CURRENCY_COOKIE_SALT = 'core.currency'
+CURRENCY_COOKIE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def set_currency_cookie(response, currency):
+    response.set_signed_cookie(
+        CURRENCY_COOKIE, currency, salt=CURRENCY_COOKIE_SALT,
+        max_age=CURRENCY_COOKIE_MAX_AGE, samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE, httponly=True,
+    )
+
 
 class CurrencyMiddleware:
     """
     Middleware to handle currency selection across the site.
+
+    Sets ``request.currency`` from ``?currency=``, then a signed cookie,
+    then (for signed-in users without the cookie) their saved preference.
+    The session is never touched, so anonymous visitors and crawlers cost
+    no session or database I/O. A switch is stored in the cookie and saved
+    to the user's preference in the background.
     """
 
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        if 'currency' not in request.session:
-            if request.user.is_authenticated and hasattr(request.user, 'preferred_currency'):
-                request.session['currency'] = request.user.preferred_currency
-            else:
-                request.session['currency'] = settings.DEFAULT_CURRENCY
+        supported = settings.SUPPORTED_CURRENCIES
+        cookie = request.get_signed_cookie(CURRENCY_COOKIE, default=None, salt=CURRENCY_COOKIE_SALT)
+        if cookie not in supported:
+            cookie = None
+        requested = request.GET.get('currency')
+        if requested not in supported:
+            requested = None
 
-        if 'currency' in request.GET:
-            new_currency = request.GET['currency']
-            if new_currency in settings.SUPPORTED_CURRENCIES:
-                request.session['currency'] = new_currency
-
-                if request.user.is_authenticated:
-                    request.user.preferred_currency = new_currency
-                    request.user.save(update_fields=['preferred_currency'])
+        currency = requested or cookie
+        # Only look the user up when a session exists; anonymous requests stay I/O free.
+        if currency is None and settings.SESSION_COOKIE_NAME in request.COOKIES and request.user.is_authenticated:
+            preferred = getattr(request.user, 'preferred_currency', None)
+            currency = preferred if preferred in supported else None
+        request.currency = currency or settings.DEFAULT_CURRENCY
 
         response = self.get_response(request)
-        return response
\ No newline at end of file
+
+        if currency and currency != cookie:
+            set_currency_cookie(response, currency)
+        if requested and requested != cookie and request.user.is_authenticated:
+            if getattr(request.user, 'preferred_currency', requested) != requested:
+                from core.services.currency import remember_preferred_currency
+                remember_preferred_currency(request.user.pk, requested)
+
+        return response
@@ -153,10 +153,21 @@ def currency_context(request):
     """
     Context processor for currency in templates.
     """
-    currency = request.session.get('currency', settings.DEFAULT_CURRENCY)
+    currency = getattr(request, 'currency', settings.DEFAULT_CURRENCY)
 
     return {
         'current_currency': currency,
         'supported_currencies': settings.SUPPORTED_CURRENCIES,
         'currency_service': CurrencyService(),
-    }
\ No newline at end of file
+    }
+
+def remember_preferred_currency(user_id, currency):
+    """
+    Save a user's currency switch in the background. The value travels with
+    the task, and the task's UPDATE is conditional, so a switch back to the
+    stored currency writes nothing.
+    """
+    from apps.users.tasks import save_preferred_currency
+    from core.utils.helpers import enqueue_on_commit
+
+    enqueue_on_commit(save_preferred_currency, user_id, currency)
@@ -145,6 +145,24 @@ class EmailService:
             context=context
         )
 
+    def send_cart_reminder(self, abandoned_cart, items):
+        """Remind a customer of the items left in their cart."""
+        subject = "You left something in your cart"
+
+        context = {
+            'user': abandoned_cart.user,
+            'items': items,
+            'subtotal': abandoned_cart.subtotal,
+            'cart_url': f"{settings.SITE_URL}/cart/",
+        }
+
+        return self.send_email(
+            subject=subject,
+            to_emails=[abandoned_cart.user.email],
+            template_name='cart_reminder',
+            context=context
+        )
+
     def send_order_invoice(self, order, attach_pdf=True):
         """
         Send order invoice email with PDF attachment.
@@ -0,0 +1,22 @@
+"""
+Shared helpers for Market platform.
+"""
+from django.db import transaction
+
+
+def enqueue_on_commit(task, *args, **kwargs):
+    """
+    Dispatch a Celery task once the current transaction commits.
+
+    Broker outages must never break the request that triggered the task,
+    so dispatch errors are reported and swallowed; every background job
+    in the project has a management command to catch up on missed work.
+    """
+
+    def dispatch():
+        try:
+            task.delay(*args, **kwargs)
+        except Exception as e:
+            print(f"Error enqueuing task {task.name}: {e}")
+
+    transaction.on_commit(dispatch)
@@ -20,6 +20,18 @@ function getCookie(name) {
 
 const csrftoken = getCookie('csrftoken');
 
+// Forms inside cached fragments carry no per-visitor CSRF token; add it on submit.
+document.addEventListener('submit', function(e) {
+    const form = e.target;
+    if (form.matches('form[data-csrf-cookie]') && !form.querySelector('[name=csrfmiddlewaretoken]')) {
+        const input = document.createElement('input');
+        input.type = 'hidden';
+        input.name = 'csrfmiddlewaretoken';
+        input.value = getCookie('csrftoken');
+        form.appendChild(input);
+    }
+}, true);
+
 // Setup AJAX with CSRF token
 $. ajaxSetup({
     beforeSend: function(xhr, settings) {
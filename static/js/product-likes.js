@@ -41,26 +41,37 @@ function toggleProductLike(productId, button) {
     });
 }
 
+function markLiked(button) {
+    const icon = button.querySelector('i');
+    icon.classList.remove('bi-heart');
+    icon.classList.add('bi-heart-fill');
+    button.classList.add('liked');
+}
+
 // Initialize like buttons
 document.addEventListener('DOMContentLoaded', function() {
     const likeButtons = document.querySelectorAll('.like-btn');
-    
-    likeButtons.forEach(button => {
-        const productId = button.dataset.productId;
-        
-        // Get initial like status
-        fetch(`/products/like-status/${productId}/`)
+
+    // Cards rendered server-side carry data-liked; the rest are looked up in one request.
+    const unknown = Array.from(likeButtons).filter(button => button.dataset.liked === undefined);
+    if (unknown.length) {
+        const ids = unknown.map(button => button.dataset.productId).join(',');
+        fetch(`/products/like-status/?ids=${ids}`, {credentials: 'same-origin'})
             .then(response => response.json())
             .then(data => {
-                if (data.liked) {
-                    const icon = button.querySelector('i');
-                    icon.classList.remove('bi-heart');
-                    icon.classList.add('bi-heart-fill');
-                    button.classList.add('liked');
-                }
+                const liked = new Set((data.liked || []).map(String));
+                unknown.forEach(button => {
+                    if (liked.has(button.dataset.productId)) {
+                        markLiked(button);
+                    }
+                });
             })
             .catch(error => console.error('Error loading like status:', error));
-        
+    }
+
+    likeButtons.forEach(button => {
+        const productId = button.dataset.productId;
+
         // Add click event
         button.addEventListener('click', function(e) {
             e.preventDefault();